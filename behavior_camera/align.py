@@ -0,0 +1,290 @@
+import json
+import numpy as np
+import os
+from typing import Dict, Optional, Tuple
+from .reader import find_session_files, session_frame_indices
+
+ALIGN_MODES = ("nearest", "window", "interpolated")
+
+
+def load_frame_times(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Load the timestamps of the frames stored in a recording.
+
+    Only the timestamp sidecar is read; the video is not decoded.
+
+    Args:
+        path: Video file of any output, timestamp sidecar or base path
+
+    Returns:
+        Tuple of (frame timestamps, capture indices) for the video's frames
+    """
+    video_path, timestamp_path = find_session_files(path)
+    with open(timestamp_path, "r") as f:
+        metadata = json.load(f)
+    capture_indices = session_frame_indices(metadata, video_path)
+    timestamps = np.asarray(metadata["timestamps"], dtype=np.float64)
+    return timestamps[capture_indices], capture_indices
+
+
+def load_events(path: str, column=None) -> np.ndarray:
+    """Load event times from a log file.
+
+    ``.npy`` files hold a 1-D array. Text files (``.csv``, ``.tsv``,
+    ``.txt``) hold one event per row; a header row is detected
+    automatically and ``column`` selects a column by name or position
+    (default: the first). ``.json`` files hold a list of times, or an
+    object whose ``column`` entry is such a list.
+
+    Args:
+        path: Event log file
+        column: Column name or index for tabular logs
+
+    Returns:
+        Event times as float64
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.asarray(np.load(path), dtype=np.float64).ravel()
+    if extension == ".json":
+        with open(path, "r") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data[column] if column is not None else next(iter(data.values()))
+        return np.asarray(data, dtype=np.float64)
+
+    delimiter = {".csv": ",", ".tsv": "\t"}.get(extension)
+    with open(path, "r") as f:
+        first = f.readline()
+    header = [name.strip() for name in first.split(delimiter)]
+    try:
+        [float(value) for value in header if value]
+        has_header = False
+    except ValueError:
+        has_header = True
+
+    if column is None:
+        index = 0
+    elif isinstance(column, int) or str(column).isdigit():
+        index = int(column)
+    elif has_header and column in header:
+        index = header.index(column)
+    else:
+        raise ValueError(f"Column '{column}' not found in {path}")
+    events = np.loadtxt(
+        path,
+        delimiter=delimiter,
+        skiprows=1 if has_header else 0,
+        usecols=index,
+        dtype=np.float64,
+        ndmin=1,
+    )
+    return events
+
+
+def nearest_frames(
+    frame_times: np.ndarray, event_times: np.ndarray, tolerance: Optional[float] = None
+) -> np.ndarray:
+    """Find the frame closest in time to each event.
+
+    Args:
+        frame_times: Sorted frame timestamps
+        event_times: Event times (any order)
+        tolerance: Maximum distance in seconds; events further from every
+            frame are mapped to -1
+
+    Returns:
+        Frame index per event
+    """
+    if len(frame_times) == 0:
+        return np.full(len(event_times), -1, dtype=np.int64)
+    index = np.searchsorted(frame_times, event_times)
+    np.clip(index, 1, max(len(frame_times) - 1, 1), out=index)
+    if len(frame_times) > 1:
+        # Step back where the previous frame is at least as close
+        before = event_times - frame_times[index - 1]
+        after = frame_times[index] - event_times
+        index -= before <= after
+    else:
+        index[:] = 0
+    if tolerance is not None:
+        index[np.abs(frame_times[index] - event_times) > tolerance] = -1
+    return index
+
+
+def window_frames(
+    frame_times: np.ndarray, event_times: np.ndarray, window: Tuple[float, float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the frames within a window around each event.
+
+    Args:
+        frame_times: Sorted frame timestamps
+        event_times: Event times
+        window: (start, end) offsets in seconds relative to each event;
+            frames with ``event + start <= t < event + end`` are included
+
+    Returns:
+        Tuple of (start, stop) frame index arrays; frames of event ``i`` are
+        ``start[i]:stop[i]``
+    """
+    start = np.searchsorted(frame_times, event_times + window[0], side="left")
+    stop = np.searchsorted(frame_times, event_times + window[1], side="left")
+    return start, stop
+
+
+def interpolated_frames(
+    frame_times: np.ndarray, event_times: np.ndarray, tolerance: Optional[float] = None
+) -> np.ndarray:
+    """Express each event time as a fractional frame index.
+
+    Args:
+        frame_times: Sorted frame timestamps
+        event_times: Event times
+        tolerance: Maximum distance to the nearest frame; events outside the
+            recording or further away (e.g. inside a gap of dropped frames)
+            become NaN
+
+    Returns:
+        Fractional frame index per event
+    """
+    position = np.interp(
+        event_times,
+        frame_times,
+        np.arange(len(frame_times), dtype=np.float64),
+        left=np.nan,
+        right=np.nan,
+    )
+    if tolerance is not None:
+        nearest = nearest_frames(frame_times, event_times)
+        position[np.abs(frame_times[nearest] - event_times) > tolerance] = np.nan
+    return position
+
+
+def events_per_frame(
+    frame_times: np.ndarray, event_times: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Map frames to events.
+
+    Args:
+        frame_times: Sorted frame timestamps
+        event_times: Sorted event times
+
+    Returns:
+        Tuple of (count, last): the number of events in each frame interval
+        ``[t_i, t_i+1)`` and the index of the latest event at or before each
+        frame (-1 if none)
+    """
+    interval = np.searchsorted(frame_times, event_times, side="right") - 1
+    interval = interval[interval >= 0]
+    count = np.bincount(interval, minlength=len(frame_times))
+    last = np.searchsorted(event_times, frame_times, side="right") - 1
+    return count, last
+
+
+def _compact(array: np.ndarray) -> np.ndarray:
+    """Cast an integer array to the smallest dtype that holds its values."""
+    if array.size == 0 or array.dtype.kind not in "iu":
+        return array
+    low, high = int(array.min()), int(array.max())
+    candidates = (
+        (np.int8, np.int16, np.int32) if low < 0 else (np.uint8, np.uint16, np.uint32)
+    )
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return array.astype(dtype, copy=False)
+    return array
+
+
+def align_events(
+    frame_times: np.ndarray,
+    event_times: np.ndarray,
+    mode: str = "nearest",
+    tolerance: Optional[float] = None,
+    window: Tuple[float, float] = (0.0, 0.0),
+) -> Dict[str, np.ndarray]:
+    """Align one event stream with the frames of a recording.
+
+    Args:
+        frame_times: Sorted frame timestamps
+        event_times: Event times on the same clock
+        mode: ``nearest``, ``window`` or ``interpolated``
+        tolerance: Maximum event-to-frame distance in seconds
+        window: (start, end) offsets for ``window`` mode
+
+    Returns:
+        Dictionary of arrays: ``times`` (sorted events), ``frame`` and
+        ``offset`` (nearest frame and event minus frame time), the mode's
+        ``window_start``/``window_stop`` or ``frame_interp``, and the
+        per-frame ``count`` and ``last_event``
+    """
+    if mode not in ALIGN_MODES:
+        raise ValueError(
+            f"Unknown alignment mode '{mode}', expected one of: "
+            f"{', '.join(ALIGN_MODES)}"
+        )
+    frame_times = np.asarray(frame_times, dtype=np.float64)
+    if np.any(np.diff(frame_times) < 0):
+        raise ValueError("Frame timestamps are not monotonic")
+    event_times = np.sort(np.asarray(event_times, dtype=np.float64))
+
+    frame = nearest_frames(frame_times, event_times, tolerance)
+    offset = np.full(len(event_times), np.nan, dtype=np.float32)
+    matched = frame >= 0
+    offset[matched] = event_times[matched] - frame_times[frame[matched]]
+    count, last = events_per_frame(frame_times, event_times)
+    result = {
+        "times": event_times,
+        "frame": _compact(frame),
+        "offset": offset,
+        "count": _compact(count),
+        "last_event": _compact(last),
+    }
+    if mode == "window":
+        start, stop = window_frames(frame_times, event_times, window)
+        result["window_start"] = _compact(start)
+        result["window_stop"] = _compact(stop)
+    elif mode == "interpolated":
+        result["frame_interp"] = interpolated_frames(
+            frame_times, event_times, tolerance
+        )
+    return result
+
+
+def align_session(
+    path: str,
+    events: Dict[str, np.ndarray],
+    mode: str = "nearest",
+    tolerance: Optional[float] = None,
+    window: Tuple[float, float] = (0.0, 0.0),
+    offset: float = 0.0,
+) -> Dict[str, np.ndarray]:
+    """Align several event streams with a recording.
+
+    Args:
+        path: Video file, timestamp sidecar or base path of the recording
+        events: Event times per stream name
+        mode: ``nearest``, ``window`` or ``interpolated``
+        tolerance: Maximum event-to-frame distance in seconds
+        window: (start, end) offsets for ``window`` mode
+        offset: Seconds added to every event time to reach the frame clock
+
+    Returns:
+        Flat dictionary of arrays (``frame_times``, ``capture_indices`` and
+        ``<stream>_<array>`` for every stream), ready for ``np.savez``
+    """
+    frame_times, capture_indices = load_frame_times(path)
+    arrays = {
+        "frame_times": frame_times,
+        "capture_indices": _compact(capture_indices),
+    }
+    for name, event_times in events.items():
+        aligned = align_events(
+            frame_times,
+            np.asarray(event_times, dtype=np.float64) + offset,
+            mode,
+            tolerance,
+            window,
+        )
+        for key, array in aligned.items():
+            arrays[f"{name}_{key}"] = array
+    return arrays
@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+from typing import Optional
+
+# Color filter arrangements as reported by the Galaxy ``PixelColorFilter``
+# feature (top-left 2x2 cell, row by row), mapped to the OpenCV conversion.
+# OpenCV names its Bayer codes after the second row, so an RGGB sensor
+# ("BayerRG") converts with COLOR_BayerBG2BGR.
+BAYER_PATTERNS = {
+    "BayerRG": cv2.COLOR_BayerBG2BGR,
+    "BayerGR": cv2.COLOR_BayerGB2BGR,
+    "BayerGB": cv2.COLOR_BayerGR2BGR,
+    "BayerBG": cv2.COLOR_BayerRG2BGR,
+}
+
+# Row/column of the red and blue sample within each 2x2 cell
+_CELL_OFFSETS = {
+    "BayerRG": ((0, 0), (1, 1)),
+    "BayerGR": ((0, 1), (1, 0)),
+    "BayerGB": ((1, 0), (0, 1)),
+    "BayerBG": ((1, 1), (0, 0)),
+}
+
+
+def is_bayer(pattern: Optional[str]) -> bool:
+    """Return True if ``pattern`` names a supported color filter array."""
+    return pattern in BAYER_PATTERNS
+
+
+def _mosaic(raw: np.ndarray) -> np.ndarray:
+    """Return the single-channel mosaic of a raw or decoded frame.
+
+    Raw frames stored in a video come back from the decoder as three
+    identical channels; the first one is the mosaic.
+    """
+    if raw.ndim == 3:
+        raw = np.ascontiguousarray(raw[..., 0])
+    return raw
+
+
+def demosaic(
+    raw: np.ndarray, pattern: str, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Interpolate a full-resolution BGR frame from a Bayer mosaic.
+
+    Args:
+        raw: Bayer mosaic (or decoded 3-channel copy of one)
+        pattern: Color filter arrangement, e.g. ``BayerRG``
+        out: Optional preallocated BGR output
+
+    Returns:
+        BGR frame of the same size
+    """
+    if out is None:
+        return cv2.cvtColor(_mosaic(raw), BAYER_PATTERNS[pattern])
+    return cv2.cvtColor(_mosaic(raw), BAYER_PATTERNS[pattern], dst=out)
+
+
+def demosaic_tiled(raw: np.ndarray, pattern: str, scale: float = 0.5) -> np.ndarray:
+    """Build a downscaled BGR frame from a Bayer mosaic without interpolation.
+
+    Each 2x2 cell becomes one pixel (red, mean of both greens, blue), which
+    costs a fraction of a full demosaic and yields a half-size image; other
+    scales are resized from there.
+
+    Args:
+        raw: Bayer mosaic (or decoded 3-channel copy of one)
+        pattern: Color filter arrangement, e.g. ``BayerRG``
+        scale: Output size relative to the mosaic
+
+    Returns:
+        BGR frame
+    """
+    raw = _mosaic(raw)
+    height, width = raw.shape[0] & ~1, raw.shape[1] & ~1
+    (red_y, red_x), (blue_y, blue_x) = _CELL_OFFSETS[pattern]
+    green_y, green_x = red_y, 1 - red_x
+    wide = np.uint16 if raw.dtype == np.uint8 else np.uint32
+
+    tiled = np.empty((height // 2, width // 2, 3), dtype=raw.dtype)
+    tiled[..., 0] = raw[blue_y:height:2, blue_x:width:2]
+    tiled[..., 2] = raw[red_y:height:2, red_x:width:2]
+    green = raw[green_y:height:2, green_x:width:2].astype(wide)
+    green += raw[1 - green_y : height : 2, 1 - green_x : width : 2]
+    tiled[..., 1] = green >> 1
+
+    if scale != 0.5:
+        interpolation = cv2.INTER_AREA if scale < 0.5 else cv2.INTER_LINEAR
+        tiled = cv2.resize(
+            tiled,
+            (max(1, round(raw.shape[1] * scale)), max(1, round(raw.shape[0] * scale))),
+            interpolation=interpolation,
+        )
+    return tiled
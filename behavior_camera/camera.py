@@ -3,6 +3,12 @@ import numpy as np
 import time
 from typing import Dict, Optional, Tuple
 from .usb_camera import USBCamera
+from .exposure import AutoExposure
+from .frame_info import FrameIdTracker, FrameInfo
+from .grabber import CAPTURE_MODES, FrameGrabber
+from .mjpeg import JpegFrame, is_jpeg
+from .replay import ReplayCamera
+from .scheduler import ACQUISITION_MODES, FrameScheduler
 
 
 class Camera:
@@ -21,6 +27,15 @@ class Camera:
         self.last_frame_time = 0
         self.fps = 0
         self.using_usb = False  # Track which interface we're using
+        self.replay = None  # Recording played back instead of a camera
+        self.auto_exposure = None  # Software AE/AG controller, if enabled
+        self.acquisition_mode = "free"
+        self.scheduler = None  # Frame pacing / software trigger timeline
+        self.grabber = None  # Grab thread of the OpenCV path
+        self.passthrough = False  # OpenCV path delivers undecoded MJPEG
+        self.frame_info = None  # Descriptor of the last frame returned
+        self.frame_ids = FrameIdTracker()  # Gap detection for OpenCV and replay
+        self.roi = None  # OpenCV frame size as (0, 0, width, height)
 
     def initialize(self) -> bool:
         """Initialize camera connection.
@@ -28,14 +43,26 @@ class Camera:
         Returns:
             bool: True if initialization successful
         """
+        # Play back a recording instead of opening a camera
+        replay_config = self.config.get("replay")
+        if replay_config and replay_config.get("path"):
+            self.replay = ReplayCamera(replay_config)
+            if self.replay.initialize():
+                return True
+            self.replay = None
+            return False
+
         # First try USB direct control
         try:
             print("Attempting direct USB control...")
             self.usb_camera = USBCamera()
-            if self.usb_camera.initialize():
+            if self.usb_camera.is_initialized or self.usb_camera.initialize():
                 self.usb_camera.configure(self.config)
                 print("Successfully initialized USB camera")
                 self.using_usb = True
+                self._setup_auto_exposure()
+                self._setup_acquisition()
+                self.usb_camera.start_capture()
                 return True
         except Exception as e:
             print(f"Direct USB control failed: {e}")
@@ -87,20 +114,26 @@ class Camera:
             actual_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
             print(f"Requested resolution: {width}x{height}")
             print(f"Actual resolution: {actual_width}x{actual_height}")
+            self.roi = (0, 0, int(actual_width), int(actual_height))
 
             # Try different exposure settings
             exposure_time = self.config["exposure_time"]
             print(f"\nTrying to set exposure to {exposure_time}μs...")
 
-            # Try both milliseconds and raw values
-            exposure_attempts = [
-                exposure_time / 1000.0,  # Convert to milliseconds
-                exposure_time,  # Raw microseconds
-                -exposure_time / 1000.0,  # Negative values sometimes work
-                1.0,
-                0.0,
-                -1.0,  # Common fallback values
-            ]
+            if self._software_ae_config().get("enabled", False):
+                # The software controller converges from here instead of
+                # probing exposure values
+                exposure_attempts = [exposure_time / 1000.0]
+            else:
+                # Try both milliseconds and raw values
+                exposure_attempts = [
+                    exposure_time / 1000.0,  # Convert to milliseconds
+                    exposure_time,  # Raw microseconds
+                    -exposure_time / 1000.0,  # Negative values sometimes work
+                    1.0,
+                    0.0,
+                    -1.0,  # Common fallback values
+                ]
 
             for exp in exposure_attempts:
                 print(f"Trying exposure value: {exp}")
@@ -153,35 +186,277 @@ class Camera:
 
             print("\nSuccessfully initialized OpenCV camera")
             self.using_usb = False
+            self._setup_auto_exposure()
+            self._setup_acquisition()
+            self._setup_capture()
             return True
 
         except Exception as e:
             print(f"OpenCV initialization failed: {e}")
             return False
 
+    def _software_ae_config(self) -> Dict:
+        """Return the ``software_auto_exposure`` configuration section."""
+        return self.config.get("software_auto_exposure") or {}
+
+    def _setup_auto_exposure(self) -> None:
+        """Create the software AE/AG controller if it is enabled."""
+        ae_config = self._software_ae_config()
+        if not ae_config.get("enabled", False):
+            self.auto_exposure = None
+            return
+        self.auto_exposure = AutoExposure(
+            ae_config,
+            self.config["exposure_time"],
+            self.config["gain"],
+            self.config.get("pixel_depth", 8),
+        )
+        print("Software auto exposure enabled")
+
+    def _setup_acquisition(self) -> None:
+        """Configure frame pacing or triggering from ``camera.acquisition``.
+
+        ``paced`` waits for each deadline before grabbing, ``software`` issues
+        a software trigger at each deadline and ``external`` leaves timing to
+        a hardware trigger line. Modes the backend cannot provide fall back
+        to the closest available one.
+        """
+        acquisition = self.config.get("acquisition") or {}
+        mode = acquisition.get("mode", "free")
+        if mode not in ACQUISITION_MODES:
+            raise ValueError(
+                f"Unknown acquisition mode '{mode}', expected one of: "
+                f"{', '.join(ACQUISITION_MODES)}"
+            )
+
+        if mode == "software" and not (
+            self.using_usb and self.usb_camera.set_trigger("software")
+        ):
+            print("Software trigger not available, pacing the grab loop instead")
+            mode = "paced"
+        elif mode == "external" and not (
+            self.using_usb
+            and self.usb_camera.set_trigger(
+                "external",
+                acquisition.get("trigger_source", "Line0"),
+                acquisition.get("trigger_activation"),
+            )
+        ):
+            print("External trigger not available, running free")
+            mode = "free"
+
+        self.acquisition_mode = mode
+        self.scheduler = None
+        if mode in ("paced", "software"):
+            self.scheduler = FrameScheduler(self.config["framerate"], acquisition)
+        if mode != "free":
+            print(f"Acquisition mode: {mode}")
+
+    def _setup_capture(self) -> None:
+        """Start the OpenCV grab thread configured by ``camera.capture``.
+
+        ``queued`` (default) decodes and queues every frame for recording,
+        ``latest`` decodes only the frames that are asked for (preview and
+        closed-loop use) and ``sync`` reads synchronously without a thread.
+        Paced acquisition samples the newest frame at each deadline, so it
+        uses ``latest``.
+
+        With ``passthrough`` the backend's RGB conversion is turned off so
+        MJPEG cameras deliver the compressed bitstream, which is passed on
+        as :class:`JpegFrame` and decoded only where pixels are needed.
+        """
+        capture = dict(self.config.get("capture") or {})
+        mode = capture.get("mode", "queued")
+        if mode not in CAPTURE_MODES:
+            raise ValueError(
+                f"Unknown capture mode '{mode}', expected one of: "
+                f"{', '.join(CAPTURE_MODES)}"
+            )
+        if capture.get("passthrough", False):
+            self._setup_passthrough()
+        if mode == "sync":
+            return
+        if mode == "queued" and self.scheduler is not None:
+            mode = "latest"
+        capture["mode"] = mode
+        self.grabber = FrameGrabber(self.cap, capture)
+        print(f"Capture mode: {mode}")
+
+    def _setup_passthrough(self) -> None:
+        """Disable RGB conversion if the camera delivers MJPEG."""
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        ret, frame = self.cap.read()
+        if ret and frame is not None and is_jpeg(frame.reshape(-1)):
+            self.passthrough = True
+            print("MJPEG passthrough enabled")
+            return
+        # Not MJPEG (or the backend ignores the property): decode as usual
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        print("Camera does not deliver MJPEG, passthrough disabled")
+
+    def get_capture_stats(self) -> Dict:
+        """Get frame delivery statistics of the active backend.
+
+        Returns:
+            Dictionary of Galaxy data stream or OpenCV grab thread
+            statistics (empty without either)
+        """
+        if self.using_usb and self.usb_camera:
+            return self.usb_camera.get_stream_stats()
+        if self.grabber is None:
+            return {}
+        return self.grabber.stats()
+
+    def get_acquisition_stats(self) -> Dict:
+        """Get deadline statistics of the frame scheduler.
+
+        Returns:
+            Dictionary of scheduler statistics (empty without a scheduler)
+        """
+        if self.scheduler is None:
+            return {}
+        return self.scheduler.stats()
+
+    def freeze_auto_exposure(self, frozen: bool = True) -> None:
+        """Hold or release the software auto exposure settings.
+
+        Args:
+            frozen: True to keep exposure and gain fixed
+        """
+        if self.auto_exposure:
+            if frozen:
+                self.auto_exposure.freeze()
+            else:
+                self.auto_exposure.unfreeze()
+
+    def set_exposure_gain(self, exposure_time: float, gain: float) -> None:
+        """Set exposure and gain together.
+
+        Args:
+            exposure_time: Exposure time in microseconds
+            gain: Gain in dB
+        """
+        if self.using_usb and self.usb_camera:
+            self.usb_camera.update_settings(ExposureTime=exposure_time, Gain=gain)
+        elif self.cap:
+            # OpenCV exposure units are backend specific; milliseconds are
+            # the first value tried during initialization
+            target = self.grabber or self.cap
+            target.set(cv2.CAP_PROP_EXPOSURE, exposure_time / 1000.0)
+            target.set(cv2.CAP_PROP_GAIN, gain)
+
     def get_frame(self) -> Tuple[float, Optional[np.ndarray]]:
         """Capture a frame from the camera.
 
         Returns:
             Tuple of (timestamp, frame)
         """
+        timestamp, frame, _ = self.get_frame_with_info()
+        return timestamp, frame
+
+    def get_frame_with_info(
+        self,
+    ) -> Tuple[float, Optional[np.ndarray], Optional[FrameInfo]]:
+        """Capture a frame together with its descriptor.
+
+        The descriptor is returned with the frame it describes, so it can be
+        passed on with the frame (e.g. to ``VideoRecorder.record_frame``).
+
+        Returns:
+            Tuple of (timestamp, frame, descriptor); frame and descriptor
+            are None if no frame was captured
+        """
+        timestamp, frame, info = self._read_frame()
+        if frame is None:
+            return timestamp, None, None
+        self.frame_info = info
+        if self.auto_exposure is not None:
+            settings = self.auto_exposure.update(frame)
+            if settings is not None:
+                self.set_exposure_gain(*settings)
+        return timestamp, frame, info
+
+    def _read_frame(
+        self,
+    ) -> Tuple[float, Optional[np.ndarray], Optional[FrameInfo]]:
+        """Read the next frame and its descriptor from the active backend."""
+        if self.replay:
+            timestamp, frame = self.replay.get_frame()
+            if frame is None:
+                return timestamp, None, None
+            # Frames dropped in the recording show up as gaps
+            capture_index = self.replay.settings_frame
+            info = FrameInfo(
+                capture_index,
+                time.time(),
+                settings=self.replay.frame_metadata,
+                gap=self.frame_ids.observe(capture_index),
+            )
+            return timestamp, frame, info
+        if self.scheduler is not None:
+            self.scheduler.wait()
+            if self.acquisition_mode == "software":
+                self.usb_camera.trigger()
         if self.using_usb and self.usb_camera:
-            return self.usb_camera.get_frame()
+            return self.usb_camera.get_frame_with_info()
         elif self.cap and self.cap.isOpened():
-            timestamp = time.time()
-            ret, frame = self.cap.read()
+            if self.grabber is not None:
+                timestamp, frame, sequence = self.grabber.read()
+                ret = frame is not None
+            else:
+                timestamp = time.time()
+                ret, frame = self.cap.read()
+                sequence = self.frame_count + 1
 
             if ret:
+                if self.passthrough:
+                    frame = JpegFrame(frame)
                 self.frame_count += 1
+                # Only the queued grab thread passes on every grabbed frame,
+                # so only there a sequence gap means a lost frame
+                queued = self.grabber is not None and self.grabber.mode == "queued"
+                info = FrameInfo(
+                    sequence,
+                    time.time(),
+                    pixel_format="MJPEG" if self.passthrough else "BGR8",
+                    roi=self.roi,
+                    gap=self.frame_ids.observe(sequence) if queued else None,
+                )
                 if self.frame_count % 30 == 0:  # Update FPS every 30 frames
                     current_time = time.time()
                     self.fps = 30 / (current_time - self.last_frame_time)
                     self.last_frame_time = current_time
-                return timestamp, frame
+                return timestamp, frame, info
             else:
-                return timestamp, None
+                return timestamp, None, None
         else:
-            return time.time(), None
+            return time.time(), None, None
+
+    def get_frame_metadata(self) -> Dict:
+        """Get the camera settings in effect for the last frame.
+
+        Returns:
+            Dictionary of read-back feature values (empty for OpenCV); the
+            recorded settings when replaying
+        """
+        if self.frame_info is not None:
+            return self.frame_info.settings
+        if self.using_usb and self.usb_camera:
+            return self.usb_camera.frame_metadata
+        return {}
+
+    def get_frame_info(self) -> Optional[FrameInfo]:
+        """Get the descriptor of the last frame.
+
+        Use :meth:`get_frame_with_info` to receive the descriptor together
+        with its frame.
+
+        Returns:
+            FrameInfo with frame ID, timestamps, pixel format, ROI, applied
+            settings and the number of frames lost before it; None before
+            the first frame
+        """
+        return self.frame_info
 
     def get_fps(self) -> float:
         """Get current frames per second.
@@ -193,9 +468,15 @@ class Camera:
 
     def release(self) -> None:
         """Release camera resources."""
+        if self.replay:
+            self.replay.release()
+            self.replay = None
         if self.usb_camera:
             self.usb_camera.release()
             self.usb_camera = None
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
         if self.cap:
             self.cap.release()
             self.cap = None
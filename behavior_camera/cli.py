@@ -1,8 +1,16 @@
 import click
 import cv2
-import yaml
+import numpy as np
+import os
 import time
+from datetime import datetime
+from .align import ALIGN_MODES, align_session, load_events
 from .camera import Camera
+from .config import load_config
+from .daemon import AcquisitionDaemon, send_command
+from .recorder import VideoRecorder
+from .transcode import run_transcode
+from .writers import FILE_FORMATS
 
 
 @click.group()
@@ -22,11 +30,17 @@ def cli():
 def preview(config):
     """Preview camera feed."""
     # Load configuration
-    with open(config, "r") as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_config(config)
+    capture = dict(cfg["camera"].get("capture") or {})
+    if capture.get("mode") != "sync":
+        # Show the newest frame instead of working through a backlog
+        capture["mode"] = "latest"
+    # Every previewed frame is decoded anyway
+    capture["passthrough"] = False
+    cfg["camera"]["capture"] = capture
 
     # Initialize camera
-    camera = Camera(cfg)
+    camera = Camera(cfg["camera"])
     if not camera.initialize():
         click.echo("Failed to initialize camera")
         return
@@ -76,11 +90,10 @@ def preview(config):
 def test(config):
     """Test camera configuration."""
     # Load configuration
-    with open(config, "r") as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_config(config)
 
     # Initialize camera
-    camera = Camera(cfg)
+    camera = Camera(cfg["camera"])
     if not camera.initialize():
         click.echo("Failed to initialize camera")
         return
@@ -117,61 +130,475 @@ def test(config):
     "--output",
     "-o",
     type=click.Path(),
-    default="recording.avi",
-    help="Output video file path",
+    default=None,
+    help=(
+        "Output directory (defaults to recording.output_directory); a file "
+        "path such as trial.avi names the session after the file stem"
+    ),
 )
 @click.option(
     "--duration", "-d", type=float, default=10.0, help="Recording duration in seconds"
 )
-def record(config, output, duration):
+@click.option(
+    "--preview/--no-preview",
+    default=None,
+    help="Show a preview window (defaults to recording.preview)",
+)
+@click.option(
+    "--status-interval",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Seconds between status updates",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True),
+    default=None,
+    help="Play back a recording instead of opening the camera",
+)
+@click.option(
+    "--replay-speed",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Replay speed relative to the original timing (0: as fast as possible)",
+)
+@click.option(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="Serve Prometheus metrics on this local port",
+)
+def record(
+    config,
+    output,
+    duration,
+    preview,
+    status_interval,
+    replay,
+    replay_speed,
+    metrics_port,
+):
     """Record video from camera."""
     # Load configuration
-    with open(config, "r") as f:
-        cfg = yaml.safe_load(f)
+    cfg = load_config(config)
+    if preview is not None:
+        cfg["recording"]["preview"] = preview
+    if metrics_port is not None:
+        metrics_config = cfg["recording"].setdefault("metrics", {}) or {}
+        metrics_config.update({"enabled": True, "port": metrics_port})
+        cfg["recording"]["metrics"] = metrics_config
+    if replay:
+        cfg["camera"]["replay"] = {
+            "path": replay,
+            "realtime": replay_speed > 0,
+            "speed": replay_speed or 1.0,
+        }
 
     # Initialize camera
-    camera = Camera(cfg)
+    camera = Camera(cfg["camera"])
     if not camera.initialize():
         click.echo("Failed to initialize camera")
         return
 
-    # Get camera resolution
-    width = cfg["resolution"]["width"]
-    height = cfg["resolution"]["height"]
-
-    # Create video writer
-    fourcc = cv2.VideoWriter_fourcc(*"XVID")
-    out = cv2.VideoWriter(output, fourcc, 30.0, (width, height))
-
-    start_time = time.time()
-    frame_count = 0
+    output_dir, base_filename = output or cfg["recording"]["output_directory"], None
+    if output and os.path.splitext(output)[1]:
+        # A video file path, as accepted before sessions were directories;
+        # the container still follows recording.file_format
+        output_dir = os.path.dirname(output) or "."
+        base_filename = os.path.splitext(os.path.basename(output))[0]
+    recorder = VideoRecorder(output_dir, cfg)
+    failed_frames = 0
+    summary = None
 
     try:
-        click.echo(f"Recording for {duration} seconds...")
-        while (time.time() - start_time) < duration:
-            timestamp, frame = camera.get_frame()
+        recorder.start_recording(base_filename)
+        click.echo(f"Recording for {duration} seconds to {recorder.video_path}...")
+        start_time = time.time()
+        next_status = start_time + status_interval
+
+        while True:
+            now = time.time()
+            if now - start_time >= duration:
+                break
 
+            timestamp, frame, info = camera.get_frame_with_info()
             if frame is not None:
-                # Write frame
-                out.write(frame)
-                frame_count += 1
-
-                # Display progress
-                elapsed = time.time() - start_time
-                fps = frame_count / elapsed
-                click.echo(f"\rRecorded {frame_count} frames ({fps:.1f} fps)", nl=False)
+                recorder.record_frame(frame, timestamp, info=info)
+            elif camera.replay and camera.replay.finished:
+                break
             else:
-                click.echo("\nFailed to capture frame")
-                time.sleep(0.1)
+                failed_frames += 1
+                time.sleep(0.01)
 
-        click.echo("\nRecording complete")
-        click.echo(f"Saved {frame_count} frames to {output}")
-        click.echo(f"Average FPS: {frame_count / duration:.1f}")
+            # Throttled status line
+            if now >= next_status:
+                next_status = now + status_interval
+                elapsed = now - start_time
+                click.echo(
+                    f"\rRecorded {recorder.frame_count} frames "
+                    f"({recorder.frame_count / elapsed:.1f} fps, "
+                    f"{recorder.dropped_count} dropped, "
+                    f"{recorder.queue_depth} queued)",
+                    nl=False,
+                )
 
     finally:
-        out.release()
+        summary = recorder.stop_recording()
         camera.release()
 
+    click.echo("\nRecording complete")
+    if summary:
+        click.echo(
+            f"Saved {summary['frames_written']} frames to {summary['video_path']}"
+        )
+        click.echo(f"Timestamps: {recorder.timestamp_path}")
+        click.echo(
+            f"Captured {summary['frames_captured']} frames in "
+            f"{summary['duration_s']:.1f} s ({summary['capture_fps']:.1f} fps)"
+        )
+        click.echo(
+            f"Written {summary['write_fps']:.1f} fps, "
+            f"{summary['frames_dropped']} dropped, {failed_frames} failed captures, "
+            f"{summary['frames_lost_at_source']} lost at the source"
+        )
+        acquisition = camera.get_acquisition_stats()
+        if acquisition:
+            click.echo(
+                f"Acquisition ({camera.acquisition_mode}): "
+                f"{acquisition['missed_deadlines']} missed deadlines, "
+                f"lateness p99 {acquisition.get('lateness_p99_ms', 0.0):.2f} ms"
+            )
+        capture = camera.get_capture_stats()
+        if capture:
+            click.echo(
+                f"Capture ({capture['mode']}): {capture['frames_grabbed']} grabbed, "
+                f"{capture['frames_dropped']} dropped, grab-to-app latency p99 "
+                f"{capture.get('latency_p99_ms', 0.0):.2f} ms"
+            )
+            if "driver_dropped" in capture:
+                click.echo(
+                    f"  {capture['driver_dropped']} lost in the driver (frame ID "
+                    f"gaps), {capture['incomplete']} incomplete, "
+                    f"{capture['queue_dropped']} lost to a full queue"
+                )
+        if "latency_mean_ms" in summary:
+            click.echo(
+                f"Write latency: mean {summary['latency_mean_ms']:.1f} ms, "
+                f"p95 {summary['latency_p95_ms']:.1f} ms, "
+                f"max {summary['latency_max_ms']:.1f} ms"
+            )
+
+
+@cli.command()
+@click.argument("sources", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(file_okay=False),
+    required=True,
+    help="Directory receiving the transcoded sessions",
+)
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(sorted(k for k, v in FILE_FORMATS.items() if "image" not in v)),
+    default="h264",
+    show_default=True,
+    help="Target recording format",
+)
+@click.option(
+    "--crf", type=int, default=None, help="x264/x265 quality (lower is better)"
+)
+@click.option("--preset", default=None, help="x264/x265 preset, e.g. slow")
+@click.option("--lossless", is_flag=True, help="Encode losslessly")
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=None,
+    help="Parallel jobs (defaults to CPU count divided by --threads)",
+)
+@click.option(
+    "--threads", type=int, default=1, show_default=True, help="Encoder threads per job"
+)
+@click.option(
+    "--io-jobs",
+    type=int,
+    default=None,
+    help="Jobs allowed to read source files at the same time",
+)
+@click.option(
+    "--demosaic", is_flag=True, help="Convert outputs stored as raw Bayer to color"
+)
+def transcode(
+    sources,
+    output,
+    file_format,
+    crf,
+    preset,
+    lossless,
+    jobs,
+    threads,
+    io_jobs,
+    demosaic,
+):
+    """Recompress recorded sessions in parallel.
+
+    Scans SOURCES for recordings, transcodes every output and copies the
+    timestamp sidecars unchanged. Interrupted batches resume where they
+    stopped.
+    """
+    encoder = {"crf": crf, "preset": preset, "lossless": lossless or None}
+    recording_config = {
+        "file_format": file_format,
+        "encoder": {k: v for k, v in encoder.items() if v is not None},
+    }
+    summary = run_transcode(
+        list(sources),
+        output,
+        recording_config,
+        jobs=jobs,
+        io_jobs=io_jobs,
+        threads=threads,
+        demosaic=demosaic,
+        echo=click.echo,
+    )
+    click.echo(
+        f"Transcoded {summary['done']} videos ({summary['frames']} frames), "
+        f"{summary['failed']} failed, {summary['skipped']} already done"
+    )
+    if summary["source_bytes"]:
+        click.echo(
+            f"{summary['source_bytes'] / 1e9:.2f} GB -> "
+            f"{summary['output_bytes'] / 1e9:.2f} GB"
+        )
+
+
+@cli.command()
+@click.argument("recording", type=click.Path(exists=True))
+@click.option(
+    "--events",
+    "-e",
+    "event_specs",
+    multiple=True,
+    required=True,
+    help="Event stream as NAME=PATH[@COLUMN]; may be repeated",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Output .npz file (defaults to <recording>_aligned.npz)",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(ALIGN_MODES),
+    default="nearest",
+    show_default=True,
+    help="How events are mapped to frames",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=None,
+    help="Maximum event-to-frame distance in seconds",
+)
+@click.option(
+    "--window",
+    type=float,
+    nargs=2,
+    default=(0.0, 0.0),
+    help="Window start and end in seconds relative to each event",
+)
+@click.option(
+    "--offset",
+    type=float,
+    default=0.0,
+    help="Seconds added to event times to reach the camera clock",
+)
+def align(recording, event_specs, output, mode, tolerance, window, offset):
+    """Align event logs (licks, TTL pulses, stimuli) with recorded frames."""
+    events = {}
+    for spec in event_specs:
+        name, sep, path = spec.partition("=")
+        if not sep or not name or not path:
+            raise click.BadParameter(f"expected NAME=PATH, got '{spec}'")
+        column = None
+        if "@" in path:
+            path, column = path.rsplit("@", 1)
+        events[name] = load_events(path, column)
+
+    arrays = align_session(recording, events, mode, tolerance, window, offset)
+    if output is None:
+        output = f"{os.path.splitext(recording)[0]}_aligned.npz"
+    np.savez(output, **arrays)
+
+    click.echo(f"{len(arrays['frame_times'])} frames")
+    for name in events:
+        frame = arrays[f"{name}_frame"]
+        click.echo(
+            f"{name}: {len(frame)} events, {int((frame >= 0).sum())} matched"
+            + (f" within {tolerance} s" if tolerance is not None else "")
+        )
+    click.echo(f"Saved aligned arrays to {output}")
+
+
+@cli.command()
+@click.option(
+    "--config",
+    "-c",
+    type=click.Path(exists=True),
+    default="config.yaml",
+    help="Path to camera configuration file",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Output directory (defaults to recording.output_directory)",
+)
+@click.option("--port", type=int, default=None, help="Command port (daemon.port)")
+def daemon(config, output, port):
+    """Keep the camera streaming and record sessions on command."""
+    cfg = load_config(config)
+    if port is not None:
+        cfg.setdefault("daemon", {})
+        cfg["daemon"] = dict(cfg["daemon"] or {}, port=port)
+    acquisition = AcquisitionDaemon(cfg, output)
+    try:
+        acquisition.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    click.echo("Daemon stopped")
+
+
+@cli.group()
+@click.option(
+    "--host",
+    default=AcquisitionDaemon.DEFAULTS["host"],
+    show_default=True,
+    help="Daemon address",
+)
+@click.option(
+    "--port",
+    type=int,
+    default=AcquisitionDaemon.DEFAULTS["port"],
+    show_default=True,
+    help="Daemon command port",
+)
+@click.pass_context
+def session(ctx, host, port):
+    """Control a running acquisition daemon."""
+    ctx.obj = {"host": host, "port": port}
+
+
+def _send(ctx, command: str, **arguments) -> dict:
+    """Send a command to the daemon and fail on an error reply."""
+    try:
+        reply = send_command(command, ctx.obj["host"], ctx.obj["port"], **arguments)
+    except OSError as e:
+        raise click.ClickException(f"Cannot reach daemon: {e}")
+    if not reply.get("ok"):
+        raise click.ClickException(reply.get("error", "Command failed"))
+    return reply
+
+
+def _parse_time(value: str) -> float:
+    """Parse a UNIX timestamp or a time of day (HH:MM[:SS]) as UNIX time."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            clock = datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+        return datetime.combine(datetime.now().date(), clock).timestamp()
+    raise click.BadParameter(f"expected a UNIX time or HH:MM[:SS], got '{value}'")
+
+
+def _describe(session_info: dict) -> str:
+    """One-line description of a session."""
+    text = f"#{session_info['id']} {session_info.get('name') or '(unnamed)'}"
+    text += f" [{session_info['status']}]"
+    if session_info.get("duration") is not None:
+        text += f" {session_info['duration']:g} s"
+    if session_info.get("path"):
+        text += f" -> {session_info['path']}"
+    return text
+
+
+@session.command("start")
+@click.argument("name", required=False)
+@click.option("--duration", "-d", type=float, default=None, help="Seconds to record")
+@click.option("--at", "at", default=None, help="Start time (UNIX time or HH:MM[:SS])")
+@click.option("--delay", type=float, default=None, help="Start after this many seconds")
+@click.pass_context
+def session_start(ctx, name, duration, at, delay):
+    """Queue a session; it starts once earlier sessions are done."""
+    reply = _send(
+        ctx,
+        "start",
+        name=name,
+        duration=duration,
+        at=_parse_time(at) if at else None,
+        delay=delay,
+    )
+    click.echo(f"Queued {_describe(reply['session'])}")
+
+
+@session.command("stop")
+@click.option("--all", "stop_all", is_flag=True, help="Also clear the queue")
+@click.pass_context
+def session_stop(ctx, stop_all):
+    """Stop the running session."""
+    reply = _send(ctx, "stop", all=stop_all)
+    click.echo(f"Stopping {_describe(reply['session'])}")
+
+
+@session.command("cancel")
+@click.argument("session_id", type=int)
+@click.pass_context
+def session_cancel(ctx, session_id):
+    """Remove a queued session."""
+    reply = _send(ctx, "cancel", id=session_id)
+    click.echo(f"Cancelled {_describe(reply['session'])}")
+
+
+@session.command("status")
+@click.pass_context
+def session_status(ctx):
+    """Show the daemon state, the queue and recent sessions."""
+    reply = _send(ctx, "status")
+    click.echo(
+        f"{reply['state']}, up {reply['uptime_s']:.0f} s, "
+        f"{reply['frames_seen']} frames seen, camera {reply['camera_fps']:.1f} fps"
+    )
+    current = reply["current"]
+    if current:
+        click.echo(
+            f"Recording {_describe(current)}: {current['frames']} frames, "
+            f"{current['dropped']} dropped, started "
+            f"{current['start_latency_ms']:.1f} ms after request"
+        )
+    for info in _send(ctx, "queue")["queue"]:
+        click.echo(f"Queued {_describe(info)}")
+    for info in reply["finished"][-5:]:
+        click.echo(f"Finished {_describe(info)}: {info['frames']} frames")
+
+
+@session.command("shutdown")
+@click.pass_context
+def session_shutdown(ctx):
+    """Stop the daemon (a running session is finished first)."""
+    _send(ctx, "shutdown")
+    click.echo("Shutdown requested")
+
 
 if __name__ == "__main__":
     cli()
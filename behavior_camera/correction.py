@@ -0,0 +1,494 @@
+import cv2
+import hashlib
+import numpy as np
+import os
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from .frame_info import FrameInfo
+
+# Fixed-point precision of the flat-field gain map (gain * 2**GAIN_BITS)
+GAIN_BITS = 8
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+}
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "behavior_camera", "correction"
+)
+
+
+def _load_image(path: str) -> np.ndarray:
+    """Load a flat or dark frame from ``.npy`` or an image file."""
+    if path.endswith(".npy"):
+        return np.load(path)
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise RuntimeError(f"Failed to read {path}")
+    return image
+
+
+def load_calibration(
+    path: Optional[str], flat: Optional[str] = None, dark: Optional[str] = None
+) -> Dict:
+    """Load lens and sensor calibration.
+
+    ``path`` is either an ``.npz`` file with ``camera_matrix``,
+    ``dist_coeffs`` and optionally ``image_size`` (width, height), ``flat``
+    and ``dark`` arrays, or an OpenCV ``FileStorage`` file (``.yml``,
+    ``.yaml``, ``.xml``) as written by the OpenCV calibration sample
+    (``camera_matrix``, ``distortion_coefficients``, ``image_width``,
+    ``image_height``). ``flat`` and ``dark`` override or add sensor frames
+    from ``.npy`` or image files.
+
+    Args:
+        path: Calibration file, or None for flat/dark correction only
+        flat: Flat-field frame
+        dark: Dark frame
+
+    Returns:
+        Dictionary with ``camera_matrix``, ``dist_coeffs``, ``image_size``,
+        ``flat`` and ``dark`` (each possibly None)
+    """
+    calibration = {
+        "camera_matrix": None,
+        "dist_coeffs": None,
+        "image_size": None,
+        "flat": None,
+        "dark": None,
+    }
+    if path:
+        if path.endswith(".npz"):
+            with np.load(path) as data:
+                for key in calibration:
+                    if key in data:
+                        calibration[key] = data[key]
+        else:
+            storage = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+            if not storage.isOpened():
+                raise RuntimeError(f"Failed to open calibration {path}")
+            calibration["camera_matrix"] = storage.getNode("camera_matrix").mat()
+            calibration["dist_coeffs"] = storage.getNode(
+                "distortion_coefficients"
+            ).mat()
+            width = storage.getNode("image_width")
+            height = storage.getNode("image_height")
+            if not width.empty() and not height.empty():
+                calibration["image_size"] = (int(width.real()), int(height.real()))
+            storage.release()
+    if flat:
+        calibration["flat"] = _load_image(flat)
+    if dark:
+        calibration["dark"] = _load_image(dark)
+    if calibration["image_size"] is not None:
+        calibration["image_size"] = tuple(int(v) for v in calibration["image_size"])
+    return calibration
+
+
+class BufferRing:
+    """Pool of reusable output frames with explicit ownership.
+
+    :meth:`get` leases a free buffer to the caller; every consumer that
+    keeps the frame takes a hold with :meth:`retain` and returns it with
+    :meth:`release`, and the buffer goes back to the pool once the last
+    hold is released. Up to ``capacity`` buffers are pooled, so steady state
+    allocates nothing. When every pooled buffer is still held, :meth:`get`
+    returns a new array the ring does not track instead of waiting, so a
+    slow consumer costs allocations but never sees its frame overwritten.
+    Holds on untracked arrays are ignored.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = max(1, capacity)
+        self.lock = threading.Lock()
+        self.free: List[np.ndarray] = []
+        # Leased buffers by id, with their number of holds
+        self.leases: Dict[int, List] = {}
+        self.pooled = 0
+        self.allocated = 0
+
+    def get(self, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """Lease a buffer of the given shape; the caller holds it once."""
+        dtype = np.dtype(dtype)
+        with self.lock:
+            while self.free:
+                buffer = self.free.pop()
+                if buffer.shape == shape and buffer.dtype == dtype:
+                    self.leases[id(buffer)] = [buffer, 1]
+                    return buffer
+                self.pooled -= 1  # Frame geometry changed
+            buffer = np.empty(shape, dtype=dtype)
+            self.allocated += 1
+            if self.pooled < self.capacity:
+                self.pooled += 1
+                self.leases[id(buffer)] = [buffer, 1]
+            return buffer
+
+    def leased(self, buffer: np.ndarray) -> bool:
+        """Return True if ``buffer`` is a pooled buffer currently held."""
+        with self.lock:
+            return id(buffer) in self.leases
+
+    def retain(self, buffer: np.ndarray) -> None:
+        """Add a hold on a leased buffer."""
+        with self.lock:
+            lease = self.leases.get(id(buffer))
+            if lease is not None:
+                lease[1] += 1
+
+    def release(self, buffer: np.ndarray) -> None:
+        """Drop a hold; the buffer is reused once no holds are left."""
+        with self.lock:
+            lease = self.leases.get(id(buffer))
+            if lease is None:
+                return
+            lease[1] -= 1
+            if lease[1] == 0:
+                del self.leases[id(buffer)]
+                self.free.append(buffer)
+
+
+class FrameCorrector:
+    """Dark-frame, flat-field and lens distortion correction.
+
+    The remap tables (fixed-point ``CV_16SC2`` maps) and an integer gain map
+    are built once per frame geometry, i.e. resolution and ROI offset, and
+    cached on disk so later sessions start immediately. Per frame, the dark
+    frame is subtracted with saturation, the gain applied in fixed point and
+    the frame undistorted with ``cv2.remap``, all into reused buffers.
+
+    Calibration refers to the full sensor (``image_size``); frames captured
+    with a smaller ROI use the matching part of the maps, located through
+    the ``OffsetX``/``OffsetY`` frame metadata. Raw Bayer frames get dark
+    and flat correction only, since resampling would mix color samples.
+    """
+
+    DEFAULTS = {
+        "enabled": False,
+        "calibration": None,  # .npz or OpenCV FileStorage file
+        "flat": None,  # flat-field frame, overrides the calibration file
+        "dark": None,  # dark frame, overrides the calibration file
+        "undistort": True,
+        "alpha": 0.0,  # 0 crops to valid pixels, 1 keeps the whole field
+        "interpolation": "linear",
+        "cache_dir": None,  # defaults to ~/.cache/behavior_camera/correction
+        "threaded": True,  # correct on a worker thread
+        "queue_size": 16,
+        "buffers": 24,  # reusable output frames
+    }
+
+    def __init__(self, config: Optional[Dict] = None):
+        """Initialize corrector.
+
+        Args:
+            config: ``recording.correction`` configuration
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.settings = settings
+        self.enabled = bool(settings["enabled"])
+        self.threaded = bool(settings["threaded"])
+        self.queue_size = int(settings["queue_size"])
+        self.alpha = float(settings["alpha"])
+        if settings["interpolation"] not in INTERPOLATIONS:
+            raise ValueError(
+                f"Unknown interpolation '{settings['interpolation']}', expected "
+                f"one of: {', '.join(INTERPOLATIONS)}"
+            )
+        self.interpolation = INTERPOLATIONS[settings["interpolation"]]
+        self.cache_dir = settings["cache_dir"] or DEFAULT_CACHE_DIR
+        self.ring = BufferRing(int(settings["buffers"]))
+        self.maps: Dict[Tuple, Dict] = {}
+        self.calibration = None
+        self.fingerprint = None
+        self.scratch = None
+        if self.enabled:
+            self.calibration = load_calibration(
+                settings["calibration"], settings["flat"], settings["dark"]
+            )
+            if not settings["undistort"]:
+                self.calibration["camera_matrix"] = None
+            self.fingerprint = self._fingerprint()
+
+    def _fingerprint(self) -> str:
+        """Hash of the calibration data and settings the maps depend on."""
+        digest = hashlib.sha1()
+        for key in ("camera_matrix", "dist_coeffs", "flat", "dark"):
+            value = self.calibration[key]
+            digest.update(key.encode())
+            if value is not None:
+                value = np.ascontiguousarray(value)
+                digest.update(str((value.shape, value.dtype.str)).encode())
+                digest.update(value.tobytes())
+        digest.update(repr((self.calibration["image_size"], self.alpha)).encode())
+        return digest.hexdigest()[:16]
+
+    def describe(self) -> Dict:
+        """Summary of the active correction for the sidecar."""
+        return {
+            "calibration": self.settings["calibration"],
+            "undistort": self.calibration["camera_matrix"] is not None,
+            "dark": self.calibration["dark"] is not None,
+            "flat": self.calibration["flat"] is not None,
+            "alpha": self.alpha,
+        }
+
+    def maps_for(
+        self, shape: Tuple[int, ...], offset: Tuple[int, int] = (0, 0)
+    ) -> Dict:
+        """Get the correction tables for a frame geometry.
+
+        Args:
+            shape: Frame shape
+            offset: ROI offset (x, y) on the sensor
+
+        Returns:
+            Dictionary with ``map1``/``map2`` (or None), ``dark`` and
+            ``gain`` (or None)
+        """
+        key = (shape, offset)
+        maps = self.maps.get(key)
+        if maps is not None:
+            return maps
+
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) == 3 else 1
+        cache_path = os.path.join(
+            self.cache_dir,
+            f"{self.fingerprint}_{width}x{height}x{channels}"
+            f"+{offset[0]}+{offset[1]}.npz",
+        )
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as data:
+                    maps = {
+                        name: (data[name] if name in data else None)
+                        for name in ("map1", "map2", "dark", "gain")
+                    }
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable correction cache {cache_path}: {e}")
+        if maps is None:
+            maps = self._build_maps(height, width, channels, offset)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                partial = cache_path + ".partial.npz"
+                np.savez(partial, **{k: v for k, v in maps.items() if v is not None})
+                os.replace(partial, cache_path)
+            except OSError as e:
+                print(f"Could not cache correction maps: {e}")
+        self.maps[key] = maps
+        return maps
+
+    def _sensor_crop(self, image: np.ndarray, height, width, channels, offset):
+        """Cut the ROI out of a full-sensor flat or dark frame."""
+        x, y = offset
+        if image.shape[0] < y + height or image.shape[1] < x + width:
+            raise ValueError(
+                f"Calibration frame of shape {image.shape} does not cover the "
+                f"{width}x{height} ROI at {x},{y}"
+            )
+        image = image[y : y + height, x : x + width].astype(np.float32)
+        if image.ndim == 2 and channels > 1:
+            image = np.repeat(image[:, :, None], channels, axis=2)
+        elif image.ndim == 3 and channels == 1:
+            image = image.mean(axis=2)
+        return image
+
+    def _build_maps(self, height, width, channels, offset) -> Dict:
+        """Compute remap tables and gain map for one frame geometry."""
+        print(f"Building correction maps for {width}x{height} at {offset}")
+        calibration = self.calibration
+        maps = {"map1": None, "map2": None, "dark": None, "gain": None}
+
+        dark = None
+        if calibration["dark"] is not None:
+            dark = self._sensor_crop(
+                calibration["dark"], height, width, channels, offset
+            )
+            maps["dark"] = np.clip(np.rint(dark), 0, 255).astype(np.uint8)
+        if calibration["flat"] is not None:
+            flat = self._sensor_crop(
+                calibration["flat"], height, width, channels, offset
+            )
+            if dark is not None:
+                flat = flat - dark
+            flat = np.maximum(flat, 1.0)
+            # Normalize to the whole sensor so every ROI gets the same gains
+            level = float(np.mean(calibration["flat"]))
+            if calibration["dark"] is not None:
+                level -= float(np.mean(calibration["dark"]))
+            gain = max(level, 1.0) / flat
+            limit = (np.iinfo(np.uint16).max) / (1 << GAIN_BITS)
+            maps["gain"] = np.rint(np.minimum(gain, limit) * (1 << GAIN_BITS)).astype(
+                np.uint16
+            )
+
+        if calibration["camera_matrix"] is not None:
+            sensor_size = calibration["image_size"] or (
+                offset[0] + width,
+                offset[1] + height,
+            )
+            matrix = np.asarray(calibration["camera_matrix"], dtype=np.float64)
+            dist = np.asarray(calibration["dist_coeffs"], dtype=np.float64)
+            new_matrix, _ = cv2.getOptimalNewCameraMatrix(
+                matrix, dist, sensor_size, self.alpha, sensor_size
+            )
+            # Shift the principal points so the maps cover just the ROI, in
+            # ROI pixel coordinates on both sides
+            matrix = matrix.copy()
+            matrix[0, 2] -= offset[0]
+            matrix[1, 2] -= offset[1]
+            new_matrix = new_matrix.copy()
+            new_matrix[0, 2] -= offset[0]
+            new_matrix[1, 2] -= offset[1]
+            maps["map1"], maps["map2"] = cv2.initUndistortRectifyMap(
+                matrix, dist, None, new_matrix, (width, height), cv2.CV_16SC2
+            )
+        return maps
+
+    def apply(self, frame: np.ndarray, metadata: Optional[Dict] = None) -> np.ndarray:
+        """Correct one frame.
+
+        Args:
+            frame: 8-bit frame (grayscale, BGR or raw Bayer mosaic)
+            metadata: Frame metadata, for the ROI offset and CFA pattern
+
+        Returns:
+            Corrected frame in a buffer leased from ``ring``; the caller
+            holds it once and must release it when done
+        """
+        metadata = metadata or {}
+        offset = (int(metadata.get("OffsetX", 0)), int(metadata.get("OffsetY", 0)))
+        maps = self.maps_for(frame.shape, offset)
+        source = frame
+
+        if maps["dark"] is not None or maps["gain"] is not None:
+            flat = self.ring.get(frame.shape, np.uint8)
+            if maps["dark"] is not None:
+                cv2.subtract(frame, maps["dark"], dst=flat)  # saturating
+            else:
+                np.copyto(flat, frame)
+            gain = maps["gain"]
+            if gain is not None:
+                if self.scratch is None or self.scratch.shape != frame.shape:
+                    self.scratch = np.empty(frame.shape, dtype=np.uint32)
+                scratch = self.scratch
+                np.multiply(flat, gain, out=scratch, dtype=np.uint32)
+                np.add(scratch, 1 << (GAIN_BITS - 1), out=scratch)
+                np.right_shift(scratch, GAIN_BITS, out=scratch)
+                np.minimum(scratch, 255, out=scratch)
+                np.copyto(flat, scratch, casting="unsafe")
+            source = flat
+
+        raw = str(metadata.get("PixelColorFilter", "")).startswith("Bayer")
+        if maps["map1"] is None or (raw and frame.ndim == 2):
+            if source is frame:
+                # Nothing to correct; still hand out a copy we own
+                source = self.ring.get(frame.shape, frame.dtype)
+                np.copyto(source, frame)
+            return source
+
+        out = self.ring.get(frame.shape, frame.dtype)
+        cv2.remap(
+            source,
+            maps["map1"],
+            maps["map2"],
+            self.interpolation,
+            dst=out,
+            borderMode=cv2.BORDER_CONSTANT,
+        )
+        if source is not frame:
+            self.ring.release(source)
+        return out
+
+
+class CorrectionWorker:
+    """Runs a FrameCorrector on its own thread.
+
+    :meth:`submit` never blocks: frames the worker cannot keep up with are
+    dropped and their timestamps kept in ``dropped``. Corrected frames are
+    passed on as ``sink(frame, timestamp, metadata, info, sequence)`` in
+    capture order; the worker releases its hold on the frame when the sink
+    returns.
+    """
+
+    def __init__(
+        self,
+        corrector: FrameCorrector,
+        sink: Callable[
+            [np.ndarray, float, Optional[Dict], Optional[FrameInfo], Optional[int]],
+            None,
+        ],
+        queue_size: int = 16,
+    ):
+        self.corrector = corrector
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.dropped: List[float] = []
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="correction", daemon=True)
+        self.thread.start()
+
+    def submit(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        metadata: Optional[Dict],
+        info: Optional[FrameInfo] = None,
+        sequence: Optional[int] = None,
+    ) -> bool:
+        """Queue a frame for correction.
+
+        Args:
+            frame: Captured frame
+            timestamp: Capture timestamp
+            metadata: Camera settings in effect for the frame
+            info: Frame descriptor, passed on unchanged
+            sequence: Capture sequence number, passed on unchanged
+
+        Returns:
+            bool: False if the frame had to be dropped
+        """
+        if self.error is None:
+            try:
+                self.queue.put_nowait((frame, timestamp, metadata, info, sequence))
+                return True
+            except queue.Full:
+                pass
+        self.dropped.append(timestamp)
+        return False
+
+    def drain(self) -> None:
+        """Wait until every queued frame has been passed on."""
+        self.queue.join()
+
+    def stop(self) -> None:
+        """Drain the queue and end the worker thread."""
+        self.drain()
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is not None:
+                    continue
+                frame, timestamp, metadata, info, sequence = item
+                corrected = None
+                try:
+                    corrected = self.corrector.apply(frame, metadata)
+                    self.sink(corrected, timestamp, metadata, info, sequence)
+                except Exception as e:
+                    self.error = e
+                    print(f"Frame correction failed: {e}")
+                finally:
+                    if corrected is not None:
+                        self.corrector.ring.release(corrected)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,337 @@
+import json
+import os
+import re
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from .camera import Camera
+from .recorder import VideoRecorder
+
+COMMANDS = ("status", "start", "stop", "cancel", "queue", "shutdown")
+
+# Characters kept in session names used for file names
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class AcquisitionDaemon:
+    """Long-running recorder that keeps the camera open and streaming.
+
+    The camera is initialized once and read continuously; frames are
+    discarded while no session is running, so exposure has settled and the
+    stream is stable when a trial starts. Sessions are queued through
+    commands on a local TCP socket (one JSON object per line, one JSON reply
+    per line, see :func:`send_command`) and run back to back in queue order.
+
+    The acquisition loop decides on every frame whether a session starts or
+    ends, using the time the frame arrived: a session starts with the first
+    frame that arrives after its start command (or its scheduled ``at``
+    time), i.e. within one frame period, and ends with the last frame before
+    its stop command or ``duration``. A session queued behind another one
+    starts once the previous session's files are closed.
+    """
+
+    DEFAULTS = {
+        "host": "127.0.0.1",
+        "port": 9109,
+        "history": 100,  # finished sessions kept for ``status``
+    }
+
+    def __init__(self, config: Dict, output_dir: Optional[str] = None):
+        """Initialize daemon.
+
+        Args:
+            config: Full configuration; the ``daemon`` section holds the
+                socket settings
+            output_dir: Recording directory (defaults to
+                ``recording.output_directory``)
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config.get("daemon") or {})
+        self.config = config
+        self.host = settings["host"]
+        self.port = int(settings["port"])
+        # No preview window: the daemon has no GUI event loop
+        config["recording"]["preview"] = False
+        self.output_dir = output_dir or config["recording"]["output_directory"]
+
+        self.lock = threading.Lock()
+        self.pending: List[Dict] = []
+        self.current: Optional[Dict] = None
+        self.finished = deque(maxlen=int(settings["history"]))
+        self.next_id = 1
+        self.running = False
+        self.started = None
+        self.frames_seen = 0
+        self.failed_frames = 0
+        self.last_frame_time = None
+
+        self.camera = None
+        self.recorder = None
+        self.server = None
+
+    def serve_forever(self) -> None:
+        """Open the camera, start the command server and run until shutdown.
+
+        The acquisition loop runs on the calling thread.
+        """
+        self.camera = Camera(self.config["camera"])
+        if not self.camera.initialize():
+            raise RuntimeError("Failed to initialize camera")
+        self.recorder = VideoRecorder(self.output_dir, self.config)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        reply = daemon.handle(json.loads(line))
+                    except (ValueError, TypeError) as e:
+                        reply = {"ok": False, "error": str(e)}
+                    self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(
+            target=self.server.serve_forever, name="daemon-commands", daemon=True
+        ).start()
+        print(f"Listening for commands on {self.host}:{self.port}")
+
+        self.running = True
+        self.started = time.time()
+        try:
+            self._acquire()
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            if self.current is not None:
+                self._finish(time.time(), "shutdown")
+            self.camera.release()
+            if self.recorder.metrics is not None:
+                self.recorder.metrics.stop()
+
+    def handle(self, request: Dict) -> Dict:
+        """Execute one command.
+
+        Args:
+            request: Dictionary with a ``command`` key and its arguments
+
+        Returns:
+            Reply dictionary with ``ok`` and command-specific fields
+        """
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be a JSON object"}
+        command = request.get("command")
+        if command not in COMMANDS:
+            return {
+                "ok": False,
+                "error": f"Unknown command '{command}', expected one of: "
+                f"{', '.join(COMMANDS)}",
+            }
+        now = time.time()
+        with self.lock:
+            if command == "start":
+                return self._enqueue(request, now)
+            if command == "stop":
+                if request.get("all"):
+                    self.pending = []
+                if self.current is None:
+                    return {"ok": False, "error": "No session is recording"}
+                stop_at = self.current["stop_at"]
+                self.current["stop_at"] = now if stop_at is None else min(stop_at, now)
+                return {"ok": True, "session": dict(self.current)}
+            if command == "cancel":
+                session_id = request.get("id")
+                for session in self.pending:
+                    if session["id"] == session_id:
+                        self.pending.remove(session)
+                        session["status"] = "cancelled"
+                        return {"ok": True, "session": session}
+                return {"ok": False, "error": f"No queued session {session_id}"}
+            if command == "queue":
+                return {"ok": True, "queue": [dict(s) for s in self.pending]}
+            if command == "shutdown":
+                self.running = False
+                return {"ok": True}
+            return {"ok": True, **self._status(now)}
+
+    def _enqueue(self, request: Dict, now: float) -> Dict:
+        """Queue a session (called with the lock held)."""
+        start_at = request.get("at")
+        if start_at is None:
+            start_at = now + float(request.get("delay") or 0.0)
+        duration = request.get("duration")
+        session = {
+            "id": self.next_id,
+            "name": request.get("name"),
+            "duration": float(duration) if duration is not None else None,
+            "requested": now,
+            "start_at": float(start_at),
+            "stop_at": None,
+            "status": "queued",
+        }
+        self.next_id += 1
+        self.pending.append(session)
+        return {"ok": True, "session": dict(session)}
+
+    def _status(self, now: float) -> Dict:
+        """Describe the daemon state (called with the lock held)."""
+        return {
+            "state": "recording" if self.current is not None else "idle",
+            "uptime_s": now - self.started if self.started else 0.0,
+            "frames_seen": self.frames_seen,
+            "failed_frames": self.failed_frames,
+            "camera_fps": self.camera.get_fps() if self.camera else 0.0,
+            "current": (
+                dict(
+                    self.current,
+                    frames=self.recorder.frame_count,
+                    dropped=self.recorder.dropped_count,
+                )
+                if self.current is not None
+                else None
+            ),
+            "queued": len(self.pending),
+            "finished": list(self.finished),
+        }
+
+    def _acquire(self) -> None:
+        """Read frames continuously and start or end sessions between them."""
+        while self.running:
+            timestamp, frame, info = self.camera.get_frame_with_info()
+            arrival = time.time()
+            if frame is None:
+                self.failed_frames += 1
+                if self.camera.replay and self.camera.replay.finished:
+                    self.running = False
+                else:
+                    time.sleep(0.01)
+            else:
+                self.frames_seen += 1
+                self.last_frame_time = arrival
+
+            with self.lock:
+                current = self.current
+                ending = (
+                    current is not None
+                    and current["stop_at"] is not None
+                    and arrival >= current["stop_at"]
+                )
+            if ending:
+                # Closing the files may take a while; the next session starts
+                # with the next frame rather than this stale one
+                self._finish(arrival, "stopped")
+                continue
+
+            if current is None:
+                with self.lock:
+                    ready = [s for s in self.pending if s["start_at"] <= arrival]
+                    if ready:
+                        current = min(ready, key=lambda s: (s["start_at"], s["id"]))
+                        self.pending.remove(current)
+                if current is not None and not self._begin(current, arrival):
+                    current = None
+
+            if current is not None and frame is not None:
+                self.recorder.record_frame(frame, timestamp, info=info)
+
+    @staticmethod
+    def _session_filename(session: Dict, arrival: float) -> str:
+        """Build a unique, safe base file name for a session.
+
+        Client-supplied names are reduced to their last path component and
+        a restricted character set, and the start time and session ID are
+        appended so no session overwrites another one's files.
+        """
+        name = os.path.basename(str(session["name"] or "").replace("\\", "/"))
+        name = _UNSAFE_NAME.sub("_", name).strip("._") or "session"
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(arrival))
+        return f"{name}_{stamp}_s{session['id']}"
+
+    def _begin(self, session: Dict, arrival: float) -> bool:
+        """Start recording a session with the frame that just arrived.
+
+        Returns:
+            bool: False if the recording could not be started; the session is
+            then moved to the history as ``failed`` and the daemon goes on
+            with the next one
+        """
+        try:
+            self.recorder.start_recording(self._session_filename(session, arrival))
+        except Exception as e:
+            print(f"Session {session['id']} failed to start: {e}")
+            session["status"] = "failed"
+            session["error"] = str(e)
+            session["ended"] = arrival
+            with self.lock:
+                self.finished.append(session)
+            return False
+        session["status"] = "recording"
+        session["started"] = arrival
+        # Delay between the requested start and the first recorded frame
+        session["start_latency_ms"] = (arrival - session["start_at"]) * 1000.0
+        session["path"] = self.recorder.video_path
+        if session["duration"] is not None:
+            stop_at = arrival + session["duration"]
+            if session["stop_at"] is None or stop_at < session["stop_at"]:
+                session["stop_at"] = stop_at
+        with self.lock:
+            self.current = session
+        print(
+            f"Session {session['id']} recording to {session['path']} "
+            f"({session['start_latency_ms']:.1f} ms after the requested start)"
+        )
+        return True
+
+    def _finish(self, arrival: float, status: str) -> None:
+        """Stop the running session and move it to the history."""
+        session = self.current
+        summary = self.recorder.stop_recording() or {}
+        session["status"] = status
+        session["ended"] = arrival
+        session["frames"] = summary.get("frames_captured", 0)
+        session["frames_dropped"] = summary.get("frames_dropped", 0)
+        session["frames_lost_at_source"] = summary.get("frames_lost_at_source", 0)
+        session["timestamps"] = self.recorder.timestamp_path
+        with self.lock:
+            self.current = None
+            self.finished.append(session)
+        print(f"Session {session['id']} {status}: {session['frames']} frames")
+
+
+def send_command(
+    command: str,
+    host: str = AcquisitionDaemon.DEFAULTS["host"],
+    port: int = AcquisitionDaemon.DEFAULTS["port"],
+    timeout: float = 5.0,
+    **arguments,
+) -> Dict:
+    """Send one command to a running daemon.
+
+    Args:
+        command: One of ``status``, ``start``, ``stop``, ``cancel``,
+            ``queue`` or ``shutdown``
+        host: Daemon address
+        port: Daemon port
+        timeout: Seconds to wait for the reply
+        **arguments: Command arguments, e.g. ``name``, ``duration``, ``at``
+            or ``delay`` for ``start`` and ``id`` for ``cancel``
+
+    Returns:
+        Reply dictionary
+    """
+    request = dict(arguments, command=command)
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        connection.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        reply = connection.makefile("r", encoding="utf-8").readline()
+    if not reply:
+        raise RuntimeError("Daemon closed the connection without replying")
+    return json.loads(reply)
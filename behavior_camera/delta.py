@@ -0,0 +1,364 @@
+import cv2
+import json
+import numpy as np
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+# Background-delta archive (.bgd) layout:
+#   "BGD1" | u32 header length | JSON header
+#   records: type (b"K" background keyframe, b"F" frame, b"X" index) |
+#            u32 payload length | payload
+#   trailer: "BGDX" | u64 offset of the index record
+# Keyframe and frame payloads are tiled residuals (see TileCodec); frames
+# refer to the most recent keyframe. The index lists the offset of every
+# frame record and its keyframe, so any frame decodes with two reads.
+MAGIC = b"BGD1"
+TRAILER_MAGIC = b"BGDX"
+RECORD = struct.Struct("<cI")
+TRAILER = struct.Struct("<4sQ")
+
+
+class TileCodec:
+    """Encode frames as compressed residual tiles against a background.
+
+    The residual ``frame - background`` wraps around in uint8 and is
+    zigzag-mapped so small positive and negative differences both become
+    small byte values. Tiles whose residual is all zero are skipped; the
+    others are zlib-compressed in parallel on a thread pool (zlib releases
+    the GIL).
+    """
+
+    def __init__(
+        self,
+        height: int,
+        width: int,
+        channels: int,
+        tile_size: int = 64,
+        level: int = 1,
+        threads: int = 4,
+    ):
+        """Initialize codec.
+
+        Args:
+            height: Frame height
+            width: Frame width
+            channels: Channels per pixel (1 or 3)
+            tile_size: Tile edge length in pixels
+            level: zlib compression level
+            threads: Tiles compressed or decompressed in parallel
+        """
+        self.height = height
+        self.width = width
+        self.channels = channels
+        self.tile = tile_size
+        self.level = level
+        self.tiles_y = -(-height // tile_size)
+        self.tiles_x = -(-width // tile_size)
+        self.tile_count = self.tiles_y * self.tiles_x
+        self.mask_bytes = -(-self.tile_count // 8)
+        # Padded residual buffer, reused for every frame
+        self.residual = np.zeros(
+            (self.tiles_y * tile_size, self.tiles_x * tile_size, channels),
+            dtype=np.uint8,
+        )
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, threads), thread_name_prefix="bgd-tile"
+        )
+
+    def _tiles(self) -> np.ndarray:
+        """View the residual buffer as (tile row, y, tile column, x, channel)."""
+        t = self.tile
+        return self.residual.reshape(self.tiles_y, t, self.tiles_x, t, self.channels)
+
+    def encode(self, frame: np.ndarray, background: Optional[np.ndarray]) -> bytes:
+        """Encode a frame against a background (None for zeros).
+
+        Args:
+            frame: Frame of shape (height, width, channels)
+            background: Background of the same shape, or None
+
+        Returns:
+            Payload: tile mask, compressed tile lengths and tile data
+        """
+        view = self.residual[: self.height, : self.width]
+        if background is None:
+            view[...] = frame
+        else:
+            np.subtract(frame, background, out=view)
+        # Zigzag: 0, -1, 1, -2, ... -> 0, 1, 2, 3, ...
+        sign = (view.view(np.int8) >> 7).view(np.uint8)
+        np.left_shift(view, 1, out=view)
+        np.bitwise_xor(view, sign, out=view)
+
+        tiles = self._tiles()
+        mask = tiles.any(axis=(1, 3, 4)).ravel()
+        positions = np.flatnonzero(mask)
+        blobs = list(
+            self.pool.map(
+                lambda p: zlib.compress(
+                    tiles[p // self.tiles_x, :, p % self.tiles_x].tobytes(),
+                    self.level,
+                ),
+                positions,
+            )
+        )
+        lengths = np.fromiter(map(len, blobs), dtype="<u4", count=len(blobs))
+        return b"".join([np.packbits(mask).tobytes(), lengths.tobytes()] + blobs)
+
+    def decode(
+        self,
+        payload: bytes,
+        background: Optional[np.ndarray],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Decode a payload produced by :meth:`encode`.
+
+        Args:
+            payload: Encoded frame
+            background: Background the frame was encoded against, or None
+            out: Optional output array of shape (height, width, channels)
+
+        Returns:
+            Decoded frame
+        """
+        mask = np.unpackbits(
+            np.frombuffer(payload, dtype=np.uint8, count=self.mask_bytes),
+            count=self.tile_count,
+        ).astype(bool)
+        positions = np.flatnonzero(mask)
+        lengths = np.frombuffer(
+            payload, dtype="<u4", count=len(positions), offset=self.mask_bytes
+        )
+        starts = (
+            self.mask_bytes
+            + 4 * len(positions)
+            + np.concatenate(([0], np.cumsum(lengths[:-1], dtype=np.int64))).astype(
+                np.int64
+            )
+        )
+
+        residual = np.zeros_like(self.residual)
+        t = self.tile
+        tiles = residual.reshape(self.tiles_y, t, self.tiles_x, t, self.channels)
+
+        def unpack(k):
+            p = positions[k]
+            data = zlib.decompress(payload[starts[k] : starts[k] + lengths[k]])
+            tiles[p // self.tiles_x, :, p % self.tiles_x] = np.frombuffer(
+                data, dtype=np.uint8
+            ).reshape(t, t, self.channels)
+
+        list(self.pool.map(unpack, range(len(positions))))
+
+        view = residual[: self.height, : self.width]
+        # Undo the zigzag mapping
+        sign = np.negative(view & 1)
+        np.right_shift(view, 1, out=view)
+        np.bitwise_xor(view, sign, out=view)
+        if out is None:
+            out = np.empty((self.height, self.width, self.channels), dtype=np.uint8)
+        if background is None:
+            out[...] = view
+        else:
+            np.add(view, background, out=out)
+        return out
+
+    def close(self) -> None:
+        """Shut down the tile thread pool."""
+        self.pool.shutdown(wait=True)
+
+
+def write_header(f, header: Dict) -> None:
+    """Write the file magic and JSON header."""
+    data = json.dumps(header).encode("utf-8")
+    f.write(MAGIC + struct.pack("<I", len(data)) + data)
+
+
+def write_index(f, frame_offsets, frame_keys, key_offsets) -> None:
+    """Append the frame index record and the trailer."""
+    offset = f.tell()
+    frames = np.asarray(frame_offsets, dtype="<i8")
+    keys = np.asarray(frame_keys, dtype="<i4")
+    keyframes = np.asarray(key_offsets, dtype="<i8")
+    payload = (
+        struct.pack("<QQ", len(frames), len(keyframes))
+        + frames.tobytes()
+        + keys.tobytes()
+        + keyframes.tobytes()
+    )
+    f.write(RECORD.pack(b"X", len(payload)) + payload)
+    f.write(TRAILER.pack(TRAILER_MAGIC, offset))
+
+
+class DeltaCapture:
+    """Random-access reader for background-delta archives.
+
+    Mirrors the parts of ``cv2.VideoCapture`` used by this package
+    (``read``, ``grab``, ``set``/``get`` of the frame position and size) so
+    archives can be read wherever a video file is expected. Frames are
+    returned as 3-channel BGR like OpenCV does. Seeking is free: every frame
+    decodes from its own record and its keyframe.
+    """
+
+    def __init__(self, path: str, keyframe_cache: int = 4):
+        """Open an archive.
+
+        Args:
+            path: ``.bgd`` file
+            keyframe_cache: Number of decoded keyframes kept in memory
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        magic = self.file.read(4)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a background-delta archive")
+        (length,) = struct.unpack("<I", self.file.read(4))
+        self.header = json.loads(self.file.read(length))
+        self.data_start = 8 + length
+        self.codec = TileCodec(
+            self.header["height"],
+            self.header["width"],
+            self.header["channels"],
+            self.header["tile_size"],
+            threads=os.cpu_count() or 1,
+        )
+        self.frame_offsets, self.frame_keys, self.key_offsets = self._load_index()
+        self.keyframes = OrderedDict()
+        self.keyframe_cache = max(1, keyframe_cache)
+        self.position = 0
+
+    def _load_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Read the index, or rebuild it if the archive was not closed."""
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        if size >= self.data_start + TRAILER.size:
+            self.file.seek(size - TRAILER.size)
+            magic, offset = TRAILER.unpack(self.file.read(TRAILER.size))
+            if magic == TRAILER_MAGIC:
+                self.file.seek(offset)
+                kind, length = RECORD.unpack(self.file.read(RECORD.size))
+                payload = self.file.read(length)
+                frames, keys = struct.unpack_from("<QQ", payload)
+                return (
+                    np.frombuffer(payload, "<i8", frames, 16),
+                    np.frombuffer(payload, "<i4", frames, 16 + 8 * frames),
+                    np.frombuffer(payload, "<i8", keys, 16 + 12 * frames),
+                )
+
+        # Interrupted recording: scan the records that were written completely
+        frame_offsets, frame_keys, key_offsets = [], [], []
+        offset = self.data_start
+        self.file.seek(offset)
+        while True:
+            head = self.file.read(RECORD.size)
+            if len(head) < RECORD.size:
+                break
+            kind, length = RECORD.unpack(head)
+            if offset + RECORD.size + length > size:
+                break
+            if kind == b"K":
+                key_offsets.append(offset)
+            elif kind == b"F" and key_offsets:
+                frame_offsets.append(offset)
+                frame_keys.append(len(key_offsets) - 1)
+            offset += RECORD.size + length
+            self.file.seek(offset)
+        return (
+            np.asarray(frame_offsets, dtype=np.int64),
+            np.asarray(frame_keys, dtype=np.int32),
+            np.asarray(key_offsets, dtype=np.int64),
+        )
+
+    def _payload(self, offset: int) -> bytes:
+        """Read the payload of the record at ``offset``."""
+        self.file.seek(offset)
+        _, length = RECORD.unpack(self.file.read(RECORD.size))
+        return self.file.read(length)
+
+    def _keyframe(self, key: int) -> np.ndarray:
+        """Decode a keyframe, with a small LRU cache."""
+        frame = self.keyframes.get(key)
+        if frame is None:
+            frame = self.codec.decode(self._payload(int(self.key_offsets[key])), None)
+            self.keyframes[key] = frame
+            while len(self.keyframes) > self.keyframe_cache:
+                self.keyframes.popitem(last=False)
+        else:
+            self.keyframes.move_to_end(key)
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.frame_offsets)
+
+    def decode(self, index: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decode frame ``index`` in its stored channel layout."""
+        background = self._keyframe(int(self.frame_keys[index]))
+        return self.codec.decode(
+            self._payload(int(self.frame_offsets[index])), background, out
+        )
+
+    def isOpened(self) -> bool:
+        return self.file is not None
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self))
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.header["width"])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.header["height"])
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.header.get("fps", 0.0))
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+            return True
+        return False
+
+    def grab(self) -> bool:
+        if self.position >= len(self):
+            return False
+        self.position += 1
+        return True
+
+    def read(
+        self, out: Optional[np.ndarray] = None
+    ) -> Tuple[bool, Optional[np.ndarray]]:
+        if self.position >= len(self):
+            return False, None
+        frame = self.decode(self.position)
+        self.position += 1
+        if frame.shape[2] == 1:
+            if out is None:
+                return True, cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            return True, cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR, dst=out)
+        if out is None:
+            return True, frame
+        out[...] = frame
+        return True, out
+
+    def release(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.codec.close()
+
+
+def open_video(path: str):
+    """Open a recorded video for decoding.
+
+    Returns:
+        DeltaCapture for background-delta archives, cv2.VideoCapture
+        otherwise
+    """
+    if path.endswith(".bgd"):
+        return DeltaCapture(path)
+    return cv2.VideoCapture(path)
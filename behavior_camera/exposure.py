@@ -0,0 +1,142 @@
+import math
+import numpy as np
+from typing import Dict, Optional, Tuple
+from .mjpeg import JpegFrame
+
+
+class AutoExposure:
+    """Closed-loop software auto exposure and gain.
+
+    Every ``every_n`` frames a histogram of a strided subsample is computed
+    and the mean brightness (or a percentile, to avoid saturation) is driven
+    toward ``target``. Exposure is raised first; gain is only added once
+    exposure reaches ``max_exposure``. Each step is damped in the log domain
+    and limited to a factor of ``max_step``.
+    """
+
+    DEFAULTS = {
+        "enabled": False,
+        "frozen": False,
+        "target": 0.45,  # fraction of full scale
+        "percentile": None,  # e.g. 99 to control highlights instead of mean
+        "every_n": 5,
+        "subsample": 8,
+        "damping": 0.5,
+        "max_step": 1.5,
+        "tolerance": 0.03,
+        "min_exposure": 20.0,  # microseconds
+        "max_exposure": 100000.0,
+        "min_gain": 0.0,  # dB
+        "max_gain": 24.0,
+    }
+
+    def __init__(self, config: Dict, exposure: float, gain: float, bit_depth: int = 8):
+        """Initialize controller.
+
+        Args:
+            config: ``camera.software_auto_exposure`` configuration
+            exposure: Current exposure time in microseconds
+            gain: Current gain in dB
+            bit_depth: Significant bits per pixel of the frames
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.target = float(settings["target"])
+        self.percentile = settings["percentile"]
+        self.every_n = max(1, int(settings["every_n"]))
+        self.subsample = max(1, int(settings["subsample"]))
+        self.damping = float(settings["damping"])
+        self.max_step = float(settings["max_step"])
+        self.tolerance = float(settings["tolerance"])
+        self.min_exposure = float(settings["min_exposure"])
+        self.max_exposure = float(settings["max_exposure"])
+        self.min_gain = float(settings["min_gain"])
+        self.max_gain = float(settings["max_gain"])
+        self.frozen = bool(settings["frozen"])
+        self.shift = max(0, int(bit_depth) - 8)
+
+        self.exposure = float(exposure)
+        self.gain = float(gain)
+        self.frame_counter = 0
+        self.last_level = None
+
+    def freeze(self) -> None:
+        """Hold exposure and gain at their current values."""
+        self.frozen = True
+
+    def unfreeze(self) -> None:
+        """Resume closed-loop control."""
+        self.frozen = False
+
+    def measure(self, frame: np.ndarray) -> float:
+        """Measure brightness of a frame as a fraction of full scale.
+
+        Args:
+            frame: Mono or BGR frame, or a compressed MJPEG frame
+
+        Returns:
+            float: Mean or percentile level in [0, 1]
+        """
+        step = self.subsample
+        if isinstance(frame, JpegFrame):
+            # Let the decoder skip most of the subsampled resolution
+            reduction = 1
+            while reduction < 8 and reduction * 2 <= step:
+                reduction *= 2
+            frame = frame.decode(1.0 / reduction, grayscale=True)
+            step = max(1, step // reduction)
+        sample = frame[::step, ::step]
+        if sample.ndim == 3:
+            sample = sample[..., 1]  # green carries most of the luminance
+
+        if self.shift:
+            sample = sample >> self.shift
+        hist = np.bincount(sample.ravel(), minlength=256)[:256]
+        total = hist.sum()
+        if total == 0:
+            return 0.0
+
+        if self.percentile is None:
+            level = float(np.dot(hist, np.arange(256))) / total
+        else:
+            cumulative = np.cumsum(hist)
+            level = float(np.searchsorted(cumulative, total * self.percentile / 100.0))
+        return level / 255.0
+
+    def update(self, frame: np.ndarray) -> Optional[Tuple[float, float]]:
+        """Process a frame and compute new settings when due.
+
+        Args:
+            frame: Latest frame
+
+        Returns:
+            Tuple of (exposure, gain) to apply, or None to keep the current
+            settings
+        """
+        self.frame_counter += 1
+        if self.frozen or self.frame_counter % self.every_n:
+            return None
+
+        level = self.measure(frame)
+        self.last_level = level
+        if abs(level - self.target) <= self.tolerance:
+            return None
+
+        # Damped correction in the log domain, limited per step
+        correction = math.log(self.target / max(level, 1.0 / 255))
+        factor = math.exp(self.damping * correction)
+        factor = min(max(factor, 1.0 / self.max_step), self.max_step)
+
+        # Total exposure-equivalent including gain, exposure first
+        total = self.exposure * 10 ** (self.gain / 20.0) * factor
+        exposure = min(max(total, self.min_exposure), self.max_exposure)
+        gain = 20.0 * math.log10(max(total / exposure, 1e-6))
+        gain = min(max(gain, self.min_gain), self.max_gain)
+
+        if math.isclose(exposure, self.exposure, rel_tol=1e-3) and math.isclose(
+            gain, self.gain, abs_tol=1e-2
+        ):
+            return None
+        self.exposure = exposure
+        self.gain = gain
+        return exposure, gain
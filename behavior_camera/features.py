@@ -0,0 +1,201 @@
+import threading
+from typing import Dict, Optional
+
+# Galaxy SDK features managed by FeatureControl, mapped to their feature type.
+# The order is the order in which a batch is applied: trigger setup first,
+# then ROI, then exposure and gain. Commands are never part of a batch; they
+# run through FeatureControl.execute.
+MANAGED_FEATURES = {
+    "TriggerMode": "enum",
+    "TriggerSource": "enum",
+    "TriggerActivation": "enum",
+    "ExposureAuto": "enum",
+    "GainAuto": "enum",
+    "Width": "int",
+    "Height": "int",
+    "OffsetX": "int",
+    "OffsetY": "int",
+    "ExposureTime": "float",
+    "Gain": "float",
+    "PixelColorFilter": "enum",  # read-only; reported in frame metadata
+    "TriggerSoftware": "command",
+}
+
+# Features that can only change while the stream is off
+ROI_FEATURES = ("Width", "Height", "OffsetX", "OffsetY")
+
+# ROI size features and the offset on the same sensor axis
+ROI_AXES = (("Width", "OffsetX"), ("Height", "OffsetY"))
+
+
+class FeatureControl:
+    """Cached feature handles with coalesced, batched parameter updates.
+
+    Feature handles, availability and ranges are resolved once when the
+    device is opened. Updates requested through :meth:`request` only replace
+    pending values, so a burst of changes (e.g. from a GUI spinbox) costs a
+    single SDK write per feature when :meth:`apply_pending` runs between
+    frames. Every applied value is read back from the device.
+    """
+
+    def __init__(self, remote_device):
+        """Resolve feature handles.
+
+        Args:
+            remote_device: Galaxy SDK remote device feature control
+        """
+        self.handles = {}
+        self.kinds = {}
+        self.ranges = {}
+        self.values: Dict = {}
+        self.pending: Dict = {}
+        self.lock = threading.Lock()
+
+        for name, kind in MANAGED_FEATURES.items():
+            try:
+                if not remote_device.is_implemented(name):
+                    continue
+                handle = getattr(remote_device, f"get_{kind}_feature")(name)
+            except Exception:
+                continue
+            self.handles[name] = handle
+            self.kinds[name] = kind
+            if kind == "command":
+                continue
+            if kind in ("int", "float"):
+                try:
+                    self.ranges[name] = handle.get_range()
+                except Exception:
+                    pass
+            self.values[name] = self._read(name)
+
+    def is_available(self, name: str) -> bool:
+        """Return True if the device implements a managed feature."""
+        return name in self.handles
+
+    def get(self, name: str, default=None):
+        """Return the last value read back for a feature."""
+        return self.values.get(name, default)
+
+    def request(self, **values) -> None:
+        """Queue feature updates; later requests replace earlier ones.
+
+        Args:
+            **values: Feature names and target values, e.g. ``Gain=3.0``
+        """
+        with self.lock:
+            for name, value in values.items():
+                if name in self.handles and self.kinds[name] != "command":
+                    self.pending[name] = value
+
+    def execute(self, name: str) -> bool:
+        """Run a command feature immediately, e.g. ``TriggerSoftware``.
+
+        Returns:
+            bool: True if the command was sent
+        """
+        if self.kinds.get(name) != "command":
+            return False
+        try:
+            self.handles[name].send_command()
+        except Exception as e:
+            print(f"Error executing {name}: {e}")
+            return False
+        return True
+
+    def has_pending(self) -> bool:
+        """Return True if updates are waiting to be applied."""
+        return bool(self.pending)
+
+    def pending_roi(self) -> bool:
+        """Return True if the pending batch changes the ROI."""
+        return any(name in self.pending for name in ROI_FEATURES)
+
+    def apply_pending(self) -> Dict:
+        """Apply all queued updates as one batch and read them back.
+
+        Returns:
+            Dictionary of applied feature names and read-back values
+        """
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        if not batch:
+            return {}
+
+        applied = {}
+        for name in self._batch_order(batch):
+            if name in ROI_FEATURES:
+                # Size and offset limit each other; the cached range is stale
+                # once the other one changed
+                self._refresh_range(name)
+            value = self._clamp(name, batch[name])
+            if value == self.values.get(name):
+                continue
+            try:
+                self.handles[name].set(value)
+            except Exception as e:
+                print(f"Error setting {name} to {value}: {e}")
+            applied[name] = self._read(name)
+
+        if applied:
+            # Replace rather than mutate so per-frame snapshots stay valid
+            values = dict(self.values)
+            values.update(applied)
+            self.values = values
+        return applied
+
+    def _batch_order(self, batch: Dict) -> list:
+        """Order the features of a batch for writing.
+
+        An ROI must fit on the sensor after every single write, so a region
+        that grows is moved first (offset before size) and one that shrinks
+        is resized first (size before offset).
+        """
+        order = [name for name in MANAGED_FEATURES if name in batch]
+        for size, offset in ROI_AXES:
+            if size not in batch or offset not in batch:
+                continue
+            current = self.values.get(size)
+            if current is not None and batch[size] > current:
+                i, j = order.index(size), order.index(offset)
+                order[i], order[j] = order[j], order[i]
+        return order
+
+    def _refresh_range(self, name: str) -> None:
+        """Read a feature's range from the device again."""
+        try:
+            self.ranges[name] = self.handles[name].get_range()
+        except Exception:
+            pass
+
+    def snapshot(self) -> Dict:
+        """Return the current read-back values.
+
+        The returned dictionary is replaced, never mutated, when settings
+        change, so it can be attached to every frame without copying.
+        """
+        return self.values
+
+    def _clamp(self, name: str, value):
+        """Clamp a numeric value to the feature's range and increment."""
+        feature_range: Optional[Dict] = self.ranges.get(name)
+        if self.kinds[name] not in ("int", "float") or not feature_range:
+            return value
+        low = feature_range.get("min", value)
+        high = feature_range.get("max", value)
+        value = min(max(value, low), high)
+        if self.kinds[name] == "int":
+            inc = feature_range.get("inc", 1) or 1
+            value = int(low + ((int(value) - low) // inc) * inc)
+        return value
+
+    def _read(self, name: str):
+        """Read a feature value back from the device."""
+        try:
+            value = self.handles[name].get()
+        except Exception:
+            return None
+        if self.kinds[name] == "enum" and isinstance(value, tuple):
+            # Enum features return (int value, symbolic name)
+            value = value[1]
+        return value
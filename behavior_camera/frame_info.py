@@ -0,0 +1,129 @@
+from typing import Dict, Optional, Tuple
+
+_EMPTY_SETTINGS: Dict = {}
+
+
+class FrameInfo:
+    """Descriptor travelling with every captured frame.
+
+    Created once per frame by the camera backend, so it uses ``__slots__``
+    and keeps references instead of copies: ``settings`` is the feature
+    snapshot in effect for the frame, which is replaced rather than mutated
+    when settings change (see ``FeatureControl.snapshot``).
+
+    Attributes:
+        frame_id: Device frame ID (Galaxy), grab sequence number (OpenCV
+            grab thread) or capture index (replay); None if unknown
+        device_timestamp: Timestamp reported by the device, None if unknown
+        host_timestamp: Host time the frame was received (UNIX seconds)
+        pixel_format: Pixel format delivered by the device, e.g. ``MONO8``,
+            ``BAYER_RG8``, ``BGR8`` or ``MJPEG``
+        roi: Sensor region as (offset_x, offset_y, width, height)
+        settings: Camera settings in effect (read-back feature values)
+        status: Device frame status, 0 for a complete frame
+        gap: Frames lost between the previous delivered frame and this one,
+            wherever they were lost before reaching the consumer; None
+            where the source cannot tell
+    """
+
+    __slots__ = (
+        "frame_id",
+        "device_timestamp",
+        "host_timestamp",
+        "pixel_format",
+        "roi",
+        "settings",
+        "status",
+        "gap",
+    )
+
+    def __init__(
+        self,
+        frame_id: Optional[int],
+        host_timestamp: float,
+        device_timestamp: Optional[float] = None,
+        pixel_format: Optional[str] = None,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        settings: Optional[Dict] = None,
+        status: int = 0,
+        gap: Optional[int] = None,
+    ):
+        self.frame_id = frame_id
+        self.host_timestamp = host_timestamp
+        self.device_timestamp = device_timestamp
+        self.pixel_format = pixel_format
+        self.roi = roi
+        self.settings = _EMPTY_SETTINGS if settings is None else settings
+        self.status = status
+        self.gap = gap
+
+    @property
+    def exposure_time(self) -> Optional[float]:
+        """Applied exposure time in microseconds, if known."""
+        return self.settings.get("ExposureTime")
+
+    @property
+    def gain(self) -> Optional[float]:
+        """Applied gain in dB, if known."""
+        return self.settings.get("Gain")
+
+    def to_dict(self) -> Dict:
+        """Return the descriptor as a JSON-serializable dictionary."""
+        return {
+            "frame_id": self.frame_id,
+            "host_timestamp": self.host_timestamp,
+            "device_timestamp": self.device_timestamp,
+            "pixel_format": self.pixel_format,
+            "roi": list(self.roi) if self.roi is not None else None,
+            "exposure_time": self.exposure_time,
+            "gain": self.gain,
+            "status": self.status,
+            "gap": self.gap,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"FrameInfo(frame_id={self.frame_id}, "
+            f"host_timestamp={self.host_timestamp:.6f}, "
+            f"pixel_format={self.pixel_format}, gap={self.gap})"
+        )
+
+
+class FrameIdTracker:
+    """Detect gaps in a sequence of frame IDs as frames arrive.
+
+    IDs are expected to increase by one per frame; a larger step means the
+    frames in between were lost at the source. A step back (the device
+    restarted its counter) starts a new sequence.
+    """
+
+    def __init__(self):
+        self.last_id: Optional[int] = None
+        self.lost = 0  # frames missing in all gaps
+        self.gaps = 0  # number of gaps
+
+    def reset(self) -> None:
+        """Forget the last ID, e.g. when the stream restarts."""
+        self.last_id = None
+
+    def observe(self, frame_id: Optional[int]) -> Optional[int]:
+        """Check the next frame ID.
+
+        Args:
+            frame_id: ID of the frame that just arrived
+
+        Returns:
+            Number of frames lost before this one; None for the first frame
+            of a sequence or an unknown ID
+        """
+        if frame_id is None:
+            return None
+        last = self.last_id
+        self.last_id = frame_id
+        if last is None or frame_id <= last:
+            return None
+        missing = frame_id - last - 1
+        if missing:
+            self.lost += missing
+            self.gaps += 1
+        return missing
@@ -0,0 +1,163 @@
+import shutil
+import time
+from typing import Dict, Optional
+
+# Degradation ladder, from normal operation to dropping frames on purpose
+LOAD_LEVELS = [
+    "normal",
+    "reduced_preview",
+    "proxies_stopped",
+    "fast_preset",
+    "decimating",
+]
+
+
+class LoadGovernor:
+    """Step through a degradation ladder when writing can't keep up.
+
+    The governor samples writer queue fill, disk write throughput and free
+    space at a fixed interval. Under pressure it escalates one level per
+    interval; once the pressure has been gone for ``hold_time`` it steps back
+    down one level at a time. Every transition is returned as a structured
+    event for the session metadata.
+    """
+
+    DEFAULTS = {
+        "enabled": True,
+        "check_interval": 0.5,  # seconds between samples
+        "queue_high": 0.5,  # queue fill fraction that counts as pressure
+        "queue_low": 0.1,  # queue fill fraction that counts as relieved
+        "min_free_gb": 2.0,  # free space below this counts as pressure
+        "min_write_mbps": None,  # disk write rate below this with a backlog
+        "hold_time": 5.0,  # seconds without pressure before stepping down
+        "reduced_preview_fps": 2.0,
+        "decimation": 2,  # keep one of every N frames at the top level
+    }
+
+    def __init__(self, config: Optional[Dict], output_dir: str):
+        """Initialize governor.
+
+        Args:
+            config: ``recording.load_shedding`` configuration
+            output_dir: Directory whose file system is monitored
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.check_interval = float(settings["check_interval"])
+        self.queue_high = float(settings["queue_high"])
+        self.queue_low = float(settings["queue_low"])
+        self.min_free_bytes = float(settings["min_free_gb"]) * 1e9
+        self.min_write_rate = (
+            float(settings["min_write_mbps"]) * 1e6
+            if settings["min_write_mbps"] is not None
+            else None
+        )
+        self.hold_time = float(settings["hold_time"])
+        self.reduced_preview_fps = float(settings["reduced_preview_fps"])
+        self.decimation = max(2, int(settings["decimation"]))
+        self.output_dir = output_dir
+
+        self.level = 0
+        self.next_check = 0.0
+        self.last_pressure = 0.0
+        self.last_bytes = None
+        self.last_sample_time = None
+        self.write_rate = 0.0
+        self.free_bytes = None
+        self.decimation_start = 0
+
+    @property
+    def state(self) -> str:
+        """Name of the current level."""
+        return LOAD_LEVELS[self.level]
+
+    def due(self) -> bool:
+        """Return True if the next load sample is due."""
+        return time.monotonic() >= self.next_check
+
+    def update(
+        self, index: int, queue_fill: float, bytes_written: int
+    ) -> Optional[Dict]:
+        """Sample load and change level if needed.
+
+        The sample only runs once per ``check_interval``; use :meth:`due`
+        to skip collecting the inputs in between.
+
+        Args:
+            index: Capture index of the current frame
+            queue_fill: Fill fraction of the fullest writer queue
+            bytes_written: Total bytes written to disk so far
+
+        Returns:
+            Transition event, or None if the level did not change
+        """
+        now = time.monotonic()
+        if now < self.next_check:
+            return None
+        self.next_check = now + self.check_interval
+
+        if self.last_sample_time is not None and now > self.last_sample_time:
+            self.write_rate = (bytes_written - self.last_bytes) / (
+                now - self.last_sample_time
+            )
+        self.last_bytes = bytes_written
+        self.last_sample_time = now
+        try:
+            self.free_bytes = shutil.disk_usage(self.output_dir).free
+        except OSError:
+            self.free_bytes = None
+
+        reasons = []
+        if queue_fill >= self.queue_high:
+            reasons.append("queue")
+        if self.free_bytes is not None and self.free_bytes < self.min_free_bytes:
+            reasons.append("free_space")
+        if (
+            self.min_write_rate is not None
+            and queue_fill > self.queue_low
+            and self.write_rate < self.min_write_rate
+        ):
+            reasons.append("write_rate")
+
+        if reasons:
+            self.last_pressure = now
+            if self.level < len(LOAD_LEVELS) - 1:
+                return self._transition(index, self.level + 1, reasons, queue_fill)
+        elif (
+            self.level > 0
+            and queue_fill <= self.queue_low
+            and now - self.last_pressure >= self.hold_time
+        ):
+            self.last_pressure = now  # hold again before the next step down
+            return self._transition(index, self.level - 1, ["relieved"], queue_fill)
+        return None
+
+    def keep_frame(self, index: int) -> bool:
+        """Return False for frames dropped on purpose at the top level.
+
+        Dropped frames are evenly spaced: one of every ``decimation`` frames
+        is kept.
+        """
+        if self.state != "decimating":
+            return True
+        return (index - self.decimation_start) % self.decimation == 0
+
+    def _transition(self, index: int, level: int, reasons, queue_fill: float) -> Dict:
+        """Change level and describe the transition."""
+        previous = self.state
+        self.level = level
+        if self.state == "decimating":
+            self.decimation_start = index
+        return {
+            "time": time.time(),
+            "frame": index,
+            "from": previous,
+            "to": self.state,
+            "level": level,
+            "reasons": reasons,
+            "queue_fill": round(queue_fill, 3),
+            "write_mbps": round(self.write_rate / 1e6, 3),
+            "free_gb": (
+                round(self.free_bytes / 1e9, 3) if self.free_bytes is not None else None
+            ),
+        }
@@ -0,0 +1,203 @@
+import cv2
+import numpy as np
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Modes selectable through ``camera.capture.mode``
+CAPTURE_MODES = ("queued", "latest", "sync")
+
+
+class FrameGrabber:
+    """Grab thread for ``cv2.VideoCapture`` devices.
+
+    A dedicated thread calls ``cap.grab()`` back to back so the driver
+    buffer never fills up, and stamps every grab with ``perf_counter`` (a
+    monotonic clock, mapped to wall-clock time for the recorder).
+
+    ``latest`` serves preview and closed-loop use: frames nobody asked for
+    are grabbed but never decoded, and :meth:`read` returns the first frame
+    grabbed after the call, retrieved on demand. ``queued`` serves
+    recording: every grabbed frame is retrieved and queued, so a slow
+    consumer only loses frames once ``queue_size`` frames are waiting.
+
+    All access to the capture goes through this class (see :meth:`set`),
+    since OpenCV captures are not safe to use from two threads at once.
+    """
+
+    DEFAULTS = {
+        "mode": "queued",
+        "buffer_size": 1,  # CAP_PROP_BUFFERSIZE; 1 keeps driver frames fresh
+        "queue_size": 256,  # queued mode: frames waiting for the consumer
+        "history": 10000,  # latency samples kept for statistics
+    }
+
+    def __init__(self, cap: cv2.VideoCapture, config: Optional[Dict] = None):
+        """Initialize grabber.
+
+        Args:
+            cap: Opened capture
+            config: ``camera.capture`` configuration
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.mode = settings["mode"]
+        if self.mode not in ("queued", "latest"):
+            raise ValueError(
+                f"Unknown grabber mode '{self.mode}', expected queued or latest"
+            )
+        self.cap = cap
+        self.cap_lock = threading.Lock()
+        if settings["buffer_size"]:
+            # Not every backend honors this; the grab thread keeps the
+            # buffer drained either way
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, int(settings["buffer_size"]))
+
+        self.frames = queue.Queue(maxsize=max(1, int(settings["queue_size"])))
+        self.condition = threading.Condition()
+        self.wanted = 0  # latest mode: consumers waiting for a frame
+        self.delivered_frame = None
+        self.delivered_sequence = 0
+
+        self.latency = np.zeros(max(1, int(settings["history"])), dtype=np.float64)
+        self.wall_offset = time.time() - time.perf_counter()
+        self.grabbed = 0
+        self.retrieved = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.first_grab = None
+        self.last_grab = None
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="grabber", daemon=True)
+        self.thread.start()
+
+    def set(self, prop: int, value: float) -> bool:
+        """Set a capture property between grabs."""
+        with self.cap_lock:
+            return self.cap.set(prop, value)
+
+    def get(self, prop: int) -> float:
+        """Read a capture property between grabs."""
+        with self.cap_lock:
+            return self.cap.get(prop)
+
+    def _run(self) -> None:
+        """Grab thread main loop."""
+        while self.running:
+            with self.cap_lock:
+                ok = self.cap.grab()
+                grabbed_at = time.perf_counter()
+                frame = None
+                if ok and (self.mode == "queued" or self.wanted):
+                    ok, frame = self.cap.retrieve()
+            if not ok:
+                self.failed += 1
+                time.sleep(0.005)
+                continue
+            self.grabbed += 1
+            if self.first_grab is None:
+                self.first_grab = grabbed_at
+            self.last_grab = grabbed_at
+            if frame is None:
+                continue  # latest mode, nobody waiting: skip the decode
+
+            self.retrieved += 1
+            if self.mode == "queued":
+                try:
+                    self.frames.put_nowait((grabbed_at, self.grabbed, frame))
+                except queue.Full:
+                    self.dropped += 1
+            else:
+                with self.condition:
+                    self.delivered_frame = (grabbed_at, self.grabbed, frame)
+                    self.delivered_sequence += 1
+                    self.condition.notify_all()
+
+    def read(
+        self, timeout: float = 1.0
+    ) -> Tuple[float, Optional[np.ndarray], Optional[int]]:
+        """Get the next frame for the consumer.
+
+        Args:
+            timeout: Seconds to wait for a frame
+
+        Returns:
+            Tuple of (wall-clock grab timestamp, frame, grab sequence
+            number); frame and sequence number are None on timeout
+        """
+        if self.mode == "queued":
+            try:
+                grabbed_at, sequence, frame = self.frames.get(timeout=timeout)
+            except queue.Empty:
+                return time.time(), None, None
+        else:
+            with self.condition:
+                delivered = self.delivered_sequence
+                self.wanted += 1
+                try:
+                    if not self.condition.wait_for(
+                        lambda: self.delivered_sequence != delivered, timeout
+                    ):
+                        return time.time(), None, None
+                finally:
+                    self.wanted -= 1
+                grabbed_at, sequence, frame = self.delivered_frame
+
+        self.latency[self.consumed % len(self.latency)] = (
+            time.perf_counter() - grabbed_at
+        )
+        self.consumed += 1
+        return grabbed_at + self.wall_offset, frame, sequence
+
+    @property
+    def queue_depth(self) -> int:
+        """Frames waiting for the consumer (queued mode)."""
+        return self.frames.qsize()
+
+    def stats(self) -> Dict:
+        """Summarize grab rate, losses and grab-to-consumer latency.
+
+        Returns:
+            Dictionary with frame counts, the grab rate, drop rate and
+            latency percentiles in milliseconds
+        """
+        samples = self.latency[: min(self.consumed, len(self.latency))] * 1000.0
+        elapsed = (
+            self.last_grab - self.first_grab
+            if self.first_grab is not None and self.last_grab > self.first_grab
+            else 0.0
+        )
+        stats = {
+            "mode": self.mode,
+            "frames_grabbed": self.grabbed,
+            "frames_retrieved": self.retrieved,
+            "frames_consumed": self.consumed,
+            # Queued mode: lost to a full queue; latest mode: never decoded
+            "frames_dropped": (
+                self.dropped if self.mode == "queued" else self.grabbed - self.consumed
+            ),
+            "failed_grabs": self.failed,
+            "grab_fps": (self.grabbed - 1) / elapsed if elapsed > 0 else 0.0,
+            "queue_depth": self.queue_depth,
+        }
+        if self.mode == "queued" and self.grabbed:
+            stats["drop_rate"] = self.dropped / self.grabbed
+        if len(samples):
+            stats.update(
+                {
+                    "latency_mean_ms": float(samples.mean()),
+                    "latency_p50_ms": float(np.percentile(samples, 50)),
+                    "latency_p99_ms": float(np.percentile(samples, 99)),
+                }
+            )
+        return stats
+
+    def stop(self) -> None:
+        """Stop the grab thread; the capture stays open."""
+        self.running = False
+        self.thread.join(timeout=2.0)
+        with self.condition:
+            self.condition.notify_all()
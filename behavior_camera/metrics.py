@@ -0,0 +1,298 @@
+import numpy as np
+import os
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class MetricsServer:
+    """Local HTTP endpoint exposing recorder health in Prometheus text format.
+
+    The acquisition loop only stores frame timestamps in a preallocated ring
+    buffer (:meth:`observe_frame`); it never takes a lock or formats
+    anything. Queue depths, latencies, disk usage and the quantiles are
+    read from the recorder and computed when ``/metrics`` is scraped.
+    """
+
+    DEFAULTS = {
+        "enabled": False,
+        "host": "127.0.0.1",
+        "port": 9108,
+        "camera": "camera0",  # value of the ``camera`` label
+        "window": 1024,  # recent frames used for rates and quantiles
+    }
+
+    def __init__(self, recorder, config: Optional[Dict] = None):
+        """Initialize metrics server.
+
+        Args:
+            recorder: VideoRecorder to report on
+            config: ``recording.metrics`` configuration
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.recorder = recorder
+        self.host = settings["host"]
+        self.port = int(settings["port"])
+        self.camera = str(settings["camera"])
+        self.window = max(2, int(settings["window"]))
+        framerate = recorder.config.get("camera", {}).get("framerate")
+        self.nominal_interval = 1.0 / framerate if framerate else None
+
+        # Written by the acquisition thread only
+        self.intervals = np.zeros(self.window, dtype=np.float64)
+        self.interval_count = 0
+        self.interval_sum = 0.0
+        self.frames_total = 0
+        self.lost_total = 0
+        self.last_timestamp = None
+
+        # Totals of finished sessions, so counters never go backwards
+        self.dropped_base: Dict[str, int] = {}
+        self.written_base: Dict[str, int] = {}
+        self.bytes_base = 0
+
+        # Scrape-side state for the disk write rate
+        self.last_scrape = None
+        self.last_bytes = 0
+        self.write_rate = 0.0
+
+        self.server = None
+        self.thread = None
+
+    def start(self) -> None:
+        """Start serving in a daemon thread (no-op if already running)."""
+        if self.server is not None:
+            return
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="metrics", daemon=True
+        )
+        self.thread.start()
+        print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+
+    def observe_frame(self, timestamp: float, lost: int = 0) -> None:
+        """Record a captured frame (hot path, no locking).
+
+        Args:
+            timestamp: Frame timestamp
+            lost: Frames lost at the source right before this one
+        """
+        self.lost_total += lost
+        if self.last_timestamp is not None:
+            interval = timestamp - self.last_timestamp
+            self.intervals[self.interval_count % self.window] = interval
+            self.interval_sum += interval
+            self.interval_count += 1
+        self.last_timestamp = timestamp
+        self.frames_total += 1
+
+    def end_session(self, outputs: List) -> None:
+        """Fold the counts of a finished session into the running totals."""
+        for output in outputs:
+            self.dropped_base[output.name] = self.dropped_base.get(
+                output.name, 0
+            ) + len(output.dropped)
+            self.written_base[output.name] = (
+                self.written_base.get(output.name, 0) + output.frames_written
+            )
+            for segment in output.segments:
+                try:
+                    self.bytes_base += os.path.getsize(segment["full_path"])
+                except OSError:
+                    pass
+        # Don't measure an interval across the gap between sessions
+        self.last_timestamp = None
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        camera = f'camera="{self.camera}"'
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP behavior_camera_{name} {help_text}")
+            lines.append(f"# TYPE behavior_camera_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join([camera] + labels)
+                lines.append(f"behavior_camera_{name}{{{label_text}}} {value:.9g}")
+
+        # Frame timing from the ring buffer
+        count = self.interval_count
+        recent = self.intervals[: min(count, self.window)].copy()
+        fps = 1.0 / recent.mean() if recent.size and recent.mean() > 0 else 0.0
+        metric(
+            "recording",
+            "gauge",
+            "1 while a recording session is running",
+            [([], 1.0 if self.recorder.is_recording else 0.0)],
+        )
+        metric(
+            "frames_captured_total",
+            "counter",
+            "Frames passed to the recorder",
+            [([], self.frames_total)],
+        )
+        metric(
+            "frames_lost_at_source_total",
+            "counter",
+            "Frames lost before reaching the recorder (source frame ID gaps)",
+            [([], self.lost_total)],
+        )
+        metric(
+            "capture_fps",
+            "gauge",
+            "Capture rate over the recent window",
+            [([], fps)],
+        )
+        interval_samples = [
+            ([f'quantile="{q}"'], float(np.quantile(recent, q)) if recent.size else 0.0)
+            for q in QUANTILES
+        ]
+        metric(
+            "frame_interval_seconds",
+            "summary",
+            "Time between consecutive frames",
+            interval_samples,
+        )
+        lines.append(
+            f"behavior_camera_frame_interval_seconds_sum{{{camera}}} "
+            f"{self.interval_sum:.9g}"
+        )
+        lines.append(
+            f"behavior_camera_frame_interval_seconds_count{{{camera}}} {count}"
+        )
+        if self.nominal_interval is not None:
+            jitter = np.abs(recent - self.nominal_interval)
+            metric(
+                "frame_jitter_seconds",
+                "gauge",
+                "Deviation of frame intervals from the nominal frame period",
+                [
+                    (
+                        [f'quantile="{q}"'],
+                        float(np.quantile(jitter, q)) if jitter.size else 0.0,
+                    )
+                    for q in QUANTILES
+                ],
+            )
+
+        # Per-output state read from the recorder
+        outputs = list(self.recorder.outputs)
+        names = sorted(set(self.dropped_base) | {output.name for output in outputs})
+        current = {output.name: output for output in outputs}
+
+        def total(base, attribute):
+            samples = []
+            for name in names:
+                value = base.get(name, 0)
+                output = current.get(name)
+                if output is not None:
+                    value += attribute(output)
+                samples.append(([f'output="{name}"'], value))
+            return samples
+
+        metric(
+            "frames_dropped_total",
+            "counter",
+            "Frames dropped per output",
+            total(self.dropped_base, lambda output: len(output.dropped)),
+        )
+        metric(
+            "frames_written_total",
+            "counter",
+            "Frames written per output",
+            total(self.written_base, lambda output: output.frames_written),
+        )
+        metric(
+            "writer_queue_depth",
+            "gauge",
+            "Frames waiting in the output queue",
+            [([f'output="{o.name}"'], o.queue.qsize()) for o in outputs],
+        )
+        latency_samples = []
+        for output in outputs:
+            latencies = output.recent_latencies(self.window)
+            for q in QUANTILES:
+                value = float(np.quantile(latencies, q)) if latencies.size else 0.0
+                latency_samples.append(
+                    ([f'output="{output.name}"', f'quantile="{q}"'], value)
+                )
+        metric(
+            "encode_latency_seconds",
+            "gauge",
+            "Time from queueing a frame until it is written",
+            latency_samples,
+        )
+
+        # Disk
+        bytes_total = self.bytes_base + sum(o.bytes_on_disk() for o in outputs)
+        now = time.monotonic()
+        if self.last_scrape is not None and now > self.last_scrape:
+            self.write_rate = max(0, bytes_total - self.last_bytes) / (
+                now - self.last_scrape
+            )
+        self.last_scrape = now
+        self.last_bytes = bytes_total
+        metric(
+            "disk_written_bytes_total",
+            "counter",
+            "Bytes written by all outputs",
+            [([], bytes_total)],
+        )
+        metric(
+            "disk_write_bytes_per_second",
+            "gauge",
+            "Write rate since the previous scrape",
+            [([], self.write_rate)],
+        )
+        try:
+            free = shutil.disk_usage(self.recorder.output_dir).free
+        except OSError:
+            free = float("nan")
+        metric(
+            "disk_free_bytes",
+            "gauge",
+            "Free space on the recording file system",
+            [([], free)],
+        )
+
+        governor = self.recorder.governor
+        if governor is not None:
+            metric(
+                "load_level",
+                "gauge",
+                "Current load shedding level (0 is normal)",
+                [([], governor.level)],
+            )
+        return "\n".join(lines) + "\n"
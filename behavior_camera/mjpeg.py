@@ -0,0 +1,256 @@
+import cv2
+import numpy as np
+import struct
+from typing import List, Tuple
+
+# Reduced-size JPEG decoding: the IDCT is skipped for the dropped
+# resolution, which is much cheaper than decoding and resizing
+_REDUCED_COLOR = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+_REDUCED_GRAYSCALE = {
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Start-of-frame markers carrying the image size
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD}
+
+
+def is_jpeg(data: np.ndarray) -> bool:
+    """Return True if a buffer starts with a JPEG start-of-image marker."""
+    return (
+        data.dtype == np.uint8 and data.size > 4 and data[0] == 0xFF and data[1] == 0xD8
+    )
+
+
+def jpeg_shape(data: bytes) -> Tuple[int, ...]:
+    """Read the image shape from a JPEG header without decoding.
+
+    Returns:
+        (height, width, 3) for color and (height, width) for grayscale
+    """
+    position = 2
+    while position + 9 < len(data):
+        if data[position] != 0xFF:
+            position += 1
+            continue
+        marker = data[position + 1]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[position + 5 : position + 9])
+            components = data[position + 9]
+            return (height, width, 3) if components == 3 else (height, width)
+        if marker == 0xFF or 0xD0 <= marker <= 0xD8 or marker == 0x01:
+            position += 2 if marker != 0xFF else 1
+            continue
+        (length,) = struct.unpack(">H", data[position + 2 : position + 4])
+        position += 2 + length
+    raise ValueError("No JPEG start-of-frame marker found")
+
+
+class JpegFrame:
+    """Compressed MJPEG frame as delivered by a UVC camera.
+
+    Passed through the acquisition pipeline in place of a decoded frame so
+    outputs can store the bitstream as it is. ``shape``, ``ndim`` and
+    ``dtype`` describe the decoded image (read from the JPEG header), and
+    :meth:`decode` decodes on demand, at reduced size when asked.
+    """
+
+    __slots__ = ("data", "_shape")
+
+    dtype = np.dtype(np.uint8)
+
+    def __init__(self, data: np.ndarray):
+        """Wrap a bitstream.
+
+        Args:
+            data: JPEG bitstream as a uint8 array
+        """
+        self.data = np.ascontiguousarray(data).reshape(-1)
+        self._shape = None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        if self._shape is None:
+            self._shape = jpeg_shape(memoryview(self.data))
+        return self._shape
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def decode(self, scale: float = 1.0, grayscale: bool = False) -> np.ndarray:
+        """Decode the frame.
+
+        Args:
+            scale: Output size relative to the full image; powers of two
+                down to 1/8 come straight from the decoder, other factors
+                are resized from the nearest larger one
+            grayscale: Decode to a single channel
+
+        Returns:
+            Decoded frame
+        """
+        factor = 1
+        while factor < 8 and scale <= 1.0 / (factor * 2):
+            factor *= 2
+        if factor == 1:
+            flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+        else:
+            flags = (_REDUCED_GRAYSCALE if grayscale else _REDUCED_COLOR)[factor]
+        frame = cv2.imdecode(self.data, flags)
+        if frame is None:
+            raise RuntimeError("Failed to decode JPEG frame")
+        remaining = scale * factor
+        if abs(remaining - 1.0) > 1e-6:
+            frame = cv2.resize(
+                frame, None, fx=remaining, fy=remaining, interpolation=cv2.INTER_AREA
+            )
+        return frame
+
+
+def _chunk(fourcc: bytes, payload: bytes) -> bytes:
+    """Build a RIFF chunk, padded to an even size."""
+    return (
+        fourcc + struct.pack("<I", len(payload)) + payload + b"\0" * (len(payload) & 1)
+    )
+
+
+class AviMjpegFile:
+    """Minimal AVI 1.0 writer for JPEG bitstreams.
+
+    Frames are appended as ``00dc`` chunks to the ``movi`` list and an
+    ``idx1`` index is written on close, so players and OpenCV can seek.
+    Header sizes and frame counts are patched in place when closing.
+    """
+
+    def __init__(self, path: str, fps: float, width: int, height: int):
+        self.file = open(path, "wb")
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.index: List[Tuple[int, int]] = []  # (offset in movi, size)
+        self.max_size = 0
+
+        micro_seconds = int(round(1e6 / fps)) if fps > 0 else 0
+        self.avih = struct.pack(
+            "<IIIIIIIIII16x",
+            micro_seconds,
+            0,  # max bytes per second, patched on close
+            0,
+            0x10,  # AVIF_HASINDEX
+            0,  # total frames, patched on close
+            0,
+            1,  # streams
+            0,  # suggested buffer size, patched on close
+            width,
+            height,
+        )
+        rate, scale = self._rate()
+        self.strh = struct.pack(
+            "<4s4sIHHIIIIIIIIhhhh",
+            b"vids",
+            b"MJPG",
+            0,
+            0,
+            0,
+            0,
+            scale,
+            rate,
+            0,
+            0,  # length in frames, patched on close
+            0,  # suggested buffer size, patched on close
+            0xFFFFFFFF,  # quality: default
+            0,
+            0,
+            0,
+            width,
+            height,
+        )
+        strf = struct.pack(
+            "<IiiHH4sIiiII",
+            40,
+            width,
+            height,
+            1,
+            24,
+            b"MJPG",
+            width * height * 3,
+            0,
+            0,
+            0,
+            0,
+        )
+        strl = _chunk(
+            b"LIST", b"strl" + _chunk(b"strh", self.strh) + _chunk(b"strf", strf)
+        )
+        hdrl = _chunk(b"LIST", b"hdrl" + _chunk(b"avih", self.avih) + strl)
+
+        self.file.write(b"RIFF\0\0\0\0AVI ")
+        self.avih_offset = self.file.tell() + 12 + 8  # RIFF header, LIST hdrl
+        self.strh_offset = self.avih_offset + len(self.avih) + 12 + 8
+        self.file.write(hdrl)
+        self.movi_offset = self.file.tell()
+        self.file.write(b"LIST\0\0\0\0movi")
+
+    def _rate(self) -> Tuple[int, int]:
+        """Frame rate as an integer ratio (rate, scale)."""
+        scale = 1000
+        return int(round(self.fps * scale)), scale
+
+    def write(self, data) -> None:
+        """Append one JPEG bitstream."""
+        size = len(data)
+        self.index.append((self.file.tell() - (self.movi_offset + 8), size))
+        self.file.write(b"00dc" + struct.pack("<I", size))
+        self.file.write(data)
+        if size & 1:
+            self.file.write(b"\0")
+        self.max_size = max(self.max_size, size)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def close(self) -> None:
+        """Write the index and patch the headers."""
+        if self.file is None:
+            return
+        movi_end = self.file.tell()
+        entries = np.zeros(
+            len(self.index),
+            dtype=[("id", "S4"), ("flags", "<u4"), ("offset", "<u4"), ("size", "<u4")],
+        )
+        entries["id"] = b"00dc"
+        entries["flags"] = 0x10  # AVIIF_KEYFRAME: every JPEG frame is one
+        if self.index:
+            offsets, sizes = zip(*self.index)
+            entries["offset"] = offsets
+            entries["size"] = sizes
+        self.file.write(_chunk(b"idx1", entries.tobytes()))
+        end = self.file.tell()
+
+        frames = len(self.index)
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", end - 8))
+        self.file.seek(self.movi_offset + 4)
+        self.file.write(struct.pack("<I", movi_end - self.movi_offset - 8))
+        # avih: max bytes/s, total frames and suggested buffer size
+        self.file.seek(self.avih_offset + 4)
+        self.file.write(struct.pack("<I", int(self.max_size * self.fps)))
+        self.file.seek(self.avih_offset + 16)
+        self.file.write(struct.pack("<I", frames))
+        self.file.seek(self.avih_offset + 28)
+        self.file.write(struct.pack("<I", self.max_size))
+        # strh: length and suggested buffer size
+        self.file.seek(self.strh_offset + 32)
+        self.file.write(struct.pack("<II", frames, self.max_size))
+        self.file.close()
+        self.file = None
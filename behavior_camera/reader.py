@@ -0,0 +1,317 @@
+import cv2
+import numpy as np
+import os
+import json
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from .bayer import demosaic as demosaic_frame
+from .delta import open_video
+from .writers import FILE_FORMATS
+
+
+def find_session_files(path: str) -> Tuple[str, str]:
+    """Locate the video and timestamp sidecar belonging to a recording.
+
+    Args:
+        path: Video file of any output, ``*_timestamps.json`` sidecar or the
+            common base path without extension
+
+    Returns:
+        Tuple of (video_path, timestamp_path)
+    """
+    base, extension = os.path.splitext(path)
+    if path.endswith("_timestamps.json"):
+        base = path[: -len("_timestamps.json")]
+        extension = ""
+
+    timestamp_path = f"{base}_timestamps.json"
+    session_base = base
+    while extension and not os.path.exists(timestamp_path) and "_" in session_base:
+        # Secondary outputs and segments are named <base>_<output>_seg<n><ext>
+        session_base = session_base.rsplit("_", 1)[0]
+        timestamp_path = f"{session_base}_timestamps.json"
+    if extension and extension != ".json":
+        video_path = path
+    else:
+        extensions = sorted({spec["extension"] for spec in FILE_FORMATS.values()})
+        candidates = [f"{base}{ext}" for ext in extensions]
+        video_path = next((p for p in candidates if os.path.exists(p)), None)
+        if video_path is None:
+            raise FileNotFoundError(f"No video file found for recording {base}")
+    if not os.path.exists(timestamp_path):
+        raise FileNotFoundError(f"Timestamp sidecar not found: {timestamp_path}")
+    return video_path, timestamp_path
+
+
+def find_output(metadata: Dict, video_path: str) -> Tuple[Optional[Dict], int]:
+    """Find the sidecar output entry a video file belongs to.
+
+    Args:
+        metadata: Loaded timestamp sidecar
+        video_path: Video file of any output or segment
+
+    Returns:
+        Tuple of (output entry, segment number); (None, 0) for sidecars
+        without matching output entries
+    """
+    # Match on the file name without extension so transcoded copies
+    # can share the original sidecar
+    video_stem = os.path.splitext(os.path.basename(video_path))[0]
+    for output in metadata.get("outputs", {}).values():
+        segments = output.get("segments") or [{"path": output.get("path")}]
+        for i, segment in enumerate(segments):
+            if os.path.splitext(segment["path"] or "")[0] == video_stem:
+                return output, i
+    return None, 0
+
+
+def session_frame_indices(metadata: Dict, video_path: str) -> np.ndarray:
+    """Map the frames of one video file to capture indices.
+
+    Video frames are the captured frames minus the ones the file's output
+    dropped; outputs split into segments only cover their own range.
+
+    Args:
+        metadata: Loaded timestamp sidecar
+        video_path: Video file of any output or segment
+
+    Returns:
+        Capture index of every frame in the file
+    """
+    frame_total = len(metadata["timestamps"])
+    dropped = metadata.get("dropped", [])
+    start, stop = 0, frame_total
+    output, i = find_output(metadata, video_path)
+    if output is not None:
+        segments = output.get("segments") or []
+        dropped = output["dropped"]
+        if segments:
+            start = segments[i].get("start", 0)
+            if i + 1 < len(segments):
+                stop = segments[i + 1]["start"]
+    keep = np.zeros(frame_total, dtype=bool)
+    keep[start:stop] = True
+    keep[np.asarray(dropped, dtype=np.int64)] = False
+    return np.flatnonzero(keep)
+
+
+class RecordingReader:
+    """Random-access reader for a recorded session.
+
+    Maps times to frames by binary search over the timestamp sidecar, keeps
+    a bounded LRU cache of decoded frames and only seeks when the target is
+    further ahead than a keyframe interval; shorter forward jumps are served
+    by grabbing frames from the current decoder position.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 256,
+        keyframe_interval: int = 250,
+        demosaic: bool = True,
+    ):
+        """Open a recording.
+
+        Args:
+            path: Video file, timestamp sidecar or common base path
+            cache_size: Maximum number of decoded frames kept in memory
+            keyframe_interval: Forward distance in frames above which the
+                decoder seeks instead of decoding sequentially
+            demosaic: Demosaic outputs stored as raw Bayer; False returns the
+                mosaic (as three identical channels)
+        """
+        self.video_path, self.timestamp_path = find_session_files(path)
+        self.cache_size = cache_size
+        self.keyframe_interval = keyframe_interval
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.seeks = 0
+
+        with open(self.timestamp_path, "r") as f:
+            sidecar = json.load(f)
+        self.metadata = sidecar
+        all_timestamps = np.asarray(sidecar["timestamps"], dtype=np.float64)
+        self.capture_indices = session_frame_indices(sidecar, self.video_path)
+        output, _ = find_output(sidecar, self.video_path)
+        self.bayer_pattern = (output or {}).get("bayer_pattern") if demosaic else None
+        # Color mode the output was recorded in; None for older sidecars.
+        # Frames are always decoded as BGR.
+        self.is_color = (output or {}).get("is_color")
+        if self.bayer_pattern:
+            self.is_color = True
+        self.raw = None  # Decode buffer for raw Bayer frames
+        self.timestamps = all_timestamps[self.capture_indices]
+
+        self.cap = open_video(self.video_path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Failed to open video {self.video_path}")
+        self.position = 0
+
+        frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count > 0 and frame_count != len(self.timestamps):
+            print(
+                f"Warning: video has {frame_count} frames but sidecar lists "
+                f"{len(self.timestamps)}; using the shorter"
+            )
+            frame_count = min(frame_count, len(self.timestamps))
+        else:
+            frame_count = len(self.timestamps)
+        self.frame_count = frame_count
+        self.timestamps = self.timestamps[:frame_count]
+        self.capture_indices = self.capture_indices[:frame_count]
+
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_shape = (height, width, 3)
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def frame_at_time(self, t: float) -> int:
+        """Return the index of the frame closest to a timestamp.
+
+        Args:
+            t: Timestamp in the same clock as the sidecar
+
+        Returns:
+            int: Video frame index
+        """
+        if self.frame_count == 0:
+            raise IndexError("Recording contains no frames")
+        i = int(np.searchsorted(self.timestamps, t))
+        if i >= self.frame_count:
+            return self.frame_count - 1
+        if i > 0 and t - self.timestamps[i - 1] <= self.timestamps[i] - t:
+            return i - 1
+        return i
+
+    def frame_range(self, start_time: float, end_time: float) -> Tuple[int, int]:
+        """Return the frame index range covering ``[start_time, end_time)``.
+
+        Returns:
+            Tuple of (start, stop) frame indices
+        """
+        start = int(np.searchsorted(self.timestamps, start_time, side="left"))
+        stop = int(np.searchsorted(self.timestamps, end_time, side="left"))
+        return start, max(start, stop)
+
+    def read(self, index: int) -> np.ndarray:
+        """Read a single frame.
+
+        Cached frames are shared between calls and returned read-only.
+
+        Args:
+            index: Video frame index
+
+        Returns:
+            Decoded frame
+        """
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"Frame {index} out of range 0..{self.frame_count - 1}")
+        frame = self.cache.get(index)
+        if frame is not None:
+            self.cache.move_to_end(index)
+            self.cache_hits += 1
+            return frame
+
+        self.cache_misses += 1
+        frame = np.empty(self.frame_shape, dtype=np.uint8)
+        self._decode_into(index, frame)
+        self._cache_put(index, frame)
+        return frame
+
+    def read_range(self, start: int, stop: int) -> np.ndarray:
+        """Decode a range of frames into one preallocated stack.
+
+        Args:
+            start: First frame index
+            stop: End frame index (exclusive)
+
+        Returns:
+            Array of shape (stop - start, height, width, 3)
+        """
+        start = max(0, start)
+        stop = min(self.frame_count, stop)
+        stack = np.empty((max(0, stop - start),) + self.frame_shape, dtype=np.uint8)
+        for k, index in enumerate(range(start, stop)):
+            cached = self.cache.get(index)
+            if cached is not None:
+                self.cache.move_to_end(index)
+                self.cache_hits += 1
+                stack[k] = cached
+            else:
+                self.cache_misses += 1
+                self._decode_into(index, stack[k])
+                self._cache_put(index, stack[k].copy())
+        return stack
+
+    def read_clip(
+        self, t: float, duration: float = 1.0, pre: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Read the frames around an event time.
+
+        Args:
+            t: Event timestamp
+            duration: Clip length in seconds after ``t``
+            pre: Seconds to include before ``t``
+
+        Returns:
+            Tuple of (timestamps, frames)
+        """
+        start, stop = self.frame_range(t - pre, t + duration)
+        return self.timestamps[start:stop], self.read_range(start, stop)
+
+    def _decode_into(self, index: int, out: np.ndarray) -> None:
+        """Position the decoder on a frame and decode it into ``out``."""
+        gap = index - self.position
+        if self.position < 0 or gap < 0 or gap > self.keyframe_interval:
+            # Let the demuxer jump to the preceding keyframe; also after a
+            # failure, when the decoder position is unknown
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self.seeks += 1
+        else:
+            for skipped in range(self.position, index):
+                if not self.cap.grab():
+                    self.position = -1
+                    raise RuntimeError(
+                        f"Failed to decode frame {skipped} of {self.video_path}"
+                    )
+        target = out
+        if self.bayer_pattern:
+            if self.raw is None:
+                self.raw = np.empty(self.frame_shape, dtype=np.uint8)
+            target = self.raw
+        ret, frame = self.cap.read(target)
+        if not ret:
+            self.position = -1
+            raise RuntimeError(f"Failed to decode frame {index} of {self.video_path}")
+        if self.bayer_pattern:
+            demosaic_frame(frame, self.bayer_pattern, out)
+        elif frame is not out:
+            out[...] = frame
+        self.position = index + 1
+
+    def _cache_put(self, index: int, frame: np.ndarray) -> None:
+        """Insert a decoded frame, evicting the least recently used ones."""
+        if self.cache_size <= 0:
+            return
+        frame.flags.writeable = False
+        self.cache[index] = frame
+        self.cache.move_to_end(index)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def close(self) -> None:
+        """Release the decoder and drop cached frames."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.cache.clear()
@@ -2,13 +2,374 @@ import cv2
 import numpy as np
 import os
 import json
-from typing import Dict
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 import time
+from .bayer import demosaic, demosaic_tiled, is_bayer
+from .correction import BufferRing, CorrectionWorker, FrameCorrector
+from .governor import LoadGovernor
+from .integration import FrameIntegrator
+from .frame_info import FrameInfo
+from .metrics import MetricsServer
+from .mjpeg import JpegFrame
+from .writers import create_writer, get_format_spec
+
+# Write latency samples kept per output for percentiles; the mean and
+# maximum cover the whole session
+LATENCY_HISTORY = 10000
+
+
+def _is_lossless(output_config: Dict) -> bool:
+    """Return True if an output configuration encodes losslessly."""
+    spec = get_format_spec(output_config)
+    encoder = output_config.get("encoder") or {}
+    return bool(
+        encoder.get("lossless")
+        or spec.get("codec") == "ffv1"
+        or spec.get("image") in (".png", ".tiff")
+    )
+
+
+class RecordingOutput:
+    """Output fed by its own resize/encode worker thread.
+
+    Frames are handed over by reference through a bounded queue so that
+    resizing, encoding and disk I/O never block the acquisition loop or the
+    other outputs. When the queue is full the frame is dropped for this
+    output only and its index recorded instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str],
+        fps: float,
+        output_config: Dict,
+        queue_size: int = 128,
+        callback: Optional[Callable[[int, float, np.ndarray], None]] = None,
+    ):
+        """Initialize output.
+
+        Args:
+            name: Output name used in the sidecar and summary
+            path: Output video file path; None for callback outputs
+            fps: Frame rate stored in the container
+            output_config: Output settings (``file_format``, ``encoder``,
+                ``scale``, ``grayscale``)
+            queue_size: Maximum number of frames waiting to be written
+            callback: Called as ``callback(index, timestamp, frame, info)``
+                instead of writing a file, e.g. for an analysis stream
+        """
+        self.name = name
+        self.path = path
+        self.fps = fps
+        self.output_config = output_config
+        self.scale = float(output_config.get("scale", 1.0))
+        self.grayscale = bool(output_config.get("grayscale", False))
+        self.callback = callback
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.writer = None
+        self.error = None
+        self.dropped: List[int] = []
+        self.frames_written = 0
+        self.latencies = np.zeros(LATENCY_HISTORY, dtype=np.float64)
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.segments: List[Dict] = []
+        self.paused = False
+        self.faster_requested = False
+        self.closing: List[threading.Thread] = []
+        self.bayer_pattern = None  # CFA pattern of incoming raw frames
+        self.stores_raw = False
+        self.is_color: Optional[bool] = None  # known once a file is opened
+        # Ring the queued frames are leased from (with correction enabled)
+        self.buffers: Optional[BufferRing] = None
+        # MJPEG file outputs store compressed camera frames as they are
+        self.accepts_jpeg = (
+            path is not None
+            and get_format_spec(output_config).get("codec") == "mjpeg"
+            and not (output_config.get("encoder") or {}).get("lossless")
+        )
+        self.stores_compressed = False
+        self.thread = threading.Thread(
+            target=self._run, name=f"output-{name}", daemon=True
+        )
+        self.thread.start()
+
+    def submit(
+        self,
+        index: int,
+        timestamp: float,
+        frame: np.ndarray,
+        info: Optional[FrameInfo] = None,
+    ) -> bool:
+        """Queue a frame for this output without blocking.
+
+        A frame leased from ``buffers`` is held until it has been written.
+
+        Args:
+            index: Capture index of the frame
+            timestamp: Timestamp of the frame
+            frame: Video frame, shared with the other outputs
+            info: Descriptor of the frame, shared with the other outputs
+
+        Returns:
+            bool: False if the frame had to be dropped
+        """
+        if self.error is None and not self.paused:
+            # Hold the frame before the worker can see (and release) it
+            self._retain(frame)
+            try:
+                self.queue.put_nowait(
+                    (index, timestamp, frame, info, time.perf_counter())
+                )
+                return True
+            except queue.Full:
+                self._release(frame)
+        self.dropped.append(index)
+        return False
+
+    @property
+    def queue_fill(self) -> float:
+        """Fraction of the queue capacity in use."""
+        return self.queue.qsize() / max(1, self.queue.maxsize)
+
+    def bytes_on_disk(self) -> int:
+        """Total size of the files written by this output so far."""
+        total = 0
+        for segment in self.segments[:-1]:
+            try:
+                total += os.path.getsize(segment["full_path"])
+            except OSError:
+                pass
+        writer = self.writer
+        if writer is not None:
+            total += writer.bytes_written()
+        return total
+
+    def request_faster_preset(self) -> None:
+        """Ask the worker to continue in a new segment with a cheaper preset.
+
+        Only encoders offering a faster preset switch; others keep going.
+        """
+        self.faster_requested = True
+
+    def close(self) -> None:
+        """Process all queued frames and close the file."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _retain(self, frame) -> None:
+        if self.buffers is not None:
+            self.buffers.retain(frame)
+
+    def _release(self, frame) -> None:
+        """Return a frame leased from ``buffers`` once done with it."""
+        if self.buffers is not None:
+            self.buffers.release(frame)
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Apply this output's resize and color conversion.
+
+        Raw Bayer frames are written as they are to full-size file outputs;
+        other outputs get them demosaiced here, downscaled ones with the
+        cheaper tiled demosaic. Compressed MJPEG frames likewise pass
+        through to full-size MJPEG outputs and are decoded, at reduced size
+        where possible, for all others.
+        """
+        scale = self.scale
+        if isinstance(frame, JpegFrame):
+            if self.accepts_jpeg and scale == 1.0 and not self.grayscale:
+                self.stores_compressed = True
+                return frame
+            return frame.decode(scale, self.grayscale)
+        if self.bayer_pattern and frame.ndim == 2:
+            if self.callback is None and scale == 1.0 and not self.grayscale:
+                self.stores_raw = True
+                return frame
+            if scale <= 0.5:
+                frame = demosaic_tiled(frame, self.bayer_pattern, scale)
+                scale = 1.0
+            else:
+                frame = demosaic(frame, self.bayer_pattern)
+        if self.grayscale and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if scale != 1.0:
+            frame = cv2.resize(
+                frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+        return frame
+
+    def _open_writer(
+        self, frame: np.ndarray, index: int, encoder: Optional[Dict] = None
+    ) -> None:
+        """Open a writer segment using the size of the first prepared frame.
+
+        Args:
+            frame: First frame of the segment
+            index: Capture index of that frame
+            encoder: Encoder options replacing the configured ones
+        """
+        height, width = frame.shape[:2]
+        is_color = frame.ndim == 3 and frame.shape[2] == 3
+        self.is_color = is_color
+        if frame.dtype != np.uint8 and "image" not in get_format_spec(
+            self.output_config
+        ):
+            raise ValueError(
+                f"Output '{self.name}' received {frame.dtype} frames; "
+                "use the png or tiff format for integrated sums"
+            )
+        path = self.path
+        if self.segments:
+            stem, extension = os.path.splitext(self.path)
+            path = f"{stem}_seg{len(self.segments)}{extension}"
+        output_config = self.output_config
+        if encoder is not None:
+            output_config = dict(output_config)
+            output_config["encoder"] = encoder
+        if self.stores_raw and not self.segments and not _is_lossless(output_config):
+            print(
+                f"Warning: output '{self.name}' stores raw Bayer frames with a "
+                "lossy codec, which mixes neighboring colors; use ffv1, png, "
+                "tiff or encoder.lossless"
+            )
+        self.writer = create_writer(
+            path,
+            self.fps,
+            (width, height),
+            output_config,
+            is_color,
+            compressed=isinstance(frame, JpegFrame),
+        )
+        self.writer.frame_done = self._release
+        self.segments.append(
+            {"path": os.path.basename(path), "start": index, "full_path": path}
+        )
+
+    def _switch_to_faster_preset(self, frame: np.ndarray, index: int) -> None:
+        """Close the current segment and continue with a faster preset."""
+        self.faster_requested = False
+        encoder = self.writer.faster_options()
+        if encoder is None:
+            return
+        # Flushing the old encoder can take a while; don't hold up new frames
+        closer = threading.Thread(target=self.writer.release, daemon=True)
+        closer.start()
+        self.closing.append(closer)
+        self.writer = None
+        print(f"Output '{self.name}' switching to a faster preset at frame {index}")
+        self._open_writer(frame, index, encoder)
+
+    def _next_segment(self, frame, index: int) -> None:
+        """Close a full segment and continue in a new file."""
+        closer = threading.Thread(target=self.writer.release, daemon=True)
+        closer.start()
+        self.closing.append(closer)
+        self.writer = None
+        self._open_writer(frame, index)
+
+    def _run(self) -> None:
+        """Worker thread main loop."""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            index, timestamp, shared, info, queued_at = item
+            if self.error is not None:
+                self.dropped.append(index)
+                self._release(shared)
+                continue
+            try:
+                frame = self._prepare(shared)
+                if self.callback is not None:
+                    self.callback(index, timestamp, frame, info)
+                else:
+                    if self.writer is None:
+                        self._open_writer(frame, index)
+                    elif self.faster_requested:
+                        self._switch_to_faster_preset(frame, index)
+                    elif self.writer.segment_full():
+                        self._next_segment(frame, index)
+                    if frame is shared and self.writer.holds_frames:
+                        # The writer releases it through frame_done
+                        shared = None
+                    self.writer.write(frame, index, timestamp)
+                self.frames_written += 1
+                self._add_latency(time.perf_counter() - queued_at)
+            except Exception as e:
+                print(f"Error in output '{self.name}': {e}")
+                self.error = e
+                self.dropped.append(index)
+            if shared is not None:
+                self._release(shared)
+
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+        for closer in self.closing:
+            closer.join()
+
+    def _add_latency(self, latency: float) -> None:
+        """Store a write latency in the ring and update the totals."""
+        self.latencies[self.latency_count % len(self.latencies)] = latency
+        self.latency_count += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def recent_latencies(self, count: Optional[int] = None) -> np.ndarray:
+        """Return the most recent write latencies in seconds.
+
+        Args:
+            count: Number of samples; defaults to all kept samples
+        """
+        size = len(self.latencies)
+        end = self.latency_count
+        count = min(end, size if count is None else min(count, size))
+        return self.latencies[np.arange(end - count, end) % size]
+
+    def summary(self, write_time: float) -> Dict:
+        """Collect throughput and latency statistics for this output.
+
+        The mean and maximum latency cover all frames; the percentiles cover
+        the last ``LATENCY_HISTORY`` frames.
+
+        Args:
+            write_time: Seconds from session start until the output closed
+        """
+        latencies = self.recent_latencies() * 1000.0
+        summary = {
+            "path": self.path,
+            "frames_written": self.frames_written,
+            "frames_dropped": len(self.dropped),
+            "write_fps": self.frames_written / write_time if write_time > 0 else 0.0,
+        }
+        if latencies.size:
+            summary.update(
+                {
+                    "latency_mean_ms": self.latency_sum / self.latency_count * 1000.0,
+                    "latency_p50_ms": float(np.percentile(latencies, 50)),
+                    "latency_p95_ms": float(np.percentile(latencies, 95)),
+                    "latency_max_ms": self.latency_max * 1000.0,
+                }
+            )
+        if len(self.segments) > 1:
+            summary["segments"] = len(self.segments)
+        if self.error is not None:
+            summary["error"] = str(self.error)
+        return summary
 
 
 class VideoRecorder:
-    """Video recorder with timestamp synchronization."""
+    """Video recorder with timestamp synchronization.
+
+    Every captured frame is fanned out to the outputs listed under
+    ``recording.outputs`` (by default a single archive file). All outputs
+    share the capture index and timestamp of each frame.
+    """
 
     def __init__(self, output_dir: str, config: Dict):
         """Initialize video recorder.
@@ -19,9 +380,54 @@ class VideoRecorder:
         """
         self.output_dir = output_dir
         self.config = config
-        self.writer = None
-        self.timestamp_file = None
+        self.outputs: List[RecordingOutput] = []
+        self.analysis_outputs: List[Dict] = []
+        self.video_path = None
+        self.timestamp_path = None
         self.timestamps = []
+        self.settings: List[Dict] = []
+        self.last_metadata = None
+        self.bayer_pattern = None  # CFA pattern when frames are raw Bayer
+        self.source_timestamps: List[float] = []  # captures merged by integration
+        self.group_starts: List[int] = []  # first source capture per merged frame
+        self.integration_discarded = 0  # captures of groups broken by a loss
+        self.capture_count = 0  # frames passed to record_frame
+        self.last_sequence = -1  # capture number of the last integrated frame
+        self.group_start = 0
+        self.frame_ids: List[Optional[int]] = []  # source frame ID per index
+        self.source_frame_ids: List[Optional[int]] = []  # merged captures
+        self.source_gaps: List[Dict] = []  # frames lost before reaching us
+        self.source_lost = 0
+        self.events: List[Dict] = []
+        self.governor = None
+        self.decimated = 0
+        self.start_time = None
+        self.summary = None
+
+        recording_config = config.get("recording", {})
+        self.preview = recording_config.get("preview", True)
+        self.base_preview_interval = 1.0 / recording_config.get("preview_fps", 15.0)
+        self.preview_interval = self.base_preview_interval
+        self.last_preview_time = 0.0
+
+        self.integrator = FrameIntegrator(recording_config.get("integration"))
+        if self.integrator.enabled and self.integrator.mode == "sum":
+            # Sums are 16-bit or wider; only image sequences can store them
+            for output_config in self.output_configs():
+                if "image" not in get_format_spec(output_config):
+                    raise ValueError(
+                        f"Output '{output_config['name']}' uses the "
+                        f"{output_config['file_format']} format, which cannot "
+                        "store integrated sums; use png or tiff"
+                    )
+        self.corrector = FrameCorrector(recording_config.get("correction"))
+        self.correction_worker = None
+
+        metrics_config = recording_config.get("metrics") or {}
+        self.metrics = None
+        if metrics_config.get("enabled", False):
+            self.metrics = MetricsServer(self, metrics_config)
+            self.metrics.start()
 
         # FPS calculation variables
         self.fps_start_time = None
@@ -32,55 +438,374 @@ class VideoRecorder:
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
 
-    def start_recording(self) -> None:
-        """Start a new recording session."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_filename = f"recording_{timestamp}"
+    @property
+    def is_recording(self) -> bool:
+        """True between start_recording and stop_recording."""
+        return bool(self.outputs)
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames passed to record_frame in this session."""
+        return len(self.timestamps)
+
+    @property
+    def dropped_count(self) -> int:
+        """Number of frames missing from the primary output in this session."""
+        return len(self.outputs[0].dropped) if self.outputs else 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Largest number of frames waiting in any output queue."""
+        return max((output.queue.qsize() for output in self.outputs), default=0)
 
-        # Initialize video writer
-        video_path = os.path.join(self.output_dir, f"{base_filename}.avi")
-        fourcc = cv2.VideoWriter_fourcc(*"XVID")
+    def output_configs(self) -> List[Dict]:
+        """Resolve the configured outputs.
 
-        # Get resolution from config
-        width = self.config["camera"]["resolution"]["width"]
-        height = self.config["camera"]["resolution"]["height"]
+        Each entry of ``recording.outputs`` inherits ``file_format``,
+        ``encoder`` and ``queue_size`` from the ``recording`` section. The
+        first output is the primary one and is written without a name
+        suffix.
 
-        self.writer = cv2.VideoWriter(
-            video_path, fourcc, self.config["camera"]["framerate"], (width, height)
+        Returns:
+            List of output configurations with a ``name`` key
+        """
+        recording_config = self.config.get("recording", {})
+        defaults = {
+            "file_format": recording_config.get("file_format", "avi"),
+            "encoder": recording_config.get("encoder") or {},
+            "queue_size": recording_config.get("queue_size", 128),
+        }
+        outputs = recording_config.get("outputs") or [{"name": "archive"}]
+        resolved = []
+        for i, output in enumerate(outputs):
+            output_config = dict(defaults)
+            output_config.update(output)
+            output_config.setdefault("name", "archive" if i == 0 else f"output{i}")
+            resolved.append(output_config)
+        return resolved
+
+    def add_analysis_output(
+        self,
+        name: str,
+        callback: Callable[[int, float, np.ndarray, Optional[FrameInfo]], None],
+        scale: float = 1.0,
+        grayscale: bool = False,
+        queue_size: int = 8,
+    ) -> None:
+        """Register a callback that receives frames on its own worker thread.
+
+        Takes effect from the next start_recording call. Frames the callback
+        cannot keep up with are dropped for this output only.
+
+        Args:
+            name: Output name
+            callback: Called as ``callback(index, timestamp, frame, info)``
+                with the frame's descriptor (None if the frame was recorded
+                without one). With correction enabled the frame buffer is
+                reused after the call; copy frames that are kept
+            scale: Resize factor applied before the callback
+            grayscale: Convert frames to grayscale before the callback
+            queue_size: Maximum number of frames waiting for the callback
+        """
+        self.analysis_outputs.append(
+            {
+                "name": name,
+                "callback": callback,
+                "scale": scale,
+                "grayscale": grayscale,
+                "queue_size": queue_size,
+            }
         )
 
-        # Initialize timestamp file
-        self.timestamp_file = open(
-            os.path.join(self.output_dir, f"{base_filename}_timestamps.json"), "w"
+    def start_recording(self, base_filename: Optional[str] = None) -> None:
+        """Start a new recording session.
+
+        Args:
+            base_filename: File name without extension; defaults to
+                ``recording.filename_format`` expanded with the current time
+        """
+        recording_config = self.config.get("recording", {})
+        if base_filename is None:
+            filename_format = recording_config.get(
+                "filename_format", "recording_%Y%m%d_%H%M%S"
+            )
+            base_filename = datetime.now().strftime(
+                os.path.splitext(filename_format)[0]
+            )
+
+        # Initialize one output per configured stream
+        fps = self.config["camera"]["framerate"]
+        self.outputs = []
+        for i, output_config in enumerate(self.output_configs()):
+            suffix = "" if i == 0 else f"_{output_config['name']}"
+            extension = get_format_spec(output_config)["extension"]
+            path = os.path.join(self.output_dir, f"{base_filename}{suffix}{extension}")
+            self.outputs.append(
+                RecordingOutput(
+                    output_config["name"],
+                    path,
+                    fps,
+                    output_config,
+                    output_config["queue_size"],
+                )
+            )
+        for analysis in self.analysis_outputs:
+            self.outputs.append(
+                RecordingOutput(
+                    analysis["name"],
+                    None,
+                    fps,
+                    analysis,
+                    analysis["queue_size"],
+                    callback=analysis["callback"],
+                )
+            )
+        if self.corrector.enabled:
+            # Corrected frames are leased from the corrector's ring
+            for output in self.outputs:
+                output.buffers = self.corrector.ring
+        self.video_path = self.outputs[0].path
+
+        self.timestamp_path = os.path.join(
+            self.output_dir, f"{base_filename}_timestamps.json"
         )
         self.timestamps = []
+        self.settings = []
+        self.last_metadata = None
+        self.bayer_pattern = None
+        self.source_timestamps = []
+        self.group_starts = []
+        self.integration_discarded = 0
+        self.capture_count = 0
+        self.last_sequence = -1
+        self.frame_ids = []
+        self.source_frame_ids = []
+        self.source_gaps = []
+        self.source_lost = 0
+        self.integrator.reset()
+        if self.corrector.enabled and self.corrector.threaded:
+            self.correction_worker = CorrectionWorker(
+                self.corrector, self._record, self.corrector.queue_size
+            )
+        self.events = []
+        self.decimated = 0
+        self.preview_interval = self.base_preview_interval
+        load_config = recording_config.get("load_shedding") or {}
+        self.governor = (
+            LoadGovernor(load_config, self.output_dir)
+            if load_config.get("enabled", False)
+            else None
+        )
+        self.summary = None
+        self.start_time = time.time()
 
         # Initialize FPS calculation
         self.fps_start_time = time.time()
         self.fps_frame_count = 0
         self.current_fps = 0
 
-    def record_frame(self, frame: np.ndarray, timestamp: float) -> None:
+    def record_frame(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        metadata: Optional[Dict] = None,
+        info: Optional[FrameInfo] = None,
+    ) -> bool:
         """Record a frame with its timestamp and show preview.
 
+        The frame is queued by reference for every output, so this returns
+        quickly. The caller must not modify the frame afterwards.
+
+        With ``recording.correction`` enabled, frames are corrected first,
+        by default on a worker thread; frames it cannot keep up with are
+        dropped before they get an index and counted separately. With
+        ``recording.integration`` enabled, captured frames are then merged
+        in groups and only every completed group is recorded.
+
+        Gaps in the source frame IDs (frames the camera, driver or grab
+        thread lost before they reached the recorder) are logged as they
+        arrive and listed in the sidecar under ``source_gaps``.
+
         Args:
             frame: Video frame to record
             timestamp: UNIX timestamp of the frame
+            metadata: Camera settings in effect for the frame; stored in the
+                sidecar whenever they differ from the previous frame's.
+                Defaults to the settings in ``info``
+            info: Frame descriptor from ``Camera.get_frame_with_info()``;
+                passed on to the outputs and analysis callbacks
+
+        Returns:
+            bool: False if the primary output dropped the frame
         """
-        if not self.writer:
+        if not self.outputs:
             raise RuntimeError("Recording not started")
 
+        sequence = self.capture_count
+        self.capture_count += 1
+        lost = 0
+        if info is not None:
+            if metadata is None:
+                metadata = info.settings
+            if info.gap:
+                lost = info.gap
+                self.source_lost += lost
+                self.source_gaps.append(
+                    {"frame_id": info.frame_id, "timestamp": timestamp, "lost": lost}
+                )
+                print(
+                    f"{lost} frames lost at the source before frame ID {info.frame_id}"
+                )
+        if self.metrics is not None:
+            self.metrics.observe_frame(timestamp, lost)
+        if isinstance(frame, JpegFrame) and (
+            self.corrector.enabled or self.integrator.enabled
+        ):
+            # Correction and integration need pixels
+            frame = frame.decode()
+        if self.correction_worker is not None:
+            queued = self.correction_worker.submit(
+                frame, timestamp, metadata, info, sequence
+            )
+        else:
+            if self.corrector.enabled:
+                frame = self.corrector.apply(frame, metadata)
+            queued = self._record(frame, timestamp, metadata, info, sequence)
+
         # Update FPS calculation
         self.fps_frame_count += 1
-        elapsed_time = time.time() - self.fps_start_time
+        now = time.time()
+        elapsed_time = now - self.fps_start_time
 
         if elapsed_time >= self.fps_update_interval:
             self.current_fps = self.fps_frame_count / elapsed_time
             self.fps_frame_count = 0
-            self.fps_start_time = time.time()
+            self.fps_start_time = now
+
+        if self.preview and now - self.last_preview_time >= self.preview_interval:
+            self.last_preview_time = now
+            self._show_preview(frame)
+
+        if self.correction_worker is None and self.corrector.enabled:
+            # The outputs hold the corrected frame as long as they need it
+            self.corrector.ring.release(frame)
+        return queued
+
+    def _record(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        metadata: Optional[Dict],
+        info: Optional[FrameInfo] = None,
+        sequence: Optional[int] = None,
+    ) -> bool:
+        """Index a (corrected) frame and queue it for every output.
 
-        # Add FPS text to the frame
-        frame_with_fps = frame.copy()
+        Runs on the correction worker thread when correction is threaded.
+        ``sequence`` numbers the frames passed to :meth:`record_frame`, so
+        frames the correction worker dropped show up as a jump.
+
+        Returns:
+            bool: False if the primary output dropped the frame
+        """
+        frame_id = info.frame_id if info is not None else None
+        if self.integrator.enabled:
+            # Groups merge consecutive captures only: a capture lost before
+            # this point (correction drop or source gap) discards the
+            # partial group
+            contiguous = sequence is None or sequence == self.last_sequence + 1
+            if info is not None and info.gap:
+                contiguous = False
+            self.last_sequence = sequence if sequence is not None else -1
+            if not contiguous and self.integrator.count:
+                self.integration_discarded += self.integrator.count
+                self.integrator.reset()
+            if self.integrator.count == 0:
+                self.group_start = len(self.source_timestamps)
+                leased = self.corrector.ring.leased(frame)
+                if leased and self.integrator.mode == "decimate":
+                    # Kept until the group completes, beyond the caller's hold
+                    frame = frame.copy()
+            self.source_timestamps.append(timestamp)
+            self.source_frame_ids.append(frame_id)
+            merged = self.integrator.add(frame, timestamp)
+            if merged is None:
+                return True
+            frame, timestamp = merged
+            self.group_starts.append(self.group_start)
+
+        index = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        self.frame_ids.append(frame_id)
+        if metadata is not None and metadata is not self.last_metadata:
+            if metadata != self.last_metadata:
+                self.settings.append({"frame": index, **metadata})
+            self.last_metadata = metadata
+            pattern = metadata.get("PixelColorFilter")
+            self.bayer_pattern = pattern if is_bayer(pattern) else None
+            for output in self.outputs:
+                output.bayer_pattern = self.bayer_pattern
+        if self.governor is not None:
+            self._govern(index)
+            if not self.governor.keep_frame(index):
+                # Planned, evenly spaced drop under sustained overload
+                self.decimated += 1
+                for output in self.outputs:
+                    output.dropped.append(index)
+                return False
+
+        queued = self.outputs[0].submit(index, timestamp, frame, info)
+        for output in self.outputs[1:]:
+            output.submit(index, timestamp, frame, info)
+        return queued
+
+    def _govern(self, index: int) -> None:
+        """Let the load governor sample load and apply level changes.
+
+        Only file outputs count towards the load: analysis callbacks have
+        small queues that drop frames by design and are never paused.
+        Stepping back down restores the preview rate and the proxy outputs;
+        a segment switched to a faster preset stays on it.
+        """
+        if not self.governor.due():
+            return
+        files = [output for output in self.outputs if output.callback is None]
+        event = self.governor.update(
+            index,
+            max(output.queue_fill for output in files),
+            sum(output.bytes_on_disk() for output in files),
+        )
+        if event is None:
+            return
+        self.events.append(event)
+        print(
+            f"Load level {event['from']} -> {event['to']} at frame {index} "
+            f"({', '.join(event['reasons'])})"
+        )
+
+        level = event["level"]
+        if level >= 1:
+            self.preview_interval = 1.0 / self.governor.reduced_preview_fps
+        else:
+            self.preview_interval = self.base_preview_interval
+        for output in files[1:]:
+            output.paused = level >= 2
+        if event["from"] == "proxies_stopped" and event["to"] == "fast_preset":
+            self.outputs[0].request_faster_preset()
+
+    def _show_preview(self, frame: np.ndarray) -> None:
+        """Show the frame with an FPS overlay in a preview window.
+
+        Raw Bayer frames are shown at half size using the tiled demosaic,
+        compressed frames are decoded at half size.
+        """
+        if isinstance(frame, JpegFrame):
+            # Only previewed frames are decoded, at half size
+            frame_with_fps = frame.decode(0.5)
+        elif self.bayer_pattern and frame.ndim == 2:
+            frame_with_fps = demosaic_tiled(frame, self.bayer_pattern)
+        else:
+            frame_with_fps = frame.copy()
         fps_text = f"FPS: {self.current_fps:.1f}"
         cv2.putText(
             frame_with_fps,
@@ -96,20 +821,128 @@ class VideoRecorder:
         cv2.imshow("Camera Preview", frame_with_fps)
         cv2.waitKey(1)  # Update the window, wait 1ms
 
-        # Record the original frame (without FPS overlay)
-        self.writer.write(frame)
-        self.timestamps.append(timestamp)
+    def stop_recording(self) -> Optional[Dict]:
+        """Stop the current recording session.
 
-    def stop_recording(self) -> None:
-        """Stop the current recording session."""
-        if self.writer:
-            self.writer.release()
-            self.writer = None
+        Waits for queued frames to be written, then saves the timestamp
+        sidecar with the indices of dropped frames and a session summary.
+
+        Returns:
+            Session summary, or None if no recording was running
+        """
+        if not self.outputs:
+            return None
+
+        capture_end = time.time()
+        correction_dropped = []
+        if self.correction_worker is not None:
+            self.correction_worker.stop()
+            correction_dropped = self.correction_worker.dropped
+            self.correction_worker = None
+        for output in self.outputs:
+            output.close()
+        if self.metrics is not None:
+            self.metrics.end_session(self.outputs)
+        self.summary = self._build_summary(
+            capture_end - self.start_time, time.time() - capture_end
+        )
+        if self.corrector.enabled:
+            self.summary["correction_dropped"] = len(correction_dropped)
 
-        if self.timestamp_file:
-            json.dump({"timestamps": self.timestamps}, self.timestamp_file, indent=2)
-            self.timestamp_file.close()
-            self.timestamp_file = None
+        primary = self.outputs[0]
+        with open(self.timestamp_path, "w") as f:
+            json.dump(
+                {
+                    "timestamps": self.timestamps,
+                    "dropped": primary.dropped,
+                    "frame_ids": (
+                        self.frame_ids
+                        if any(i is not None for i in self.frame_ids)
+                        else None
+                    ),
+                    "source_gaps": self.source_gaps,
+                    "settings": self.settings,
+                    "outputs": {
+                        output.name: {
+                            "path": (
+                                os.path.basename(output.path) if output.path else None
+                            ),
+                            "dropped": output.dropped,
+                            "bayer_pattern": (
+                                output.bayer_pattern if output.stores_raw else None
+                            ),
+                            "is_color": output.is_color,
+                            "segments": [
+                                {"path": seg["path"], "start": seg["start"]}
+                                for seg in output.segments
+                            ],
+                        }
+                        for output in self.outputs
+                    },
+                    "integration": (
+                        {
+                            "mode": self.integrator.mode,
+                            "frames": self.integrator.frames,
+                            "source_timestamps": self.source_timestamps,
+                            "source_frame_ids": self.source_frame_ids,
+                            "group_starts": self.group_starts,
+                            "discarded": self.integration_discarded,
+                        }
+                        if self.integrator.enabled
+                        else None
+                    ),
+                    "correction": (
+                        dict(
+                            self.corrector.describe(),
+                            dropped_timestamps=correction_dropped,
+                        )
+                        if self.corrector.enabled
+                        else None
+                    ),
+                    "events": self.events,
+                    "summary": self.summary,
+                },
+                f,
+                indent=2,
+            )
+        self.outputs = []
 
         # Close the preview window
-        cv2.destroyAllWindows()
+        if self.preview:
+            cv2.destroyAllWindows()
+
+        return self.summary
+
+    def _build_summary(self, duration: float, drain: float) -> Dict:
+        """Collect throughput and write latency statistics for the session.
+
+        The top-level write statistics describe the primary output; every
+        output is listed under ``outputs``.
+
+        Args:
+            duration: Seconds between start and stop of the capture
+            drain: Seconds spent writing queued frames after stopping
+        """
+        frames = len(self.timestamps)
+        outputs = {
+            output.name: output.summary(duration + drain) for output in self.outputs
+        }
+        primary = dict(outputs[self.outputs[0].name])
+        primary["video_path"] = primary.pop("path")
+        summary = {
+            "duration_s": duration,
+            "drain_s": drain,
+            "frames_captured": frames,
+            "capture_fps": frames / duration if duration > 0 else 0.0,
+        }
+        summary["frames_lost_at_source"] = self.source_lost
+        if self.integrator.enabled:
+            summary["source_frames"] = len(self.source_timestamps)
+            summary["integration_discarded"] = self.integration_discarded
+        if self.governor is not None:
+            summary["frames_decimated"] = self.decimated
+            summary["load_transitions"] = len(self.events)
+            summary["final_load_level"] = self.governor.state
+        summary.update(primary)
+        summary["outputs"] = outputs
+        return summary
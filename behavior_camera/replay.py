@@ -0,0 +1,176 @@
+import numpy as np
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from .reader import RecordingReader
+
+
+class ReplayCamera:
+    """Camera backend that plays back a recording as if it were live.
+
+    Frames are decoded ahead of time on a background thread. In real-time
+    mode ``get_frame`` waits until each frame's original offset from the
+    start of the recording has elapsed, so inter-frame intervals and gaps
+    from dropped frames are reproduced; otherwise frames are delivered as
+    fast as they can be decoded.
+    """
+
+    def __init__(self, config: Dict):
+        """Initialize replay backend.
+
+        Args:
+            config: ``camera.replay`` configuration with ``path`` and the
+                optional ``realtime`` (default True), ``speed``, ``loop``,
+                ``prefetch`` and ``timestamps`` (``original`` or ``wall``)
+        """
+        self.path = config["path"]
+        self.realtime = bool(config.get("realtime", True))
+        self.speed = float(config.get("speed", 1.0))
+        self.loop = bool(config.get("loop", False))
+        self.prefetch = int(config.get("prefetch", 32))
+        self.wall_timestamps = config.get("timestamps", "original") == "wall"
+
+        self.reader = None
+        self.queue = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.is_initialized = False
+        self.frame_metadata = {}
+        self.settings = []
+        self.settings_cursor = 0
+        self.settings_frame = -1
+        self.start_wall = None
+        self.start_timestamp = None
+        self.frames_delivered = 0
+        self.late_frames = 0
+        self.finished = False
+        self.mono = False  # deliver 2-D frames like a mono camera
+
+    def initialize(self) -> bool:
+        """Open the recording and start the prefetch thread.
+
+        Returns:
+            bool: True if the recording could be opened
+        """
+        try:
+            self.reader = RecordingReader(self.path, cache_size=0)
+        except Exception as e:
+            print(f"Failed to open replay recording {self.path}: {e}")
+            return False
+        if len(self.reader) == 0:
+            print(f"Replay recording {self.path} contains no frames")
+            return False
+
+        self.settings = self.reader.metadata.get("settings", [])
+        is_color = self.reader.is_color
+        if is_color is None:
+            # Sidecars written before outputs recorded their color mode
+            first = self.reader.read(0)
+            is_color = not (
+                (first[..., 0] == first[..., 1]).all()
+                and (first[..., 0] == first[..., 2]).all()
+            )
+        self.mono = not is_color
+        self.queue = queue.Queue(maxsize=self.prefetch)
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self._prefetch, name="replay-prefetch", daemon=True
+        )
+        self.thread.start()
+        self.is_initialized = True
+        print(
+            f"Replaying {len(self.reader)} frames from {self.reader.video_path} "
+            f"({'real time' if self.realtime else 'as fast as possible'})"
+        )
+        return True
+
+    def _prefetch(self) -> None:
+        """Decode frames in order and queue them (background thread)."""
+        while not self.stop_event.is_set():
+            for index in range(len(self.reader)):
+                if self.stop_event.is_set():
+                    return
+                try:
+                    frame = self.reader.read(index)
+                except Exception as e:
+                    print(f"Replay decode error at frame {index}: {e}")
+                    break
+                if self.mono:
+                    frame = np.ascontiguousarray(frame[..., 0])
+                item = (index, float(self.reader.timestamps[index]), frame)
+                while not self.stop_event.is_set():
+                    try:
+                        self.queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+            if not self.loop:
+                break
+        self.queue.put(None)
+
+    def get_frame(self) -> Tuple[Optional[float], Optional[np.ndarray]]:
+        """Get the next frame, paced like the original recording.
+
+        Returns:
+            Tuple of (timestamp, frame); (None, None) at the end
+        """
+        if not self.is_initialized:
+            return None, None
+        item = self.queue.get()
+        if item is None:
+            # Keep reporting the end of the recording
+            self.finished = True
+            self.queue.put(None)
+            return None, None
+        index, timestamp, frame = item
+
+        if index == 0 or self.start_wall is None:
+            # Restart the timeline at the beginning of each pass
+            self.start_wall = time.monotonic()
+            self.start_timestamp = timestamp
+        if self.realtime:
+            due = self.start_wall + (timestamp - self.start_timestamp) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.001:
+                self.late_frames += 1
+
+        self._update_metadata(int(self.reader.capture_indices[index]))
+        self.frames_delivered += 1
+        if self.wall_timestamps:
+            timestamp = time.time()
+        return timestamp, frame
+
+    def _update_metadata(self, capture_index: int) -> None:
+        """Track the recorded camera settings in effect for a frame."""
+        if capture_index < self.settings_frame:
+            # Looped back to the start of the recording
+            self.settings_cursor = 0
+            self.frame_metadata = {}
+        self.settings_frame = capture_index
+        while (
+            self.settings_cursor < len(self.settings)
+            and self.settings[self.settings_cursor]["frame"] <= capture_index
+        ):
+            entry = self.settings[self.settings_cursor]
+            self.frame_metadata = {k: v for k, v in entry.items() if k != "frame"}
+            self.settings_cursor += 1
+
+    def release(self) -> None:
+        """Stop playback and close the recording."""
+        self.stop_event.set()
+        if self.thread is not None:
+            # Unblock the prefetch thread if it is waiting on a full queue
+            while self.thread.is_alive():
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.thread.join(timeout=0.1)
+            self.thread = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.is_initialized = False
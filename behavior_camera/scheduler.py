@@ -0,0 +1,122 @@
+import numpy as np
+import time
+from typing import Dict, Optional
+
+# Acquisition modes selectable through ``camera.acquisition.mode``
+ACQUISITION_MODES = ("free", "paced", "software", "external")
+
+
+class FrameScheduler:
+    """Absolute-deadline frame timeline.
+
+    Deadline ``k`` is ``start + k / framerate`` on the monotonic
+    ``perf_counter`` clock, so timing errors never accumulate. :meth:`wait`
+    sleeps until shortly before the deadline and spin-waits the rest, which
+    keeps wake-up jitter well below the OS sleep granularity. The spin
+    yields the GIL on every iteration (``spin_yield``) so writer, callback
+    and grab threads keep running during it. Deadlines that
+    have already passed by more than ``miss_tolerance`` periods are counted
+    as missed and skipped, keeping later frames on the original grid.
+    """
+
+    DEFAULTS = {
+        "spin_threshold": 0.002,  # seconds before a deadline to start spinning
+        "spin_yield": True,  # release the GIL while spinning
+        "miss_tolerance": 0.5,  # periods late before a deadline counts as missed
+        "history": 10000,  # wake-up lateness samples kept for statistics
+    }
+
+    def __init__(self, framerate: float, config: Optional[Dict] = None):
+        """Initialize scheduler.
+
+        Args:
+            framerate: Target frames per second
+            config: ``camera.acquisition`` configuration
+        """
+        if framerate <= 0:
+            raise ValueError(f"Frame rate must be positive, got {framerate}")
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.period = 1.0 / float(framerate)
+        self.spin_threshold = max(0.0, float(settings["spin_threshold"]))
+        self.spin_yield = bool(settings["spin_yield"])
+        self.miss_tolerance = float(settings["miss_tolerance"]) * self.period
+        self.lateness = np.zeros(max(1, int(settings["history"])), dtype=np.float64)
+
+        self.start_time = None
+        self.wall_offset = 0.0
+        self.index = 0
+        self.frames = 0
+        self.missed = 0
+        self.missed_indices = []
+
+    def start(self, delay: float = 0.0) -> None:
+        """Start the timeline; the first deadline is ``delay`` seconds away."""
+        self.start_time = time.perf_counter() + delay
+        # Maps perf_counter deadlines to wall-clock time for reporting
+        self.wall_offset = time.time() - time.perf_counter()
+        self.index = 0
+        self.frames = 0
+        self.missed = 0
+        self.missed_indices = []
+
+    def deadline(self, index: int) -> float:
+        """Return the perf_counter time of a deadline."""
+        return self.start_time + index * self.period
+
+    def wait(self) -> float:
+        """Block until the next deadline.
+
+        Returns:
+            Scheduled wall-clock time of the frame
+        """
+        if self.start_time is None:
+            self.start()
+
+        now = time.perf_counter()
+        late = now - self.deadline(self.index)
+        if late > self.miss_tolerance:
+            # Skip every deadline we can no longer meet
+            skipped = int(late // self.period) + (late % self.period > 0)
+            self.missed += skipped
+            self.missed_indices.append(self.index)
+            self.index += skipped
+
+        deadline = self.deadline(self.index)
+        remaining = deadline - now
+        if remaining > self.spin_threshold:
+            time.sleep(remaining - self.spin_threshold)
+        if self.spin_yield:
+            while time.perf_counter() < deadline:
+                time.sleep(0)
+        else:
+            while time.perf_counter() < deadline:
+                pass
+
+        self.lateness[self.frames % len(self.lateness)] = time.perf_counter() - deadline
+        self.frames += 1
+        self.index += 1
+        return deadline + self.wall_offset
+
+    def stats(self) -> Dict:
+        """Summarize deadline adherence.
+
+        Returns:
+            Dictionary with frame and missed-deadline counts and wake-up
+            lateness percentiles in milliseconds
+        """
+        samples = self.lateness[: min(self.frames, len(self.lateness))] * 1000.0
+        stats = {
+            "frames": self.frames,
+            "missed_deadlines": self.missed,
+            "period_ms": self.period * 1000.0,
+        }
+        if len(samples):
+            stats.update(
+                {
+                    "lateness_mean_ms": float(samples.mean()),
+                    "lateness_p99_ms": float(np.percentile(samples, 99)),
+                    "lateness_max_ms": float(samples.max()),
+                }
+            )
+        return stats
@@ -0,0 +1,219 @@
+import gxipy as gx
+import numpy as np
+import queue
+import time
+from typing import Callable, Dict, Optional, Tuple
+from .frame_info import FrameIdTracker, FrameInfo
+
+# Modes selectable through ``camera.stream.mode``
+STREAM_MODES = ("poll", "callback")
+
+# Data stream features for the USB transfer, by configuration key
+TRANSFER_FEATURES = {
+    "transfer_size": "StreamTransferSize",
+    "transfer_urbs": "StreamTransferNumberUrb",
+}
+
+
+class GalaxyStream:
+    """Frame delivery from a Galaxy SDK data stream.
+
+    ``poll`` calls ``get_image()`` from the consumer's thread, as before.
+    ``callback`` registers a capture callback, so the SDK pushes every image
+    from its own thread as soon as it is complete; the callback converts it
+    and queues it for the consumer, and a slow consumer only loses frames
+    once ``queue_size`` frames are waiting.
+
+    In both modes the SDK acquisition buffer count and USB transfer size are
+    set before streaming starts. Device frame IDs are checked for gaps as
+    images arrive, which counts the images the driver discarded for lack of
+    buffers, and again as frames are handed to the consumer: the ``gap`` of
+    every delivered :class:`FrameInfo` holds all frames lost since the
+    previous delivered one, whether in the driver, as incomplete images or
+    to a full queue.
+    """
+
+    DEFAULTS = {
+        "mode": "poll",
+        "buffers": 8,  # SDK acquisition buffers
+        "transfer_size": None,  # USB transfer block size in bytes
+        "transfer_urbs": None,  # USB transfer requests in flight
+        "queue_size": 64,  # callback mode: frames waiting for the consumer
+        "history": 10000,  # latency samples kept for statistics
+    }
+
+    def __init__(
+        self,
+        data_stream,
+        convert: Callable[[object], Tuple[float, Optional[np.ndarray], FrameInfo]],
+        config: Optional[Dict] = None,
+    ):
+        """Initialize stream.
+
+        Args:
+            data_stream: Galaxy SDK data stream (``cam.data_stream[0]``)
+            convert: Function turning a raw image into (timestamp, frame,
+                descriptor)
+            config: ``camera.stream`` configuration
+        """
+        settings = dict(self.DEFAULTS)
+        settings.update(config or {})
+        self.mode = settings["mode"]
+        if self.mode not in STREAM_MODES:
+            raise ValueError(
+                f"Unknown stream mode '{self.mode}', expected one of: "
+                f"{', '.join(STREAM_MODES)}"
+            )
+        self.settings = settings
+        self.data_stream = data_stream
+        self.convert = convert
+        self.frames = queue.Queue(maxsize=max(1, int(settings["queue_size"])))
+        self.registered = False
+
+        self.latency = np.zeros(max(1, int(settings["history"])), dtype=np.float64)
+        self.frame_ids = FrameIdTracker()  # as images arrive
+        self.delivered_ids = FrameIdTracker()  # as frames reach the consumer
+        self.received = 0
+        self.consumed = 0
+        self.incomplete = 0
+        self.queue_dropped = 0
+
+    def configure(self) -> None:
+        """Set buffer count and transfer parameters; call before stream_on."""
+        buffers = self.settings["buffers"]
+        if buffers:
+            try:
+                self.data_stream.set_acquisition_buffer_number(int(buffers))
+            except Exception as e:
+                print(f"Failed to set acquisition buffer number: {e}")
+        for key, feature_name in TRANSFER_FEATURES.items():
+            value = self.settings[key]
+            feature = getattr(self.data_stream, feature_name, None)
+            if value is None or feature is None:
+                continue
+            try:
+                feature.set(int(value))
+            except Exception as e:
+                print(f"Failed to set {feature_name}: {e}")
+
+    def start(self) -> None:
+        """Prepare streaming; registers the callback in callback mode."""
+        self.configure()
+        # IDs restart with the stream
+        self.frame_ids.reset()
+        self.delivered_ids.reset()
+        if self.mode == "callback" and not self.registered:
+            self.data_stream.register_capture_callback(self._on_image)
+            self.registered = True
+
+    def stop(self) -> None:
+        """Unregister the callback; call after stream_off."""
+        if self.registered:
+            self.data_stream.unregister_capture_callback()
+            self.registered = False
+
+    @property
+    def driver_dropped(self) -> int:
+        """Frames lost in the driver (frame ID gaps)."""
+        return self.frame_ids.lost
+
+    def _check(self, info: FrameInfo) -> bool:
+        """Count an image and check its frame ID for a driver gap.
+
+        Returns:
+            bool: True if the image is complete
+        """
+        self.received += 1
+        self.frame_ids.observe(info.frame_id)
+        if info.status != gx.GxFrameStatusList.SUCCESS:
+            self.incomplete += 1
+            return False
+        return True
+
+    def _on_image(self, raw_image) -> None:
+        """Capture callback, run on the SDK's thread.
+
+        The SDK requeues the image buffer once this returns, so the frame
+        is converted (copied) here.
+        """
+        arrived = time.perf_counter()
+        try:
+            timestamp, frame, info = self.convert(raw_image)
+            if not self._check(info):
+                return
+        except Exception as e:
+            # Exceptions must not propagate into the SDK
+            print(f"Error in capture callback: {e}")
+            return
+        if frame is None:
+            return
+        try:
+            self.frames.put_nowait((arrived, timestamp, frame, info))
+        except queue.Full:
+            self.queue_dropped += 1
+
+    def read(
+        self, timeout: float = 1.0
+    ) -> Tuple[Optional[float], Optional[np.ndarray], Optional[FrameInfo]]:
+        """Get the next frame for the consumer.
+
+        Args:
+            timeout: Seconds to wait for a frame
+
+        Returns:
+            Tuple of (timestamp, frame, descriptor); all None on timeout or
+            for an incomplete image
+        """
+        if self.mode == "callback":
+            try:
+                arrived, timestamp, frame, info = self.frames.get(timeout=timeout)
+            except queue.Empty:
+                return None, None, None
+        else:
+            raw_image = self.data_stream.get_image(timeout=int(timeout * 1000))
+            if raw_image is None:
+                return None, None, None
+            arrived = time.perf_counter()
+            try:
+                timestamp, frame, info = self.convert(raw_image)
+            finally:
+                raw_image.release()
+            if not self._check(info) or frame is None:
+                return None, None, None
+
+        # Measured against the last delivered frame, so the gap includes
+        # frames lost after arrival (incomplete or to a full queue)
+        info.gap = self.delivered_ids.observe(info.frame_id)
+        self.latency[self.consumed % len(self.latency)] = time.perf_counter() - arrived
+        self.consumed += 1
+        return timestamp, frame, info
+
+    def stats(self) -> Dict:
+        """Summarize delivered and lost frames.
+
+        Returns:
+            Dictionary with frame counts by cause of loss and the
+            image-to-consumer latency percentiles in milliseconds
+        """
+        samples = self.latency[: min(self.consumed, len(self.latency))] * 1000.0
+        dropped = self.driver_dropped + self.incomplete + self.queue_dropped
+        stats = {
+            "mode": self.mode,
+            "frames_grabbed": self.received + self.driver_dropped,
+            "frames_consumed": self.consumed,
+            "frames_dropped": dropped,
+            "driver_dropped": self.driver_dropped,
+            "driver_gaps": self.frame_ids.gaps,
+            "incomplete": self.incomplete,
+            "queue_dropped": self.queue_dropped,
+            "queue_depth": self.frames.qsize(),
+        }
+        if len(samples):
+            stats.update(
+                {
+                    "latency_mean_ms": float(samples.mean()),
+                    "latency_p50_ms": float(np.percentile(samples, 50)),
+                    "latency_p99_ms": float(np.percentile(samples, 99)),
+                }
+            )
+        return stats
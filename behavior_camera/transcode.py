@@ -0,0 +1,475 @@
+import cv2
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Optional
+from .bayer import demosaic as demosaic_frame
+from .delta import open_video
+from .writers import FILE_FORMATS, create_writer, get_format_spec
+
+JOURNAL_NAME = "transcode_journal.jsonl"
+SIDECAR_SUFFIX = "_timestamps.json"
+
+# Limits concurrent source reads in worker processes, set by _init_worker
+_io_semaphore = None
+
+
+def find_jobs(sources: List[str], dest: str, recording_config: Dict) -> List[Dict]:
+    """Scan directories for recording sessions and plan transcode jobs.
+
+    Every video referenced by a ``*_timestamps.json`` sidecar (all outputs
+    and segments) becomes one job. The directory layout below each source
+    is mirrored under ``dest``.
+
+    Args:
+        sources: Directories to scan recursively
+        dest: Directory receiving the transcoded files and sidecars
+        recording_config: ``recording`` configuration for the target format
+
+    Returns:
+        Jobs with ``source``, ``output``, ``sidecar`` and ``sidecar_output``
+        paths, the ``bayer_pattern`` of raw outputs and the ``is_color`` and
+        ``expected_frames`` listed in the sidecar, largest source first
+    """
+    extension = get_format_spec(recording_config)["extension"]
+    if not extension:
+        raise ValueError("Transcoding to image sequences is not supported")
+    dest = os.path.abspath(dest)
+
+    jobs = []
+    for root in sources:
+        root = os.path.abspath(root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Don't descend into the destination if it lives below a source
+            dirnames[:] = sorted(
+                d for d in dirnames if os.path.join(dirpath, d) != dest
+            )
+            out_dir = os.path.normpath(
+                os.path.join(dest, os.path.relpath(dirpath, root))
+            )
+            for name in sorted(filenames):
+                if not name.endswith(SIDECAR_SUFFIX):
+                    continue
+                sidecar = os.path.join(dirpath, name)
+                for video in _session_videos(sidecar):
+                    stem = os.path.splitext(os.path.basename(video["path"]))[0]
+                    output = os.path.join(out_dir, stem + extension)
+                    if os.path.abspath(video["path"]) == output:
+                        raise ValueError(f"Transcode would overwrite {video['path']}")
+                    jobs.append(
+                        {
+                            "source": video["path"],
+                            "output": output,
+                            "sidecar": sidecar,
+                            "sidecar_output": os.path.join(out_dir, name),
+                            "bayer_pattern": video["bayer_pattern"],
+                            "is_color": video["is_color"],
+                            "expected_frames": video["expected_frames"],
+                        }
+                    )
+
+    # Start the longest jobs first so the pool finishes evenly
+    jobs.sort(key=lambda job: os.path.getsize(job["source"]), reverse=True)
+    return jobs
+
+
+def _session_videos(sidecar: str) -> List[Dict]:
+    """List the existing video files referenced by a sidecar.
+
+    Returns:
+        Dictionaries with the video ``path``, the ``bayer_pattern`` if stored
+        raw, ``is_color`` and the ``expected_frames`` the sidecar has
+        timestamps for in that file; the last two are None if unknown
+    """
+    directory = os.path.dirname(sidecar)
+    try:
+        with open(sidecar, "r") as f:
+            metadata = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Skipping unreadable sidecar {sidecar}: {e}")
+        return []
+
+    timestamps = metadata.get("timestamps")
+    total = len(timestamps) if isinstance(timestamps, list) else None
+
+    names = []
+    for output in (metadata.get("outputs") or {}).values():
+        segments = output.get("segments") or [{"path": output.get("path")}]
+        dropped = output.get("dropped") or []
+        for number, segment in enumerate(segments):
+            if not segment["path"]:
+                continue
+            expected = None
+            if total is not None:
+                # Frames indexed [start, end) minus those this output dropped
+                start = segment.get("start", 0)
+                end = total
+                if number + 1 < len(segments):
+                    end = segments[number + 1].get("start", total)
+                expected = end - start - sum(start <= i < end for i in dropped)
+            names.append(
+                (
+                    segment["path"],
+                    output.get("bayer_pattern"),
+                    output.get("is_color"),
+                    expected,
+                )
+            )
+    if not names:
+        # Sessions recorded before multiple outputs existed
+        base = sidecar[: -len(SIDECAR_SUFFIX)]
+        extensions = sorted({spec["extension"] for spec in FILE_FORMATS.values()})
+        expected = None
+        if total is not None:
+            expected = total - len(metadata.get("dropped") or [])
+        names = [
+            (os.path.basename(base) + ext, None, None, expected)
+            for ext in extensions
+            if ext
+        ]
+
+    # Image sequence outputs are directories and are left alone
+    videos = [
+        {
+            "path": os.path.join(directory, name),
+            "bayer_pattern": pattern,
+            "is_color": is_color,
+            "expected_frames": expected,
+        }
+        for name, pattern, is_color, expected in names
+    ]
+    return [video for video in videos if os.path.isfile(video["path"])]
+
+
+class TranscodeJournal:
+    """Append-only record of finished jobs, used to resume a batch.
+
+    One JSON object is written per line and flushed to disk as soon as a job
+    finishes, so an interrupted batch loses at most the jobs in flight. A
+    job counts as done if its source is unchanged (size and modification
+    time) and its output still exists.
+    """
+
+    def __init__(self, path: str):
+        """Load an existing journal.
+
+        Args:
+            path: Journal file path
+        """
+        self.path = path
+        self.done: Dict[str, Dict] = {}
+        # An interruption can leave the last line without its newline
+        self.needs_newline = False
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    self.needs_newline = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut short by an interruption
+                    if entry.get("status") == "done":
+                        self.done[entry["source"]] = entry
+
+    def is_done(self, job: Dict) -> bool:
+        """Return True if a job finished in an earlier run."""
+        entry = self.done.get(os.path.abspath(job["source"]))
+        if entry is None or not os.path.exists(job["output"]):
+            return False
+        stat = os.stat(job["source"])
+        return (
+            entry["source_bytes"] == stat.st_size
+            and entry["source_mtime"] == stat.st_mtime
+        )
+
+    def record(self, entry: Dict) -> None:
+        """Append an entry and flush it to disk."""
+        with open(self.path, "a") as f:
+            if self.needs_newline:
+                f.write("\n")
+                self.needs_newline = False
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if entry.get("status") == "done":
+            self.done[entry["source"]] = entry
+
+
+def _init_worker(io_semaphore, threads: int) -> None:
+    """Set up a worker process."""
+    global _io_semaphore
+    _io_semaphore = io_semaphore
+    cv2.setNumThreads(threads)
+
+
+def _read_chunks(cap, chunk_size: int, decode: bool = True) -> Iterator[List]:
+    """Read frames in chunks, holding the I/O slot only while reading."""
+    while True:
+        chunk = []
+        with _io_semaphore or nullcontext():
+            for _ in range(chunk_size):
+                if decode:
+                    ret, frame = cap.read()
+                else:
+                    ret, frame = cap.grab(), None
+                if not ret:
+                    break
+                chunk.append(frame)
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+
+
+def count_frames(path: str, chunk_size: int = 64) -> int:
+    """Count the frames of a video by demuxing it completely.
+
+    Container frame counts are estimates for some formats, so every frame
+    is grabbed (without conversion) instead.
+    """
+    cap = open_video(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open {path}")
+    try:
+        return sum(len(chunk) for chunk in _read_chunks(cap, chunk_size, False))
+    finally:
+        cap.release()
+
+
+def transcode_file(
+    source: str,
+    output: str,
+    recording_config: Dict,
+    chunk_size: int = 64,
+    bayer_pattern: Optional[str] = None,
+    expected_frames: Optional[int] = None,
+    is_color: Optional[bool] = None,
+) -> Dict:
+    """Transcode one video and verify the frame count.
+
+    The output is written next to its destination as ``*.partial<ext>`` and
+    only renamed into place once the frame count of the new file matches
+    the number of frames decoded from the source, and that number matches
+    the timestamps recorded for the file.
+
+    Args:
+        source: Input video
+        output: Output video path
+        recording_config: ``recording`` configuration for the target format
+        chunk_size: Frames read per I/O slot
+        bayer_pattern: Demosaic raw Bayer frames with this pattern
+        expected_frames: Frame count listed in the sidecar, if known
+        is_color: Whether the source output was recorded in color, from the
+            sidecar; color is kept when unknown
+
+    Returns:
+        Job result with frame count, sizes and duration
+    """
+    start = time.monotonic()
+    base, extension = os.path.splitext(output)
+    partial = f"{base}.partial{extension}"
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    cap = open_video(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    # Decoders return BGR for mono sources too, so the mode comes from the
+    # recording; demosaiced raw frames are always color
+    color = bool(bayer_pattern) or is_color is not False
+    writer = None
+    frames = 0
+    try:
+        for chunk in _read_chunks(cap, chunk_size):
+            for frame in chunk:
+                if bayer_pattern:
+                    frame = demosaic_frame(frame, bayer_pattern)
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = create_writer(
+                        partial,
+                        fps,
+                        (width, height),
+                        recording_config,
+                        is_color=color,
+                    )
+                if not writer.is_color:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                writer.write(frame, frames)
+                frames += 1
+        if writer is not None:
+            writer.release()
+            writer = None
+
+        if frames == 0:
+            raise RuntimeError(f"No frames decoded from {source}")
+        if expected_frames is not None and frames != expected_frames:
+            raise RuntimeError(
+                f"Frame count mismatch for {source}: {frames} decoded, "
+                f"{expected_frames} timestamps in the sidecar"
+            )
+        written = count_frames(partial, chunk_size)
+        if written != frames:
+            raise RuntimeError(
+                f"Frame count mismatch for {output}: "
+                f"{frames} decoded, {written} in output"
+            )
+        os.replace(partial, output)
+    except BaseException:
+        if writer is not None:
+            writer.release()
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        cap.release()
+
+    return {
+        "frames": frames,
+        "output_bytes": os.path.getsize(output),
+        "seconds": round(time.monotonic() - start, 3),
+    }
+
+
+def copy_sidecar(sidecar: str, destination: str, demosaiced: bool = False) -> None:
+    """Copy a timestamp sidecar, replacing the target atomically.
+
+    The sidecar is copied unchanged unless the videos were demosaiced, in
+    which case the raw Bayer markers are removed from the copy.
+    """
+    if demosaiced:
+        with open(sidecar, "r") as f:
+            metadata = json.load(f)
+        for output in (metadata.get("outputs") or {}).values():
+            output["bayer_pattern"] = None
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        partial = destination + ".partial"
+        with open(partial, "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(partial, destination)
+        return
+    if os.path.exists(destination):
+        source_stat, dest_stat = os.stat(sidecar), os.stat(destination)
+        if (source_stat.st_size, source_stat.st_mtime) == (
+            dest_stat.st_size,
+            dest_stat.st_mtime,
+        ):
+            return
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    partial = destination + ".partial"
+    shutil.copy2(sidecar, partial)
+    os.replace(partial, destination)
+
+
+def run_transcode(
+    sources: List[str],
+    dest: str,
+    recording_config: Dict,
+    jobs: Optional[int] = None,
+    io_jobs: Optional[int] = None,
+    threads: int = 1,
+    chunk_size: int = 64,
+    demosaic: bool = False,
+    echo: Callable[[str], None] = print,
+) -> Dict:
+    """Transcode all sessions below ``sources`` on a process pool.
+
+    Args:
+        sources: Directories to scan recursively
+        dest: Directory receiving the transcoded sessions and the journal
+        recording_config: ``recording`` configuration for the target format;
+            ``encoder.threads`` is set to ``threads``
+        jobs: Worker processes (default: CPU count divided by ``threads``)
+        io_jobs: Workers allowed to read sources at the same time (default:
+            no limit beyond ``jobs``)
+        threads: Encoder and decoder threads per job
+        chunk_size: Frames read per I/O slot
+        demosaic: Convert outputs stored as raw Bayer to color
+        echo: Progress output function
+
+    Returns:
+        Batch summary
+    """
+    threads = max(1, int(threads))
+    jobs = jobs or max(1, (os.cpu_count() or 1) // threads)
+    recording_config = dict(recording_config)
+    recording_config["encoder"] = dict(recording_config.get("encoder") or {})
+    recording_config["encoder"]["threads"] = threads
+
+    os.makedirs(dest, exist_ok=True)
+    journal = TranscodeJournal(os.path.join(dest, JOURNAL_NAME))
+    planned = find_jobs(sources, dest, recording_config)
+    pending = [job for job in planned if not journal.is_done(job)]
+    for sidecar, destination in {
+        (job["sidecar"], job["sidecar_output"]) for job in planned
+    }:
+        copy_sidecar(sidecar, destination, demosaic)
+    echo(
+        f"{len(planned)} videos found, {len(planned) - len(pending)} already "
+        f"done; running {len(pending)} on {jobs} workers"
+    )
+
+    summary = {"done": 0, "failed": 0, "skipped": len(planned) - len(pending)}
+    summary.update({"frames": 0, "source_bytes": 0, "output_bytes": 0})
+    if not pending:
+        return summary
+
+    io_semaphore = multiprocessing.BoundedSemaphore(io_jobs) if io_jobs else None
+    executor = ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(io_semaphore, threads)
+    )
+    futures: Dict = {}
+    try:
+        futures = {
+            executor.submit(
+                transcode_file,
+                job["source"],
+                job["output"],
+                recording_config,
+                chunk_size,
+                job["bayer_pattern"] if demosaic else None,
+                job.get("expected_frames"),
+                job.get("is_color"),
+            ): job
+            for job in pending
+        }
+        for count, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            stat = os.stat(job["source"])
+            entry = {
+                "source": os.path.abspath(job["source"]),
+                "output": os.path.abspath(job["output"]),
+                "source_bytes": stat.st_size,
+                "source_mtime": stat.st_mtime,
+                "time": time.time(),
+            }
+            try:
+                entry.update(future.result(), status="done")
+            except Exception as e:
+                entry.update(status="failed", error=str(e))
+                summary["failed"] += 1
+                echo(f"[{count}/{len(pending)}] FAILED {job['source']}: {e}")
+            else:
+                summary["done"] += 1
+                summary["frames"] += entry["frames"]
+                summary["source_bytes"] += entry["source_bytes"]
+                summary["output_bytes"] += entry["output_bytes"]
+                echo(
+                    f"[{count}/{len(pending)}] {job['source']} -> {job['output']} "
+                    f"({entry['frames']} frames, "
+                    f"{entry['frames'] / max(entry['seconds'], 1e-6):.0f} fps, "
+                    f"{entry['output_bytes'] / max(entry['source_bytes'], 1) * 100:.0f}% "
+                    f"of original size)"
+                )
+            journal.record(entry)
+    finally:
+        # Drop queued jobs after an error or interruption; shutdown's
+        # cancel_futures argument needs Python 3.9
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+    return summary
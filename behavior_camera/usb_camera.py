@@ -1,5 +1,6 @@
 import gxipy as gx
 import cv2
+import time
 from PyQt5.QtWidgets import (
     QMainWindow,
     QWidget,
@@ -11,6 +12,18 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QImage, QPixmap
+from typing import Dict, Optional
+from .bayer import is_bayer
+from .features import FeatureControl
+from .frame_info import FrameInfo
+from .stream import GalaxyStream
+
+# Pixel format names by Galaxy pixel format value, for frame descriptors
+PIXEL_FORMAT_NAMES = {
+    value: name
+    for name, value in vars(gx.GxPixelFormatEntry).items()
+    if not name.startswith("_")
+}
 
 
 class USBCameraGUI(QMainWindow):
@@ -143,7 +156,15 @@ class USBCamera:
         """Initialize camera interface."""
         self.device_manager = None
         self.cam = None
+        self.features = None
+        self.frame_metadata = {}
+        self.frame_info = None  # Descriptor of the last frame returned
+        self.roi = None  # (offset_x, offset_y, width, height) in effect
         self.is_initialized = False
+        self.is_streaming = False
+        self.image_timeout = 1000  # milliseconds to wait for a (triggered) image
+        self.raw_bayer = False  # Return the Bayer mosaic instead of converting
+        self.stream = None  # Frame delivery from the data stream
         self.initialize()
 
     def initialize(self) -> bool:
@@ -161,17 +182,17 @@ class USBCamera:
             # Open first available device
             self.cam = self.device_manager.open_device_by_sn(dev_info_list[0].get("sn"))
 
-            # Get remote device feature control
+            # Get remote device feature control and resolve feature handles
             self.remote_device = self.cam.get_remote_device_feature_control()
+            self.features = FeatureControl(self.remote_device)
+            self.stream = GalaxyStream(self.cam.data_stream[0], self._convert)
 
             # Set default parameters
-            if self.remote_device.is_implemented("ExposureTime"):
-                self.remote_device.get_float_feature("ExposureTime").set(
-                    10000
-                )  # 10ms default exposure
-
-            if self.remote_device.is_implemented("Gain"):
-                self.remote_device.get_float_feature("Gain").set(0)  # 0dB default gain
+            self.features.request(
+                ExposureTime=10000,  # 10ms default exposure
+                Gain=0,  # 0dB default gain
+            )
+            self.apply_settings()
 
             self.is_initialized = True
             print("Camera initialized successfully")
@@ -182,29 +203,143 @@ class USBCamera:
             self.is_initialized = False
             return False
 
+    def configure(self, config: Dict) -> None:
+        """Apply camera configuration as one batch.
+
+        Args:
+            config: Camera configuration (``exposure_time``, ``gain``,
+                ``resolution``, ``offset_x``, ``offset_y``, ``auto_exposure``,
+                ``auto_gain``, ``trigger_mode``, ``raw_bayer``, ``stream``)
+        """
+        self.raw_bayer = bool(config.get("raw_bayer", False))
+        if "stream" in config and self.is_initialized and not self.is_streaming:
+            self.stream = GalaxyStream(
+                self.cam.data_stream[0], self._convert, config["stream"]
+            )
+            if self.stream.mode != "poll":
+                print(f"Stream mode: {self.stream.mode}")
+        settings = {}
+        if "auto_exposure" in config:
+            settings["ExposureAuto"] = (
+                "Continuous" if config["auto_exposure"] else "Off"
+            )
+        if "auto_gain" in config:
+            settings["GainAuto"] = "Continuous" if config["auto_gain"] else "Off"
+        if "exposure_time" in config:
+            settings["ExposureTime"] = config["exposure_time"]
+        if "gain" in config:
+            settings["Gain"] = config["gain"]
+        if "resolution" in config:
+            settings["Width"] = config["resolution"]["width"]
+            settings["Height"] = config["resolution"]["height"]
+        if "offset_x" in config:
+            settings["OffsetX"] = config["offset_x"]
+        if "offset_y" in config:
+            settings["OffsetY"] = config["offset_y"]
+        if "trigger_mode" in config:
+            settings["TriggerMode"] = config["trigger_mode"]
+        self.update_settings(**settings)
+
+    def update_settings(self, **settings) -> None:
+        """Request feature changes, applied together before the next frame.
+
+        Rapid successive requests are coalesced. While not streaming the
+        batch is applied immediately.
+
+        Args:
+            **settings: Galaxy feature names and values, e.g. ``Gain=3.0``
+        """
+        if not self.is_initialized:
+            return
+        self.features.request(**settings)
+        if not self.is_streaming:
+            self.apply_settings()
+
+    def apply_settings(self) -> Dict:
+        """Apply pending feature changes as one batch.
+
+        ROI changes require the stream to be off, so the stream is restarted
+        around such a batch.
+
+        Returns:
+            Dictionary of applied feature names and read-back values
+        """
+        restart = self.is_streaming and self.features.pending_roi()
+        if restart:
+            self.stop_capture()
+        applied = self.features.apply_pending()
+        if restart:
+            self.start_capture()
+        self.frame_metadata = self.features.snapshot()
+        values = self.frame_metadata
+        self.roi = (
+            values.get("OffsetX", 0),
+            values.get("OffsetY", 0),
+            values.get("Width"),
+            values.get("Height"),
+        )
+        return applied
+
     def set_exposure(self, exposure_time: float) -> None:
         """Set exposure time in microseconds."""
-        try:
-            if self.is_initialized and self.remote_device.is_implemented(
-                "ExposureTime"
-            ):
-                self.remote_device.get_float_feature("ExposureTime").set(exposure_time)
-        except Exception as e:
-            print(f"Error setting exposure: {str(e)}")
+        self.update_settings(ExposureTime=exposure_time)
 
     def set_gain(self, gain: float) -> None:
         """Set gain in dB."""
-        try:
-            if self.is_initialized and self.remote_device.is_implemented("Gain"):
-                self.remote_device.get_float_feature("Gain").set(gain)
-        except Exception as e:
-            print(f"Error setting gain: {str(e)}")
+        self.update_settings(Gain=gain)
+
+    def set_trigger(
+        self, mode: str, source: str = "Software", activation: Optional[str] = None
+    ) -> bool:
+        """Configure triggered acquisition.
+
+        Args:
+            mode: ``software``, ``external`` or ``off``
+            source: Trigger source for external triggers, e.g. ``Line0``
+            activation: Trigger edge for external triggers, e.g. ``RisingEdge``
+
+        Returns:
+            bool: True if the device accepted the trigger configuration
+        """
+        if not self.is_initialized or not self.features.is_available("TriggerMode"):
+            return False
+        if mode == "off":
+            self.update_settings(TriggerMode="Off")
+            return True
+        if mode == "software":
+            if not self.features.is_available("TriggerSoftware"):
+                return False
+            source = "Software"
+        settings = {"TriggerMode": "On", "TriggerSource": source}
+        if activation and mode == "external":
+            settings["TriggerActivation"] = activation
+        self.update_settings(**settings)
+        return (
+            self.features.get("TriggerMode") == "On"
+            and self.features.get("TriggerSource") == source
+        )
+
+    @property
+    def bayer_pattern(self) -> Optional[str]:
+        """Color filter arrangement of the sensor, or None for mono sensors."""
+        if self.features is None:
+            return None
+        pattern = self.features.get("PixelColorFilter")
+        return pattern if is_bayer(pattern) else None
+
+    def trigger(self) -> bool:
+        """Issue a software trigger."""
+        return self.features.execute("TriggerSoftware")
 
     def start_capture(self) -> bool:
         """Start image capture."""
         try:
             if self.is_initialized:
+                # Buffers, transfer size and the callback must be set up
+                # before streaming starts
+                self.stream.start()
                 self.cam.stream_on()
+                self.is_streaming = True
                 return True
         except Exception as e:
             print(f"Error starting capture: {str(e)}")
@@ -215,37 +350,86 @@ class USBCamera:
         try:
             if self.is_initialized:
                 self.cam.stream_off()
+                self.stream.stop()
+                self.is_streaming = False
         except Exception as e:
             print(f"Error stopping capture: {str(e)}")
 
     def get_frame(self):
-        """Get a frame from the camera."""
+        """Get a frame from the camera.
+
+        Pending setting changes are applied before the frame is grabbed; the
+        settings in effect are available as ``frame_metadata`` afterwards.
+        In callback mode the frame is the oldest one the SDK has delivered.
+        """
+        timestamp, frame, _ = self.get_frame_with_info()
+        return timestamp, frame
+
+    def get_frame_with_info(self):
+        """Get a frame from the camera together with its descriptor.
+
+        Returns:
+            Tuple of (timestamp, frame, FrameInfo); frame and descriptor are
+            None if no frame was captured
+        """
         try:
             if not self.is_initialized:
-                return None, None
-
-            # Get raw frame
-            raw_image = self.cam.data_stream[0].get_image()
-            if raw_image is None:
-                return None, None
-
-            timestamp = raw_image.get_timestamp()
+                return None, None, None
 
-            # Convert to numpy array
-            if raw_image.get_pixel_format() == gx.GxPixelFormatEntry.MONO8:
-                frame = raw_image.get_numpy_array()
-            else:
-                # Convert to RGB if needed
-                frame = raw_image.convert("RGB")
-                if frame is not None:
-                    frame = frame.get_numpy_array()
+            if self.features.has_pending():
+                self.apply_settings()
 
-            raw_image.release()  # Release the raw image
-            return timestamp, frame
+            timestamp, frame, info = self.stream.read(self.image_timeout / 1000.0)
+            if frame is None:
+                return timestamp, None, None
+            self.frame_info = info
+            return timestamp, frame, info
 
         except Exception as e:
             print(f"Error getting frame: {str(e)}")
-            return None, None
+            return None, None, None
+
+    def get_stream_stats(self) -> Dict:
+        """Get frame delivery statistics of the data stream.
+
+        Returns:
+            Dictionary of stream statistics (empty before initialization)
+        """
+        if self.stream is None:
+            return {}
+        return self.stream.stats()
+
+    def _convert(self, raw_image):
+        """Convert a raw image into (timestamp, frame, descriptor).
+
+        Incomplete images are described but not converted.
+        """
+        timestamp = raw_image.get_timestamp()
+        pixel_format = raw_image.get_pixel_format()
+        info = FrameInfo(
+            raw_image.get_frame_id(),
+            time.time(),
+            timestamp,
+            PIXEL_FORMAT_NAMES.get(pixel_format),
+            self.roi,
+            self.frame_metadata,
+            raw_image.get_status(),
+        )
+        if info.status != gx.GxFrameStatusList.SUCCESS:
+            return timestamp, None, info
+
+        # Convert to numpy array; with raw_bayer the mosaic is kept and
+        # demosaiced later, off the acquisition thread
+        if pixel_format == gx.GxPixelFormatEntry.MONO8 or (
+            self.raw_bayer and self.bayer_pattern
+        ):
+            frame = raw_image.get_numpy_array()
+        else:
+            # Convert to RGB if needed
+            frame = raw_image.convert("RGB")
+            if frame is not None:
+                frame = frame.get_numpy_array()
+        return timestamp, frame, info
 
     def release(self) -> None:
         """Release camera resources."""
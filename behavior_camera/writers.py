@@ -0,0 +1,747 @@
+import cv2
+import numpy as np
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from .delta import RECORD, TileCodec, write_header, write_index
+from .mjpeg import AviMjpegFile
+
+# Recording formats selectable through ``recording.file_format``. Each entry
+# names the container extension, the OpenCV fourcc used by the fallback path
+# and the ffmpeg encoder preferred when ffmpeg is available. Image sequence
+# formats write a directory of per-frame files instead; ``delta`` is the
+# lossless background-delta archive written by :class:`DeltaWriter`.
+FILE_FORMATS = {
+    "avi": {"extension": ".avi", "fourcc": "XVID", "codec": "mpeg4"},
+    "xvid": {"extension": ".avi", "fourcc": "XVID", "codec": "mpeg4"},
+    "mjpeg": {"extension": ".avi", "fourcc": "MJPG", "codec": "mjpeg"},
+    "mjpeg_mkv": {"extension": ".mkv", "fourcc": "MJPG", "codec": "mjpeg"},
+    "mp4": {"extension": ".mp4", "fourcc": "mp4v", "codec": "libx264"},
+    "h264": {"extension": ".mkv", "fourcc": "avc1", "codec": "libx264"},
+    "mkv": {"extension": ".mkv", "fourcc": "XVID", "codec": "libx264"},
+    "ffv1": {"extension": ".mkv", "fourcc": "FFV1", "codec": "ffv1"},
+    "delta": {"extension": ".bgd", "delta": True},
+    "png": {"extension": "", "image": ".png"},
+    "tiff": {"extension": "", "image": ".tiff"},
+    "jpg": {"extension": "", "image": ".jpg"},
+}
+
+DEFAULT_FILE_FORMAT = "avi"
+
+
+def get_format_spec(recording_config: Optional[Dict]) -> Dict:
+    """Resolve the format table entry for a recording configuration.
+
+    Args:
+        recording_config: ``recording`` section of the configuration
+
+    Returns:
+        Dictionary with ``extension``, ``fourcc`` and ``codec`` keys, or
+        ``extension`` and ``image`` for image sequence formats
+    """
+    recording_config = recording_config or {}
+    file_format = str(recording_config.get("file_format", DEFAULT_FILE_FORMAT))
+    file_format = file_format.lower().lstrip(".")
+    if file_format not in FILE_FORMATS:
+        raise ValueError(
+            f"Unsupported file format '{file_format}', "
+            f"expected one of: {', '.join(sorted(FILE_FORMATS))}"
+        )
+    return FILE_FORMATS[file_format]
+
+
+# Encoders taking the x264-style ``preset``/``crf``/``qp`` options
+X264_CODECS = ("libx264", "libx264rgb", "libx265")
+
+
+def ffmpeg_codec(codec: str, lossless: bool, is_color: bool) -> str:
+    """Return the ffmpeg encoder to use for a requested codec.
+
+    Lossless color H.264 uses ``libx264rgb``, which encodes the BGR frames
+    directly; ``libx264`` would convert them to YUV first, and that
+    conversion rounds pixel values even at ``-qp 0``.
+    """
+    if lossless and is_color and codec == "libx264":
+        return "libx264rgb"
+    return codec
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_encoders() -> frozenset:
+    """Return the set of encoders offered by the local ffmpeg binary.
+
+    The probe runs once per process; an empty set means ffmpeg is missing
+    or unusable.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return frozenset()
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+
+    encoders = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # Encoder lines look like " V....D libx264  description"
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[1] != "=":
+            encoders.add(parts[1])
+    return frozenset(encoders)
+
+
+@lru_cache(maxsize=None)
+def opencv_supports(fourcc: str, extension: str) -> bool:
+    """Check whether OpenCV can actually open a writer for a fourcc/container.
+
+    Args:
+        fourcc: Four character codec code
+        extension: Container extension including the dot
+
+    Returns:
+        bool: True if a test writer could be opened and written
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, f"probe{extension}")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), 30.0, (64, 48))
+        try:
+            if not writer.isOpened():
+                return False
+            writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        finally:
+            writer.release()
+        return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+class FrameWriter:
+    """Base class for video writer backends."""
+
+    name = "base"
+
+    # True for writers that still use a frame after ``write`` returns; they
+    # call ``frame_done(frame)`` once they no longer need it
+    holds_frames = False
+
+    def __init__(
+        self,
+        path: str,
+        fps: float,
+        frame_size: Tuple[int, int],
+        is_color: bool = True,
+        options: Optional[Dict] = None,
+    ):
+        """Initialize writer.
+
+        Args:
+            path: Output file path
+            fps: Nominal frame rate stored in the container
+            frame_size: Frame size as (width, height)
+            is_color: True for 3-channel BGR frames, False for mono frames
+            options: ``recording.encoder`` configuration
+        """
+        self.path = path
+        self.fps = float(fps)
+        self.frame_size = (int(frame_size[0]), int(frame_size[1]))
+        self.is_color = is_color
+        self.options = options or {}
+        self.frames_written = 0
+        self.frame_done: Optional[Callable[[np.ndarray], None]] = None
+
+    def is_opened(self) -> bool:
+        """Return True if the writer accepts frames."""
+        raise NotImplementedError
+
+    def write(
+        self,
+        frame: np.ndarray,
+        index: Optional[int] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Write a single frame.
+
+        Args:
+            frame: Frame to write
+            index: Capture index of the frame, if known
+            timestamp: Timestamp of the frame, if known
+        """
+        raise NotImplementedError
+
+    def release(self) -> None:
+        """Flush and close the output file."""
+        raise NotImplementedError
+
+    def faster_options(self) -> Optional[Dict]:
+        """Return encoder options for a cheaper preset, if there is one."""
+        return None
+
+    def bytes_written(self) -> int:
+        """Return the number of bytes written to disk so far."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def segment_full(self) -> bool:
+        """Return True if the file cannot take more frames.
+
+        The output then continues in a new segment.
+        """
+        return False
+
+
+class OpenCVWriter(FrameWriter):
+    """Writer backed by ``cv2.VideoWriter``."""
+
+    name = "opencv"
+
+    def __init__(
+        self, path, fps, frame_size, is_color=True, options=None, fourcc="XVID"
+    ):
+        super().__init__(path, fps, frame_size, is_color, options)
+        self.fourcc = fourcc
+        self.writer = cv2.VideoWriter(
+            path, cv2.VideoWriter_fourcc(*fourcc), self.fps, self.frame_size, is_color
+        )
+
+    def is_opened(self) -> bool:
+        return self.writer is not None and self.writer.isOpened()
+
+    def write(self, frame, index=None, timestamp=None) -> None:
+        self.writer.write(frame)
+        self.frames_written += 1
+
+    def release(self) -> None:
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class FFmpegWriter(FrameWriter):
+    """Writer that pipes raw frames into an ffmpeg subprocess.
+
+    Encoding happens in the ffmpeg process, so codec threads, presets and
+    rate control are configurable without touching the acquisition side.
+    Recognized options: ``codec``, ``threads``, ``crf``, ``preset``,
+    ``lossless``, ``pix_fmt`` and ``extra_args``.
+    """
+
+    name = "ffmpeg"
+
+    # Seconds to wait after starting ffmpeg; rejected arguments or a missing
+    # encoder make it exit within this time, which ``is_opened`` reports
+    STARTUP_CHECK = 0.1
+
+    def __init__(
+        self, path, fps, frame_size, is_color=True, options=None, codec="libx264"
+    ):
+        super().__init__(path, fps, frame_size, is_color, options)
+        self.codec = ffmpeg_codec(
+            self.options.get("codec") or codec,
+            bool(self.options.get("lossless", False)),
+            is_color,
+        )
+        self.error = ""
+        self.frame_bytes = (
+            self.frame_size[0] * self.frame_size[1] * (3 if is_color else 1)
+        )
+        self.process = subprocess.Popen(
+            self.build_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            self.process.wait(timeout=self.STARTUP_CHECK)
+        except subprocess.TimeoutExpired:
+            pass  # still running: ffmpeg accepted the command line
+
+    def build_command(self) -> list:
+        """Build the ffmpeg command line for this writer."""
+        width, height = self.frame_size
+        lossless = bool(self.options.get("lossless", False))
+        command = [
+            shutil.which("ffmpeg") or "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24" if self.is_color else "gray",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            f"{self.fps:g}",
+            "-i",
+            "pipe:0",
+            "-c:v",
+            self.codec,
+        ]
+
+        threads = self.options.get("threads")
+        if threads is not None:
+            command += ["-threads", str(int(threads))]
+
+        if self.codec in X264_CODECS:
+            preset = self.options.get("preset")
+            if preset:
+                command += ["-preset", str(preset)]
+            if lossless and self.codec == "libx265":
+                # x265 still quantizes at qp 0
+                command += ["-x265-params", "lossless=1"]
+            elif lossless:
+                command += ["-qp", "0"]
+            elif self.options.get("crf") is not None:
+                command += ["-crf", str(self.options["crf"])]
+        elif self.codec == "mjpeg" or self.codec == "mpeg4":
+            # These codecs use a fixed quantizer instead of CRF
+            if self.options.get("crf") is not None:
+                command += ["-q:v", str(self.options["crf"])]
+
+        pix_fmt = self.options.get("pix_fmt")
+        if pix_fmt is None:
+            if self.codec == "ffv1":
+                pix_fmt = "bgr0" if self.is_color else "gray"
+            elif self.codec == "mjpeg":
+                pix_fmt = "yuvj420p" if self.is_color else "gray"
+            elif not self.is_color:
+                pix_fmt = "gray"
+            elif self.codec == "libx264rgb":
+                pix_fmt = "bgr24"
+            elif lossless and self.codec == "libx265":
+                # Planar RGB; a YUV conversion would round the pixel values
+                pix_fmt = "gbrp"
+            else:
+                pix_fmt = "yuv420p"
+        command += ["-pix_fmt", pix_fmt]
+
+        command += [str(arg) for arg in self.options.get("extra_args", [])]
+        command.append(self.path)
+        return command
+
+    def is_opened(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def faster_options(self) -> Optional[Dict]:
+        if self.codec not in X264_CODECS:
+            return None
+        if self.options.get("preset") == "ultrafast":
+            return None
+        options = dict(self.options)
+        options["codec"] = self.codec
+        options["preset"] = "ultrafast"
+        return options
+
+    def write(self, frame, index=None, timestamp=None) -> None:
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError(
+                f"Frame of shape {frame.shape} does not match writer size "
+                f"{self.frame_size[0]}x{self.frame_size[1]}"
+            )
+        try:
+            self.process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        except BrokenPipeError as e:
+            raise RuntimeError(f"ffmpeg exited: {self._stderr()}") from e
+        self.frames_written += 1
+
+    def release(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        if self.process.returncode != 0:
+            self.error = self._stderr()
+            print(f"ffmpeg exited with code {self.process.returncode}: {self.error}")
+        self.process = None
+
+    def _stderr(self) -> str:
+        try:
+            return self.process.stderr.read().decode(errors="replace").strip()
+        except Exception:
+            return ""
+
+
+class ImageSequenceWriter(FrameWriter):
+    """Writer producing one image file per frame.
+
+    Frames are encoded with ``cv2.imencode`` on a thread pool (OpenCV
+    releases the GIL while encoding) and stored in numbered shard
+    directories of ``shard_size`` files each. At most ``max_in_flight``
+    frames are held for encoding at a time; further writes block. A
+    ``manifest.csv`` mapping frame index to file and timestamp is written on
+    release. Recognized options: ``threads``, ``max_in_flight``,
+    ``shard_size``, ``jpeg_quality`` and ``png_compression``.
+    """
+
+    name = "images"
+    holds_frames = True
+
+    def __init__(
+        self, path, fps, frame_size, is_color=True, options=None, image_format=".png"
+    ):
+        super().__init__(path, fps, frame_size, is_color, options)
+        self.image_format = image_format
+        self.shard_size = int(self.options.get("shard_size", 1000))
+        threads = int(self.options.get("threads") or os.cpu_count() or 1)
+        self.in_flight = threading.BoundedSemaphore(
+            int(self.options.get("max_in_flight", 2 * threads))
+        )
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.lock = threading.Lock()
+        self.manifest: List[Tuple[int, str, Optional[float]]] = []
+        self.shards = set()
+        self.encoded_bytes = 0
+        self.error = None
+
+        self.params = []
+        if image_format == ".jpg":
+            self.params = [
+                cv2.IMWRITE_JPEG_QUALITY,
+                int(self.options.get("jpeg_quality", 95)),
+            ]
+        elif image_format == ".png":
+            # Low compression levels are much faster and still lossless
+            self.params = [
+                cv2.IMWRITE_PNG_COMPRESSION,
+                int(self.options.get("png_compression", 1)),
+            ]
+        os.makedirs(path, exist_ok=True)
+        self.opened = True
+
+    def is_opened(self) -> bool:
+        return self.opened
+
+    def bytes_written(self) -> int:
+        return self.encoded_bytes
+
+    def write(self, frame, index=None, timestamp=None) -> None:
+        if self.error is not None:
+            raise RuntimeError(f"Image encoding failed: {self.error}")
+        if index is None:
+            index = self.frames_written
+        shard = f"{index // self.shard_size:06d}"
+        relative_path = os.path.join(shard, f"{index:08d}{self.image_format}")
+        if shard not in self.shards:
+            os.makedirs(os.path.join(self.path, shard), exist_ok=True)
+            self.shards.add(shard)
+
+        self.in_flight.acquire()
+        self.pool.submit(self._encode, frame, index, timestamp, relative_path)
+        self.frames_written += 1
+
+    def _encode(self, frame, index, timestamp, relative_path) -> None:
+        """Encode one frame and write it to disk (pool thread)."""
+        try:
+            ok, buffer = cv2.imencode(self.image_format, frame, self.params)
+            if not ok:
+                raise RuntimeError(f"cv2.imencode failed for frame {index}")
+            with open(os.path.join(self.path, relative_path), "wb") as f:
+                f.write(buffer)
+            with self.lock:
+                self.manifest.append((index, relative_path, timestamp))
+                self.encoded_bytes += buffer.nbytes
+        except Exception as e:
+            self.error = e
+        finally:
+            self.in_flight.release()
+            if self.frame_done is not None:
+                self.frame_done(frame)
+
+    def release(self) -> None:
+        if not self.opened:
+            return
+        self.pool.shutdown(wait=True)
+        self.opened = False
+        self.manifest.sort()
+        with open(os.path.join(self.path, "manifest.csv"), "w") as f:
+            f.write("index,file,timestamp\n")
+            for index, relative_path, timestamp in self.manifest:
+                f.write(
+                    f"{index},{relative_path},"
+                    f"{'' if timestamp is None else repr(timestamp)}\n"
+                )
+        if self.error is not None:
+            print(f"Image encoding failed: {self.error}")
+
+
+class DeltaWriter(FrameWriter):
+    """Lossless background-delta archive writer (``.bgd``).
+
+    Meant for static arenas where most of every frame matches the empty
+    background. A background keyframe is stored every ``keyframe_interval``
+    frames, or earlier once a frame's residual grows beyond
+    ``refresh_ratio`` times the keyframe size (lighting changed, bedding
+    moved). Every frame is stored as its residual against the current
+    keyframe, cut into ``tile_size`` tiles; all-zero tiles are skipped and
+    the rest are zlib-compressed (``zlib_level``) on ``threads`` threads.
+    An index of frame offsets is appended on release so frames can be
+    decoded in any order (see :class:`~behavior_camera.delta.DeltaCapture`).
+    """
+
+    name = "delta"
+
+    def __init__(self, path, fps, frame_size, is_color=True, options=None):
+        super().__init__(path, fps, frame_size, is_color, options)
+        width, height = self.frame_size
+        self.channels = 3 if is_color else 1
+        self.keyframe_interval = int(self.options.get("keyframe_interval", 300))
+        self.refresh_ratio = float(self.options.get("refresh_ratio", 0.5))
+        tile_size = int(self.options.get("tile_size", 64))
+        self.codec = TileCodec(
+            height,
+            width,
+            self.channels,
+            tile_size=tile_size,
+            level=int(self.options.get("zlib_level", 1)),
+            threads=int(self.options.get("threads") or os.cpu_count() or 1),
+        )
+        self.background = None
+        self.keyframe_bytes = 0
+        self.since_keyframe = 0
+        self.frame_offsets: List[int] = []
+        self.frame_keys: List[int] = []
+        self.key_offsets: List[int] = []
+
+        self.file = open(path, "wb")
+        write_header(
+            self.file,
+            {
+                "width": width,
+                "height": height,
+                "channels": self.channels,
+                "tile_size": tile_size,
+                "fps": self.fps,
+            },
+        )
+
+    def is_opened(self) -> bool:
+        return self.file is not None
+
+    def bytes_written(self) -> int:
+        return self.file.tell() if self.file is not None else super().bytes_written()
+
+    def _record(self, kind: bytes, payload: bytes) -> int:
+        """Append a record and return its offset."""
+        offset = self.file.tell()
+        self.file.write(RECORD.pack(kind, len(payload)))
+        self.file.write(payload)
+        return offset
+
+    def _keyframe(self, frame: np.ndarray) -> None:
+        """Make ``frame`` the new background."""
+        payload = self.codec.encode(frame, None)
+        self.key_offsets.append(self._record(b"K", payload))
+        self.background = frame.copy()
+        self.keyframe_bytes = len(payload)
+        self.since_keyframe = 0
+
+    def write(self, frame, index=None, timestamp=None) -> None:
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        if frame.shape != (self.frame_size[1], self.frame_size[0], self.channels):
+            raise ValueError(
+                f"Frame of shape {frame.shape} does not match writer size "
+                f"{self.frame_size[0]}x{self.frame_size[1]}"
+            )
+        if self.background is None or self.since_keyframe >= self.keyframe_interval:
+            self._keyframe(frame)
+        payload = self.codec.encode(frame, self.background)
+        if len(payload) > self.refresh_ratio * self.keyframe_bytes:
+            # The background changed; start over from this frame
+            self._keyframe(frame)
+            payload = self.codec.encode(frame, self.background)
+        self.frame_offsets.append(self._record(b"F", payload))
+        self.frame_keys.append(len(self.key_offsets) - 1)
+        self.since_keyframe += 1
+        self.frames_written += 1
+
+    def release(self) -> None:
+        if self.file is None:
+            return
+        write_index(self.file, self.frame_offsets, self.frame_keys, self.key_offsets)
+        self.file.close()
+        self.file = None
+        self.codec.close()
+
+
+class MjpegPassthroughWriter(FrameWriter):
+    """Writer storing compressed MJPEG frames without re-encoding.
+
+    Receives :class:`~behavior_camera.mjpeg.JpegFrame` objects straight from
+    the camera. ``.avi`` files are written directly with an ``idx1`` frame
+    index and split into segments of ``max_segment_bytes`` (AVI 1.0 sizes
+    are 32-bit); other containers are muxed by ffmpeg with ``-c copy``.
+    """
+
+    name = "mjpeg-copy"
+
+    def __init__(self, path, fps, frame_size, is_color=True, options=None):
+        super().__init__(path, fps, frame_size, is_color, options)
+        self.max_bytes = int(self.options.get("max_segment_bytes", 1 << 31) * 0.95)
+        self.avi = None
+        self.process = None
+        if path.lower().endswith(".avi"):
+            self.avi = AviMjpegFile(path, self.fps, *self.frame_size)
+        else:
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError(f"ffmpeg is required to write MJPEG into {path}")
+            self.process = subprocess.Popen(
+                [
+                    ffmpeg,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-f",
+                    "mjpeg",
+                    "-framerate",
+                    f"{self.fps:g}",
+                    "-i",
+                    "pipe:0",
+                    "-c:v",
+                    "copy",
+                    path,
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+
+    def is_opened(self) -> bool:
+        if self.avi is not None:
+            return self.avi.file is not None
+        return self.process is not None and self.process.poll() is None
+
+    def bytes_written(self) -> int:
+        if self.avi is not None and self.avi.file is not None:
+            return self.avi.tell()
+        return super().bytes_written()
+
+    def segment_full(self) -> bool:
+        return self.avi is not None and self.avi.tell() >= self.max_bytes
+
+    def write(self, frame, index=None, timestamp=None) -> None:
+        data = memoryview(frame.data)
+        if self.avi is not None:
+            self.avi.write(data)
+        else:
+            try:
+                self.process.stdin.write(data)
+            except BrokenPipeError:
+                raise RuntimeError(
+                    f"ffmpeg exited: {self.process.stderr.read().decode(errors='replace')}"
+                )
+        self.frames_written += 1
+
+    def release(self) -> None:
+        if self.avi is not None:
+            self.avi.close()
+        elif self.process is not None:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.process.wait()
+            if self.process.returncode != 0:
+                print(
+                    f"ffmpeg exited with code {self.process.returncode}: "
+                    f"{self.process.stderr.read().decode(errors='replace').strip()}"
+                )
+            self.process = None
+
+
+def create_writer(
+    path: str,
+    fps: float,
+    frame_size: Tuple[int, int],
+    recording_config: Optional[Dict] = None,
+    is_color: bool = True,
+    compressed: bool = False,
+) -> FrameWriter:
+    """Create the best available writer for a recording configuration.
+
+    ``recording.encoder.backend`` may force ``opencv`` or ``ffmpeg``; the
+    default ``auto`` picks ffmpeg when the local binary offers the format's
+    encoder and falls back to ``cv2.VideoWriter`` otherwise. Image sequence
+    formats always use :class:`ImageSequenceWriter`, with ``path`` as the
+    output directory, ``delta`` always uses :class:`DeltaWriter` and
+    compressed MJPEG frames use :class:`MjpegPassthroughWriter`. Lossless
+    output never falls back to a lossy codec: without a lossless encoder a
+    RuntimeError is raised.
+
+    Args:
+        path: Output file path, or directory for image sequences
+        fps: Frame rate stored in the container
+        frame_size: Frame size as (width, height)
+        recording_config: ``recording`` section of the configuration
+        is_color: True for BGR frames, False for mono frames
+        compressed: Frames are MJPEG bitstreams to store as they are
+
+    Returns:
+        An opened FrameWriter
+    """
+    recording_config = recording_config or {}
+    spec = get_format_spec(recording_config)
+    options = dict(recording_config.get("encoder") or {})
+    backend = options.pop("backend", "auto")
+    if "image" in spec:
+        return ImageSequenceWriter(
+            path, fps, frame_size, is_color, options, image_format=spec["image"]
+        )
+    if spec.get("delta"):
+        return DeltaWriter(path, fps, frame_size, is_color, options)
+    if compressed:
+        return MjpegPassthroughWriter(path, fps, frame_size, is_color, options)
+    codec = options.get("codec") or spec["codec"]
+    if options.get("lossless") and codec not in ("libx264", "libx265", "ffv1"):
+        codec = "ffv1"
+    codec = ffmpeg_codec(codec, bool(options.get("lossless")), is_color)
+
+    if backend not in ("auto", "opencv", "ffmpeg"):
+        raise ValueError(f"Unknown writer backend '{backend}'")
+
+    if backend in ("auto", "ffmpeg"):
+        if codec in ffmpeg_encoders():
+            writer = FFmpegWriter(path, fps, frame_size, is_color, options, codec=codec)
+            if writer.is_opened():
+                return writer
+            writer.release()
+            if backend == "ffmpeg":
+                raise RuntimeError(f"ffmpeg failed to start: {writer.error}")
+        elif backend == "ffmpeg":
+            raise RuntimeError(f"ffmpeg encoder '{codec}' is not available")
+
+    fourcc = options.get("fourcc") or spec["fourcc"]
+    extension = os.path.splitext(path)[1] or spec["extension"]
+    if options.get("lossless"):
+        # FFV1 is the only lossless codec OpenCV writes; never fall back to
+        # a lossy one when lossless output was requested
+        if not opencv_supports("FFV1", extension):
+            raise RuntimeError(
+                f"No lossless encoder available for {path}: ffmpeg '{codec}' "
+                "is missing and OpenCV cannot write FFV1; use the png, tiff "
+                "or delta format"
+            )
+        fourcc = "FFV1"
+    elif not opencv_supports(fourcc, extension):
+        print(f"OpenCV cannot write '{fourcc}', falling back to XVID")
+        fourcc = "XVID"
+    writer = OpenCVWriter(path, fps, frame_size, is_color, options, fourcc=fourcc)
+    if not writer.is_opened():
+        raise RuntimeError(f"Failed to open video writer for {path}")
+    return writer
@@ -7,7 +7,9 @@ the actual SDK implementation.
 """
 
 import numpy as np
+import threading
 import time
+from collections import deque
 
 
 class GxPixelFormatEntry:
@@ -15,6 +17,15 @@ class GxPixelFormatEntry:
     MONO10 = 0x01100003
     MONO12 = 0x01100005
     MONO16 = 0x01100007
+    BAYER_GR8 = 0x01080008
+    BAYER_RG8 = 0x01080009
+    BAYER_GB8 = 0x0108000A
+    BAYER_BG8 = 0x0108000B
+
+
+class GxFrameStatusList:
+    SUCCESS = 0
+    INCOMPLETE = -1
 
 
 class gx_status_list:
@@ -29,6 +40,20 @@ class gx_status_list:
     INVALID_HANDLE_INFO = -8
 
 
+class OutOfRange(Exception):
+    """Raised when a feature value is outside its current range."""
+
+
+# ROI features and the feature sharing their sensor axis: a region must fit
+# on the sensor, so the maximum of each depends on the other's value
+ROI_PARTNERS = {
+    "Width": "OffsetX",
+    "OffsetX": "Width",
+    "Height": "OffsetY",
+    "OffsetY": "Height",
+}
+
+
 class DeviceManager:
     def __init__(self):
         self._devices = [GxDevice()]
@@ -85,12 +110,27 @@ class RemoteFeatureControl:
 
     def is_implemented(self, feature_name):
         """Check if a feature is implemented."""
-        return True
+        return (
+            feature_name in self._device._features
+            or feature_name in self._device._commands
+        )
 
     def get_float_feature(self, feature_name):
         """Get a float feature value."""
         return FloatFeature(self._device, feature_name)
 
+    def get_int_feature(self, feature_name):
+        """Get an integer feature."""
+        return IntFeature(self._device, feature_name)
+
+    def get_enum_feature(self, feature_name):
+        """Get an enumeration feature."""
+        return EnumFeature(self._device, feature_name)
+
+    def get_command_feature(self, feature_name):
+        """Get a command feature."""
+        return CommandFeature(self._device, feature_name)
+
 
 class FloatFeature:
     def __init__(self, device, feature_name):
@@ -105,6 +145,73 @@ class FloatFeature:
         """Set the feature value."""
         return self._device.set_float_feature(self._feature_name, value)
 
+    def get_range(self):
+        """Get the feature range."""
+        low, high, inc = self._device._ranges.get(self._feature_name, (0.0, 1e6, 0))
+        return {"min": low, "max": high, "inc": inc, "unit": ""}
+
+
+class IntFeature(FloatFeature):
+    def get(self):
+        """Get the feature value."""
+        return int(self._device._features[self._feature_name])
+
+    def get_range(self):
+        """Get the feature range; ROI limits follow the current region."""
+        feature_range = super().get_range()
+        if self._feature_name in ROI_PARTNERS:
+            feature_range["max"] = self._device._roi_max(self._feature_name)
+        return feature_range
+
+    def set(self, value):
+        """Set the feature value."""
+        if self._feature_name in ROI_PARTNERS:
+            feature_range = self.get_range()
+            if not feature_range["min"] <= int(value) <= feature_range["max"]:
+                raise OutOfRange(
+                    f"{self._feature_name} {value} outside "
+                    f"[{feature_range['min']}, {feature_range['max']}]"
+                )
+        self._device._features[self._feature_name] = int(value)
+        return gx_status_list.SUCCESS
+
+
+class EnumFeature:
+    def __init__(self, device, feature_name):
+        self._device = device
+        self._feature_name = feature_name
+
+    def get(self):
+        """Get the feature value as (int value, symbolic name)."""
+        entries = self._device._enum_entries[self._feature_name]
+        name = self._device._features[self._feature_name]
+        return entries.index(name), name
+
+    def set(self, value):
+        """Set the feature value by symbolic name or int value."""
+        entries = self._device._enum_entries[self._feature_name]
+        if isinstance(value, int):
+            value = entries[value]
+        if value not in entries:
+            return gx_status_list.INVALID_PARAMETER
+        self._device._features[self._feature_name] = value
+        return gx_status_list.SUCCESS
+
+    def get_range(self):
+        """Get the supported entries."""
+        entries = self._device._enum_entries[self._feature_name]
+        return [{"value": i, "symbolic": name} for i, name in enumerate(entries)]
+
+
+class CommandFeature:
+    def __init__(self, device, feature_name):
+        self._device = device
+        self._feature_name = feature_name
+
+    def send_command(self):
+        """Execute the command."""
+        return self._device._execute(self._feature_name)
+
 
 class GxDevice:
     def __init__(self):
@@ -115,7 +222,42 @@ class GxDevice:
         self._gain = 0.0
         self._width = 1920
         self._height = 1080
-        self.data_stream = [GxDataStream()]
+        self._features = {
+            "ExposureTime": self._exposure_time,
+            "Gain": self._gain,
+            "Width": self._width,
+            "Height": self._height,
+            "OffsetX": 0,
+            "OffsetY": 0,
+            "ExposureAuto": "Off",
+            "GainAuto": "Off",
+            "TriggerMode": "Off",
+            "TriggerSource": "Software",
+            "TriggerActivation": "RisingEdge",
+            "PixelColorFilter": "None",
+            "AcquisitionFrameRate": 60.0,
+        }
+        self._commands = {"TriggerSoftware"}
+        self._ranges = {
+            "ExposureTime": (20.0, 1000000.0, 0),
+            "Gain": (0.0, 24.0, 0),
+            "Width": (16, 1920, 16),
+            "Height": (2, 1080, 2),
+            "OffsetX": (0, 1904, 16),
+            "OffsetY": (0, 1078, 2),
+            "AcquisitionFrameRate": (1.0, 1000.0, 0),
+        }
+        self._enum_entries = {
+            "ExposureAuto": ["Off", "Continuous", "Once"],
+            "GainAuto": ["Off", "Continuous", "Once"],
+            "TriggerMode": ["Off", "On"],
+            "TriggerSource": ["Software", "Line0", "Line2", "Line3"],
+            "TriggerActivation": ["FallingEdge", "RisingEdge"],
+            "PixelColorFilter": ["None", "BayerRG", "BayerGB", "BayerGR", "BayerBG"],
+        }
+        self._triggers = deque()
+        self._trigger_condition = threading.Condition()
+        self.data_stream = [GxDataStream(self)]
         self._remote_feature = RemoteFeatureControl(self)
 
     def open(self):
@@ -139,31 +281,62 @@ class GxDevice:
         return features.get(feature_name, "")
 
     def get_float_feature(self, feature_name):
-        features = {
-            "ExposureTime": self._exposure_time,
-            "Gain": self._gain,
-        }
-        return features.get(feature_name, 0.0)
+        return float(self._features.get(feature_name, 0.0))
+
+    def _roi_max(self, feature_name):
+        """Largest value of an ROI feature that keeps the region on the sensor."""
+        sensor = self._width if feature_name in ("Width", "OffsetX") else self._height
+        high = sensor - self._features[ROI_PARTNERS[feature_name]]
+        return min(self._ranges[feature_name][1], high)
 
     def set_float_feature(self, feature_name, value):
         if feature_name == "ExposureTime":
             self._exposure_time = value
         elif feature_name == "Gain":
             self._gain = value
+        self._features[feature_name] = float(value)
         return gx_status_list.SUCCESS
 
     def stream_on(self):
         if not self._is_streaming:
             self._is_streaming = True
+            self.data_stream[0]._start()
             return gx_status_list.SUCCESS
         return gx_status_list.ERROR
 
     def stream_off(self):
         if self._is_streaming:
             self._is_streaming = False
+            self.data_stream[0]._stop()
+            with self._trigger_condition:
+                self._trigger_condition.notify_all()
             return gx_status_list.SUCCESS
         return gx_status_list.ERROR
 
+    def _execute(self, command):
+        """Run a command feature."""
+        if command not in self._commands:
+            return gx_status_list.INVALID_PARAMETER
+        if (
+            command == "TriggerSoftware"
+            and self._is_streaming
+            and self._features["TriggerMode"] == "On"
+            and self._features["TriggerSource"] == "Software"
+        ):
+            with self._trigger_condition:
+                self._triggers.append(time.time())
+                self._trigger_condition.notify()
+        return gx_status_list.SUCCESS
+
+    def _wait_trigger(self, timeout):
+        """Wait for a trigger; returns its time or None on timeout."""
+        with self._trigger_condition:
+            if not self._trigger_condition.wait_for(
+                lambda: self._triggers, timeout / 1000.0
+            ):
+                return None
+            return self._triggers.popleft()
+
     def get_remote_device_feature_control(self):
         """Get the remote feature control interface."""
         return self._remote_feature
@@ -174,25 +347,164 @@ class GxDevice:
 
 
 class GxDataStream:
-    def __init__(self):
+    def __init__(self, device=None):
+        self._device = device
         self._frame_count = 0
+        self._buffer_number = 5
+        self._features = {"StreamTransferSize": 65536, "StreamTransferNumberUrb": 64}
+        self._ranges = {
+            "StreamTransferSize": (4096, 1 << 24, 4096),
+            "StreamTransferNumberUrb": (1, 512, 1),
+        }
+        self.StreamTransferSize = IntFeature(self, "StreamTransferSize")
+        self.StreamTransferNumberUrb = IntFeature(self, "StreamTransferNumberUrb")
+        self._callback = None
+        self._buffers = deque()
+        self._buffer_condition = threading.Condition()
+        self._threads = []
+        self._running = False
+
+    def set_acquisition_buffer_number(self, buffer_num):
+        """Set the number of acquisition buffers (before stream_on)."""
+        if buffer_num < 1:
+            return gx_status_list.INVALID_PARAMETER
+        self._buffer_number = int(buffer_num)
+        return gx_status_list.SUCCESS
 
-    def get_image(self):
-        """Simulate getting an image from the camera."""
+    def register_capture_callback(self, callback_func):
+        """Register a function called with every captured image."""
+        if self._running:
+            return gx_status_list.INVALID_ACCESS
+        self._callback = callback_func
+        return gx_status_list.SUCCESS
+
+    def unregister_capture_callback(self):
+        """Remove the capture callback."""
+        if self._running:
+            return gx_status_list.INVALID_ACCESS
+        self._callback = None
+        return gx_status_list.SUCCESS
+
+    def _next_image(self, timeout=1000):
+        """Wait for the next exposure and return its image, or None."""
+        timestamp = None
+        color_filter = None
+        if self._device is not None:
+            if self._device._features["TriggerMode"] == "On":
+                # External lines never fire here
+                timestamp = self._device._wait_trigger(timeout)
+                if timestamp is None:
+                    return None
+            color_filter = self._device._features["PixelColorFilter"]
         self._frame_count += 1
-        return GxImage()
+        return GxImage(timestamp, color_filter, self._frame_count)
+
+    def get_image(self, timeout=1000):
+        """Simulate getting an image from the camera.
+
+        In trigger mode an image is only returned for a trigger received
+        within ``timeout`` milliseconds.
+        """
+        return self._next_image(timeout)
+
+    def _start(self):
+        """Emulate callback acquisition after stream_on.
+
+        A sensor thread fills at most ``buffer_number`` buffers at the
+        acquisition frame rate (or per trigger) and a delivery thread hands
+        them to the callback. Images arriving while every buffer is taken
+        are lost, leaving a gap in the frame IDs like the real driver.
+        """
+        if self._callback is None or self._running:
+            return
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._sense, daemon=True),
+            threading.Thread(target=self._deliver, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _stop(self):
+        """Stop callback acquisition and wait for the threads."""
+        if not self._running:
+            return
+        self._running = False
+        with self._buffer_condition:
+            self._buffer_condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._threads = []
+        self._buffers.clear()
+
+    def _sense(self):
+        """Sensor thread: produce images into the buffer queue."""
+        next_time = time.perf_counter()
+        while self._running:
+            triggered = self._device._features["TriggerMode"] == "On"
+            if not triggered:
+                period = 1.0 / self._device._features["AcquisitionFrameRate"]
+                period = max(period, self._device._features["ExposureTime"] / 1e6)
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.perf_counter()
+            image = self._next_image(timeout=100)
+            if image is None or not self._running:
+                continue
+            with self._buffer_condition:
+                if len(self._buffers) < self._buffer_number:
+                    self._buffers.append(image)
+                    self._buffer_condition.notify()
+
+    def _deliver(self):
+        """Delivery thread: run the callback for every filled buffer."""
+        while True:
+            with self._buffer_condition:
+                self._buffer_condition.wait_for(
+                    lambda: self._buffers or not self._running
+                )
+                if not self._running:
+                    return
+                image = self._buffers[0]
+            self._callback(image)
+            with self._buffer_condition:
+                # The buffer is requeued once the callback returns
+                self._buffers.popleft()
 
 
 class GxImage:
-    def __init__(self):
-        self._timestamp = time.time()
+    # Raw pixel formats of color sensors by color filter arrangement
+    BAYER_FORMATS = {
+        "BayerGR": GxPixelFormatEntry.BAYER_GR8,
+        "BayerRG": GxPixelFormatEntry.BAYER_RG8,
+        "BayerGB": GxPixelFormatEntry.BAYER_GB8,
+        "BayerBG": GxPixelFormatEntry.BAYER_BG8,
+    }
+
+    def __init__(self, timestamp=None, color_filter=None, frame_id=0):
+        self._timestamp = time.time() if timestamp is None else timestamp
+        self._frame_id = frame_id
+        self._status = GxFrameStatusList.SUCCESS
         self._width = 1920
         self._height = 1080
-        self._pixel_format = GxPixelFormatEntry.MONO8
+        self._pixel_format = self.BAYER_FORMATS.get(
+            color_filter, GxPixelFormatEntry.MONO8
+        )
+        self._rgb = False
 
     def get_timestamp(self):
         return self._timestamp
 
+    def get_frame_id(self):
+        return self._frame_id
+
+    def get_status(self):
+        return self._status
+
     def get_width(self):
         return self._width
 
@@ -204,11 +516,16 @@ class GxImage:
 
     def get_numpy_array(self):
         """Generate a mock image."""
-        return np.random.randint(0, 255, (self._height, self._width), dtype=np.uint8)
+        shape = (
+            (self._height, self._width, 3) if self._rgb else (self._height, self._width)
+        )
+        return np.random.randint(0, 255, shape, dtype=np.uint8)
 
     def convert(self, format_name):
         """Mock conversion."""
-        return self
+        converted = GxImage(self._timestamp, frame_id=self._frame_id)
+        converted._rgb = format_name == "RGB"
+        return converted
 
     def release(self):
         """Release resources."""
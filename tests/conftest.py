@@ -0,0 +1,31 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import gxipy  # noqa: F401
+except ImportError:
+    # Without the Galaxy SDK, use the mock API shipped in gxipy/gxiapi.py
+    spec = importlib.util.spec_from_file_location(
+        "gxipy", os.path.join(ROOT, "gxipy", "gxiapi.py")
+    )
+    gxipy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gxipy)
+    sys.modules["gxipy"] = gxipy
+
+
+@pytest.fixture
+def mock_camera():
+    """Camera opened on the Galaxy mock device."""
+    pytest.importorskip("PyQt5")
+    from behavior_camera.camera import Camera
+
+    camera = Camera({"framerate": 60})
+    assert camera.initialize()
+    yield camera
+    camera.release()
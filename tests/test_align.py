@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from behavior_camera.align import align_events, nearest_frames
+
+
+def brute_force_nearest(frame_times, event_times, tolerance=None):
+    """Nearest frame per event by checking every frame; ties go to the earlier."""
+    distance = np.abs(event_times[:, None] - frame_times[None, :])
+    index = distance.argmin(axis=1)
+    if tolerance is not None:
+        index[distance.min(axis=1) > tolerance] = -1
+    return index
+
+
+def frame_clock(count, seed=0):
+    """Jittered 100 Hz frame times with a few runs of dropped frames."""
+    rng = np.random.default_rng(seed)
+    times = 10.0 + np.arange(count) * 0.01 + rng.normal(0, 0.0005, count)
+    keep = np.ones(count, dtype=bool)
+    for start in rng.choice(count - 5, 8, replace=False):
+        keep[start : start + rng.integers(1, 5)] = False
+    return np.sort(times[keep])
+
+
+@pytest.mark.parametrize("tolerance", [None, 0.004, 0.02])
+def test_nearest_matches_brute_force(tolerance):
+    frame_times = frame_clock(500)
+    rng = np.random.default_rng(1)
+    event_times = np.concatenate(
+        [
+            # Events before, across and after the recording
+            rng.uniform(frame_times[0] - 0.5, frame_times[-1] + 0.5, 2000),
+            # Exact frame times and midpoints between frames (ties)
+            frame_times[::7],
+            (frame_times[:-1] + frame_times[1:])[::5] / 2,
+        ]
+    )
+    expected = brute_force_nearest(frame_times, event_times, tolerance)
+    np.testing.assert_array_equal(
+        nearest_frames(frame_times, event_times, tolerance), expected
+    )
+
+
+@pytest.mark.parametrize("count", [0, 1, 2])
+def test_nearest_few_frames(count):
+    frame_times = np.arange(count, dtype=np.float64)
+    event_times = np.array([-1.0, 0.0, 0.4, 0.5, 0.6, 3.0])
+    result = nearest_frames(frame_times, event_times)
+    if count == 0:
+        assert (result == -1).all()
+    else:
+        np.testing.assert_array_equal(
+            result, brute_force_nearest(frame_times, event_times)
+        )
+
+
+def test_align_events_matches_brute_force():
+    frame_times = frame_clock(300, seed=2)
+    rng = np.random.default_rng(3)
+    event_times = rng.uniform(frame_times[0] - 0.1, frame_times[-1] + 0.1, 400)
+    result = align_events(
+        frame_times, event_times, mode="window", tolerance=0.006, window=(-0.02, 0.03)
+    )
+
+    events = np.sort(event_times)
+    np.testing.assert_array_equal(result["times"], events)
+    frame = brute_force_nearest(frame_times, events, 0.006)
+    np.testing.assert_array_equal(result["frame"], frame)
+    matched = frame >= 0
+    np.testing.assert_allclose(
+        result["offset"][matched],
+        events[matched] - frame_times[frame[matched]],
+        rtol=0,
+        atol=1e-6,
+    )
+    assert np.isnan(result["offset"][~matched]).all()
+
+    for i, t in enumerate(events):
+        inside = np.flatnonzero((frame_times >= t - 0.02) & (frame_times < t + 0.03))
+        if len(inside):
+            assert result["window_start"][i] == inside[0]
+            assert result["window_stop"][i] == inside[-1] + 1
+        else:
+            assert result["window_start"][i] == result["window_stop"][i]
+
+    # Events in [t_i, t_i+1) belong to frame i; the last event at or
+    # before each frame is the latest one not after it
+    interval = np.array(
+        [
+            np.flatnonzero(frame_times <= t)[-1] if t >= frame_times[0] else -1
+            for t in events
+        ]
+    )
+    counts = np.bincount(interval[interval >= 0], minlength=len(frame_times))
+    np.testing.assert_array_equal(result["count"], counts)
+    last = np.array(
+        [np.flatnonzero(events <= t)[-1] if t >= events[0] else -1 for t in frame_times]
+    )
+    np.testing.assert_array_equal(result["last_event"], last)
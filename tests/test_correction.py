@@ -0,0 +1,91 @@
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from behavior_camera.correction import BufferRing
+from behavior_camera.recorder import VideoRecorder
+
+
+def test_ring_reuses_buffers_only_after_release():
+    ring = BufferRing(2)
+    first = ring.get((4, 4), np.uint8)
+    ring.retain(first)  # e.g. an output queue
+    ring.release(first)  # the producer is done
+    second = ring.get((4, 4), np.uint8)
+    assert second is not first
+    ring.release(first)  # the output is done
+    assert ring.get((4, 4), np.uint8) is first
+    assert ring.allocated == 2
+
+
+def test_exhausted_ring_hands_out_untracked_buffers():
+    ring = BufferRing(2)
+    held = [ring.get((4, 4), np.uint8) for _ in range(2)]
+    extra = ring.get((4, 4), np.uint8)
+    assert not ring.leased(extra)
+    ring.retain(extra)
+    ring.release(extra)  # ignored
+    for buffer in held:
+        ring.release(buffer)
+    reused = {id(ring.get((4, 4), np.uint8)) for _ in range(2)}
+    assert reused == {id(buffer) for buffer in held}
+    assert ring.allocated == 3
+
+
+def test_ring_drops_buffers_of_another_geometry():
+    ring = BufferRing(1)
+    ring.release(ring.get((4, 4), np.uint8))
+    buffer = ring.get((8, 8), np.uint8)
+    assert buffer.shape == (8, 8) and ring.leased(buffer)
+    assert ring.pooled == 1
+
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_queued_frames_are_not_overwritten(tmp_path, threaded):
+    dark_path = str(tmp_path / "dark.npy")
+    np.save(dark_path, np.full((24, 32), 5, dtype=np.uint8))
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {
+            "preview": False,
+            "file_format": "png",
+            "outputs": [{"name": "archive"}, {"name": "proxy", "scale": 0.5}],
+            # Far fewer buffers than frames in flight
+            "correction": {
+                "enabled": True,
+                "dark": dark_path,
+                "threaded": threaded,
+                "queue_size": 64,
+                "buffers": 2,
+                "cache_dir": str(tmp_path / "cache"),
+            },
+        },
+    }
+    recorder = VideoRecorder(str(tmp_path / "out"), config)
+    received = {}
+
+    def slow_analysis(index, timestamp, frame, info):
+        time.sleep(0.01)
+        received[index] = int(frame.min()), int(frame.max())
+
+    recorder.add_analysis_output("tracker", slow_analysis, queue_size=64)
+    recorder.start_recording("session")
+    count = 30
+    for i in range(count):
+        recorder.record_frame(np.full((24, 32), 10 + i, dtype=np.uint8), 100.0 + i)
+    summary = recorder.stop_recording()
+    assert summary["frames_written"] == count
+
+    # Every output saw each frame with its own corrected content
+    assert received == {i: (5 + i, 5 + i) for i in range(count)}
+    for name, shape in (("session", (24, 32)), ("session_proxy", (12, 16))):
+        files = sorted(glob.glob(os.path.join(str(tmp_path / "out"), name, "*", "*")))
+        assert len(files) == count
+        for i, path in enumerate(files):
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            assert image.shape == shape
+            assert (image == 5 + i).all(), path
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from behavior_camera.daemon import AcquisitionDaemon, send_command
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """Daemon on the Galaxy mock camera, listening on a free local port."""
+    config = {
+        "camera": {"framerate": 60},
+        "recording": {
+            "output_directory": str(tmp_path),
+            "file_format": "png",
+            "preview": False,
+        },
+        "daemon": {"host": "127.0.0.1", "port": 0},
+    }
+    daemon = AcquisitionDaemon(config)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.time() + 10.0
+    while not (daemon.running and daemon.server) and time.time() < deadline:
+        time.sleep(0.01)
+    assert daemon.running, "daemon did not start"
+    yield daemon
+    if daemon.running:
+        send_command("shutdown", daemon.host, daemon.port)
+    thread.join(timeout=10.0)
+    assert not thread.is_alive()
+
+
+def command(daemon, command_name, **arguments):
+    return send_command(command_name, daemon.host, daemon.port, **arguments)
+
+
+def wait_finished(daemon, count, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        finished = command(daemon, "status")["finished"]
+        if len(finished) >= count:
+            return finished
+        time.sleep(0.05)
+    raise AssertionError(f"{count} sessions did not finish in {timeout} s")
+
+
+def test_commands_over_socket(daemon):
+    status = command(daemon, "status")
+    assert status["ok"] and status["state"] == "idle"
+    assert status["current"] is None and status["queued"] == 0
+
+    assert command(daemon, "stop") == {"ok": False, "error": "No session is recording"}
+    assert not command(daemon, "bogus")["ok"]
+
+    later = command(daemon, "start", name="later", delay=60)["session"]
+    queue = command(daemon, "queue")["queue"]
+    assert [s["id"] for s in queue] == [later["id"]]
+    assert command(daemon, "cancel", id=later["id"])["session"]["status"] == "cancelled"
+    assert command(daemon, "queue")["queue"] == []
+    assert not command(daemon, "cancel", id=later["id"])["ok"]
+
+    session = command(daemon, "start", name="trial", duration=0.2)["session"]
+    (done,) = wait_finished(daemon, 1)
+    assert done["id"] == session["id"]
+    assert done["status"] == "stopped"
+    assert done["frames"] > 0
+    assert done["path"].startswith(daemon.output_dir)
+
+    session = command(daemon, "start", name="manual")["session"]
+    deadline = time.time() + 10.0
+    while command(daemon, "status")["state"] != "recording":
+        assert time.time() < deadline, "session did not start"
+        time.sleep(0.02)
+    reply = command(daemon, "stop")
+    assert reply["ok"] and reply["session"]["id"] == session["id"]
+    assert wait_finished(daemon, 2)[-1]["status"] == "stopped"
+
+    assert command(daemon, "shutdown") == {"ok": True}
+
+
+def test_failed_start_keeps_daemon_running(daemon):
+    start_recording = daemon.recorder.start_recording
+    calls = []
+
+    def fail_once(base_filename):
+        calls.append(base_filename)
+        if len(calls) == 1:
+            raise OSError("No space left on device")
+        return start_recording(base_filename)
+
+    daemon.recorder.start_recording = fail_once
+    broken = command(daemon, "start", name="broken", duration=0.2)["session"]
+    session = command(daemon, "start", name="next", duration=0.2)["session"]
+
+    failed, done = wait_finished(daemon, 2)
+    assert failed["id"] == broken["id"]
+    assert failed["status"] == "failed"
+    assert "No space left" in failed["error"]
+    assert done["id"] == session["id"]
+    assert done["status"] == "stopped" and done["frames"] > 0
+
+    status = command(daemon, "status")
+    assert status["state"] == "idle" and status["frames_seen"] > 0
@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+import pytest
+
+from behavior_camera.delta import DeltaCapture, open_video
+from behavior_camera.writers import DeltaWriter
+
+
+def arena_frames(count, channels, seed=0):
+    """Static noisy arena with a moving animal and a lighting change."""
+    rng = np.random.default_rng(seed)
+    shape = (50, 70) if channels == 1 else (50, 70, channels)
+    background = rng.integers(0, 256, shape, dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        y, x = (3 * i) % 40, (5 * i) % 60
+        frame[y : y + 10, x : x + 10] = rng.integers(0, 256, (10, 10) + shape[2:])
+        if i >= count // 2:
+            # Lights dimmed: every pixel changes
+            frame = (frame // 2).astype(np.uint8)
+        frames.append(frame)
+    return frames
+
+
+@pytest.mark.parametrize("channels", [1, 3])
+def test_round_trip_is_exact(tmp_path, channels):
+    frames = arena_frames(30, channels)
+    path = str(tmp_path / "out.bgd")
+    # Tiles that do not divide the frame size, and a keyframe interval
+    # shorter than the recording
+    options = {"tile_size": 16, "keyframe_interval": 8, "threads": 2}
+    writer = DeltaWriter(path, 30.0, (70, 50), channels == 3, options)
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+    cap = open_video(path)
+    assert isinstance(cap, DeltaCapture)
+    try:
+        assert len(cap) == len(frames)
+        assert int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == 70
+        assert int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == 50
+        # More than one keyframe was stored (interval and lighting change)
+        assert len(cap.key_offsets) > 2
+
+        # Random access in any order
+        for index in np.random.default_rng(1).permutation(len(frames)):
+            decoded = cap.decode(int(index))
+            np.testing.assert_array_equal(
+                decoded.reshape(frames[index].shape), frames[index]
+            )
+
+        # Sequential reads return BGR like OpenCV
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        for frame in frames:
+            ret, decoded = cap.read()
+            assert ret and decoded.shape == (50, 70, 3)
+            if channels == 1:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            np.testing.assert_array_equal(decoded, frame)
+        assert cap.read() == (False, None)
+    finally:
+        cap.release()
+
+
+def test_unclosed_archive_is_readable(tmp_path):
+    frames = arena_frames(12, 3)
+    path = str(tmp_path / "out.bgd")
+    writer = DeltaWriter(path, 30.0, (70, 50), True, {"keyframe_interval": 5})
+    for frame in frames:
+        writer.write(frame)
+    # Interrupted before release: no index at the end of the file
+    writer.file.flush()
+
+    cap = DeltaCapture(path)
+    try:
+        assert len(cap) == len(frames)
+        for index, frame in enumerate(frames):
+            np.testing.assert_array_equal(cap.decode(index), frame)
+    finally:
+        cap.release()
+        writer.release()
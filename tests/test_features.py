@@ -0,0 +1,38 @@
+import gxipy as gx
+import pytest
+
+from behavior_camera.features import FeatureControl
+
+
+@pytest.fixture
+def features():
+    device = gx.DeviceManager().open_device_by_index(1)
+    return FeatureControl(device.get_remote_device_feature_control())
+
+
+def roi(features):
+    return tuple(
+        features.get(name) for name in ("OffsetX", "OffsetY", "Width", "Height")
+    )
+
+
+def test_roi_moves_and_shrinks(features):
+    features.request(Width=640, Height=480, OffsetX=1280, OffsetY=600)
+    features.apply_pending()
+    assert roi(features) == (1280, 600, 640, 480)
+
+
+def test_roi_grows_from_an_offset(features):
+    features.request(Width=640, Height=480, OffsetX=1280, OffsetY=600)
+    features.apply_pending()
+    features.request(Width=1920, Height=1080, OffsetX=0, OffsetY=0)
+    features.apply_pending()
+    assert roi(features) == (0, 0, 1920, 1080)
+
+
+def test_roi_size_clamped_to_current_offset(features):
+    features.request(Width=640, OffsetX=1280)
+    features.apply_pending()
+    features.request(Width=1024)
+    features.apply_pending()
+    assert features.get("Width") == 640
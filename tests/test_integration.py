@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pytest
+
+from behavior_camera.frame_info import FrameInfo
+from behavior_camera.integration import FrameIntegrator
+from behavior_camera.recorder import VideoRecorder
+
+
+def test_mean_of_consecutive_frames():
+    integrator = FrameIntegrator({"mode": "mean", "frames": 4})
+    results = [
+        integrator.add(np.full((2, 2), value, dtype=np.uint8), float(value))
+        for value in (10, 20, 30, 41)
+    ]
+    assert results[:3] == [None, None, None]
+    frame, timestamp = results[3]
+    assert frame.dtype == np.uint8
+    assert (frame == 25).all()
+    assert timestamp == 25.25
+
+
+def test_group_discarded_at_source_gap(tmp_path):
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {
+            "preview": False,
+            "file_format": "png",
+            "integration": {"mode": "mean", "frames": 4},
+        },
+    }
+    recorder = VideoRecorder(str(tmp_path), config)
+    recorder.start_recording("gap")
+    # Frame ID 6 never arrives: the group started at 4 must not be merged
+    # with the frames after the gap
+    frame_ids = [0, 1, 2, 3, 4, 5, 7, 8, 9, 10]
+    last_id = None
+    for frame_id in frame_ids:
+        gap = None if last_id is None else frame_id - last_id - 1
+        last_id = frame_id
+        recorder.record_frame(
+            np.full((4, 4), frame_id * 10, dtype=np.uint8),
+            100.0 + frame_id,
+            info=FrameInfo(frame_id, 0.0, gap=gap),
+        )
+    summary = recorder.stop_recording()
+
+    assert recorder.timestamps == [101.5, 108.5]
+    assert recorder.group_starts == [0, 6]
+    assert summary["integration_discarded"] == 2
+    with open(recorder.timestamp_path) as f:
+        sidecar = json.load(f)
+    assert sidecar["integration"]["discarded"] == 2
+    assert sidecar["source_gaps"][0]["frame_id"] == 7
+
+
+def test_sum_rejected_for_video_formats(tmp_path):
+    output_dir = tmp_path / "recordings"
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {
+            "preview": False,
+            "file_format": "avi",
+            "integration": {"mode": "sum", "frames": 4},
+        },
+    }
+    with pytest.raises(ValueError, match="png or tiff"):
+        VideoRecorder(str(output_dir), config)
+    assert not output_dir.exists()
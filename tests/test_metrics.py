@@ -0,0 +1,75 @@
+import re
+import time
+import urllib.request
+
+from behavior_camera.recorder import VideoRecorder
+
+
+def scrape(port):
+    url = f"http://127.0.0.1:{port}/metrics"
+    with urllib.request.urlopen(url, timeout=5) as response:
+        assert response.status == 200
+        return response.read().decode("utf-8")
+
+
+def sample(text, name, *labels):
+    """Value of the first sample of a metric carrying all given labels."""
+    pattern = re.compile(rf"^behavior_camera_{name}\{{(.*)\}} (\S+)$", re.M)
+    for label_text, value in pattern.findall(text):
+        if all(label in label_text for label in labels):
+            return float(value)
+    raise AssertionError(f"{name} {labels} not exported")
+
+
+def record_frames(recorder, camera, frames):
+    recorded = 0
+    while recorded < frames:
+        timestamp, frame, info = camera.get_frame_with_info()
+        if frame is not None:
+            recorder.record_frame(frame[:64, :64], timestamp, info=info)
+            recorded += 1
+
+
+def test_metrics_endpoint_counts_across_sessions(tmp_path, mock_camera):
+    config = {
+        "camera": {"framerate": 60},
+        "recording": {
+            "preview": False,
+            "file_format": "png",
+            "metrics": {"enabled": True, "host": "127.0.0.1", "port": 0},
+        },
+    }
+    recorder = VideoRecorder(str(tmp_path), config)
+    port = recorder.metrics.port
+    assert port != 0
+    try:
+        totals = []
+        for session, frames in (("first", 4), ("second", 3)):
+            recorder.start_recording(session)
+            record_frames(recorder, mock_camera, frames)
+            deadline = time.monotonic() + 5.0
+            while recorder.outputs[0].frames_written < frames:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            text = scrape(port)
+            assert sample(text, "recording") == 1
+            for q in ("0.5", "0.9", "0.99"):
+                sample(text, "frame_interval_seconds", f'quantile="{q}"')
+                sample(
+                    text,
+                    "encode_latency_seconds",
+                    'output="archive"',
+                    f'quantile="{q}"',
+                )
+
+            recorder.stop_recording()
+            text = scrape(port)
+            totals.append(
+                (
+                    sample(text, "frames_captured_total"),
+                    sample(text, "frames_written_total", 'output="archive"'),
+                )
+            )
+        assert totals == [(4, 4), (7, 7)]
+    finally:
+        recorder.metrics.stop()
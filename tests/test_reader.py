@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pytest
+
+from behavior_camera.reader import RecordingReader
+from behavior_camera.writers import DeltaWriter
+
+CAPTURED = 20
+DROPPED = [3, 7, 15]
+SEGMENT_STARTS = [0, 10]
+
+
+def capture_frame(index):
+    """Frame whose content identifies its capture index."""
+    frame = np.zeros((32, 48, 3), dtype=np.uint8)
+    frame[:, :, 0] = index
+    frame[index % 32, :, 1] = 255
+    return frame
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Two-segment delta recording with dropped frames and its sidecar."""
+    rng = np.random.default_rng(1)
+    # Irregular frame intervals, as with a jittering camera clock
+    timestamps = 100.0 + np.cumsum(rng.uniform(0.02, 0.05, CAPTURED))
+    segments = []
+    bounds = SEGMENT_STARTS + [CAPTURED]
+    for k, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        name = "session.bgd" if k == 0 else f"session_seg{k}.bgd"
+        writer = DeltaWriter(str(tmp_path / name), 30.0, (48, 32))
+        for index in range(start, stop):
+            if index not in DROPPED:
+                writer.write(capture_frame(index))
+        writer.release()
+        segments.append({"path": name, "start": start})
+    sidecar = {
+        "timestamps": timestamps.tolist(),
+        "dropped": DROPPED,
+        "outputs": {
+            "archive": {
+                "path": "session.bgd",
+                "dropped": DROPPED,
+                "bayer_pattern": None,
+                "is_color": True,
+                "segments": segments,
+            }
+        },
+    }
+    (tmp_path / "session_timestamps.json").write_text(json.dumps(sidecar))
+    return tmp_path, timestamps
+
+
+@pytest.mark.parametrize("segment", [0, 1])
+def test_segments_map_to_kept_captures(session, segment):
+    directory, timestamps = session
+    name = "session.bgd" if segment == 0 else "session_seg1.bgd"
+    start = SEGMENT_STARTS[segment]
+    stop = SEGMENT_STARTS[segment + 1] if segment == 0 else CAPTURED
+    expected = [i for i in range(start, stop) if i not in DROPPED]
+
+    with RecordingReader(str(directory / name)) as reader:
+        assert len(reader) == len(expected)
+        np.testing.assert_array_equal(reader.capture_indices, expected)
+        np.testing.assert_array_equal(reader.timestamps, timestamps[expected])
+        for index, capture in enumerate(expected):
+            np.testing.assert_array_equal(reader.read(index), capture_frame(capture))
+
+
+def test_frame_at_time_matches_nearest_frame(session):
+    directory, timestamps = session
+    rng = np.random.default_rng(2)
+    with RecordingReader(str(directory / "session.bgd")) as reader:
+        # Include times inside the gaps left by dropped frames, exact frame
+        # times and times outside the segment
+        times = np.concatenate(
+            [
+                rng.uniform(timestamps[0] - 0.1, timestamps[12], 200),
+                timestamps[:10],
+            ]
+        )
+        for t in times:
+            distance = np.abs(reader.timestamps - t)
+            index = reader.frame_at_time(t)
+            assert distance[index] == distance.min()
+
+        # A dropped frame's time maps to a neighbouring recorded frame
+        index = reader.frame_at_time(timestamps[DROPPED[0]])
+        assert reader.capture_indices[index] in (DROPPED[0] - 1, DROPPED[0] + 1)
+
+
+def test_read_range_matches_single_reads(session):
+    directory, _ = session
+    path = str(directory / "session_seg1.bgd")
+    with RecordingReader(path, cache_size=4, keyframe_interval=2) as reader:
+        # Warm the cache with some frames so the range mixes cached and
+        # decoded frames, and force a backward seek
+        reader.read(6)
+        reader.read(2)
+        stack = reader.read_range(1, 8)
+        assert stack.shape == (7, 32, 48, 3)
+        for k, index in enumerate(range(1, 8)):
+            capture = reader.capture_indices[index]
+            np.testing.assert_array_equal(stack[k], capture_frame(capture))
+
+        assert reader.read_range(-3, 100).shape[0] == len(reader)
+        assert reader.read_range(5, 5).shape[0] == 0
+
+        start, stop = reader.frame_range(reader.timestamps[2], reader.timestamps[5])
+        assert (start, stop) == (2, 5)
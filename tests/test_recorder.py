@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+
+from behavior_camera.recorder import VideoRecorder
+
+
+def test_slow_analysis_callback_does_not_degrade_archive(tmp_path):
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {
+            "preview": False,
+            "file_format": "png",
+            "load_shedding": {
+                "enabled": True,
+                "check_interval": 0.0,
+                "min_free_gb": 0.0,
+            },
+        },
+    }
+    recorder = VideoRecorder(str(tmp_path), config)
+    received = []
+
+    def slow_analysis(index, timestamp, frame, info):
+        time.sleep(0.05)
+        received.append(index)
+
+    recorder.add_analysis_output("tracker", slow_analysis, queue_size=2)
+    recorder.start_recording("session")
+    frame = np.zeros((16, 16), dtype=np.uint8)
+    for i in range(40):
+        recorder.record_frame(frame, 100.0 + i / 30)
+        time.sleep(0.002)
+    tracker = recorder.outputs[-1]
+    paused = tracker.paused
+    summary = recorder.stop_recording()
+
+    assert recorder.events == []
+    assert summary["frames_written"] == 40
+    assert not paused
+    assert summary["outputs"]["tracker"]["frames_dropped"] > 0
+    assert received
+
+
+def test_outputs_receive_frame_descriptors(tmp_path, mock_camera):
+    config = {"camera": {"framerate": 60}, "recording": {"preview": False}}
+    recorder = VideoRecorder(str(tmp_path), config)
+    received = []
+    recorder.add_analysis_output(
+        "tracker",
+        lambda index, timestamp, frame, info: received.append((index, info)),
+        scale=0.1,
+        queue_size=16,
+    )
+    recorder.start_recording("session")
+    sent = []
+    while len(sent) < 5:
+        timestamp, frame, info = mock_camera.get_frame_with_info()
+        if frame is not None:
+            recorder.record_frame(frame[:64, :64], timestamp, info=info)
+            sent.append(info)
+    recorder.stop_recording()
+
+    assert [index for index, _ in received] == list(range(5))
+    assert [info for _, info in received] == sent
+    assert recorder.frame_ids == [info.frame_id for info in sent]
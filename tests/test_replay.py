@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+
+from behavior_camera.recorder import VideoRecorder
+from behavior_camera.replay import ReplayCamera
+
+
+def record_session(directory, frames):
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {"preview": False, "file_format": "avi"},
+    }
+    recorder = VideoRecorder(str(directory), config)
+    recorder.start_recording("session")
+    for i, frame in enumerate(frames):
+        recorder.record_frame(frame, 100.0 + i / 30)
+    recorder.stop_recording()
+    return str(directory / "session.avi")
+
+
+def replay_all(path):
+    replay = ReplayCamera({"path": path, "realtime": False})
+    assert replay.initialize()
+    frames = []
+    try:
+        while True:
+            _, frame = replay.get_frame()
+            if frame is None:
+                return frames
+            frames.append(frame)
+    finally:
+        replay.release()
+
+
+@pytest.mark.parametrize("sidecar_flag", [True, False])
+def test_mono_recording_replays_as_mono(tmp_path, sidecar_flag):
+    frames = [np.full((48, 64), 40 + 20 * i, dtype=np.uint8) for i in range(4)]
+    path = record_session(tmp_path, frames)
+    if not sidecar_flag:
+        sidecar_path = tmp_path / "session_timestamps.json"
+        sidecar = json.loads(sidecar_path.read_text())
+        del sidecar["outputs"]["archive"]["is_color"]
+        sidecar_path.write_text(json.dumps(sidecar))
+
+    replayed = replay_all(path)
+    assert len(replayed) == len(frames)
+    assert all(frame.shape == (48, 64) for frame in replayed)
+
+
+def test_color_recording_replays_as_color(tmp_path):
+    frames = [np.zeros((48, 64, 3), dtype=np.uint8) for _ in range(4)]
+    path = record_session(tmp_path, frames)
+
+    replayed = replay_all(path)
+    assert all(frame.shape == (48, 64, 3) for frame in replayed)
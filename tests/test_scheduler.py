@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from behavior_camera import scheduler
+from behavior_camera.scheduler import FrameScheduler
+
+
+@pytest.mark.parametrize("spin_yield", [True, False])
+def test_spin_yields_only_when_enabled(monkeypatch, spin_yield):
+    sleeps = []
+    sleep = time.sleep
+
+    def record_sleep(seconds):
+        sleeps.append(seconds)
+        sleep(seconds)
+
+    monkeypatch.setattr(scheduler.time, "sleep", record_sleep)
+    # Spin through the whole period
+    pacer = FrameScheduler(100, {"spin_threshold": 1.0, "spin_yield": spin_yield})
+    pacer.start()
+    for _ in range(3):
+        pacer.wait()
+    assert (0 in sleeps) == spin_yield
+
+
+@pytest.mark.parametrize(
+    "settings", [{}, {"spin_yield": False}, {"spin_threshold": 0.0}]
+)
+def test_frames_stay_on_the_grid(settings):
+    pacer = FrameScheduler(200, settings)
+    pacer.start()
+    times = [pacer.wait() for _ in range(20)]
+    stats = pacer.stats()
+
+    assert stats["frames"] == 20
+    # Scheduled times are deadlines on the timeline, skipped ones included
+    steps = [(b - a) / pacer.period for a, b in zip(times, times[1:])]
+    assert all(abs(step - round(step)) < 1e-3 and round(step) >= 1 for step in steps)
+    assert (
+        round((times[-1] - times[0]) / pacer.period) == 19 + stats["missed_deadlines"]
+    )
+    # No wake-up before a deadline
+    assert pacer.lateness[:20].min() >= 0
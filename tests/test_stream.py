@@ -0,0 +1,58 @@
+import time
+
+import gxipy as gx
+import numpy as np
+
+from behavior_camera.frame_info import FrameInfo
+from behavior_camera.recorder import VideoRecorder
+from behavior_camera.stream import GalaxyStream
+
+
+def convert(raw_image):
+    """Describe a mock image and return a small frame for it."""
+    info = FrameInfo(
+        raw_image.get_frame_id(),
+        time.time(),
+        raw_image.get_timestamp(),
+        status=raw_image.get_status(),
+    )
+    return info.device_timestamp, np.zeros((8, 8), dtype=np.uint8), info
+
+
+def test_gap_counts_queue_overflow(tmp_path):
+    device = gx.GxDevice()
+    device.open()
+    device._features["AcquisitionFrameRate"] = 500.0
+    stream = GalaxyStream(
+        device.data_stream[0],
+        convert,
+        {"mode": "callback", "buffers": 2, "queue_size": 2},
+    )
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {"preview": False, "file_format": "png"},
+    }
+    recorder = VideoRecorder(str(tmp_path), config)
+    recorder.start_recording("overflow")
+
+    stream.start()
+    device.stream_on()
+    ids = []
+    try:
+        while len(ids) < 20:
+            timestamp, frame, info = stream.read()
+            if frame is None:
+                continue
+            ids.append(info.frame_id)
+            recorder.record_frame(frame, timestamp, info=info)
+            time.sleep(0.02)  # slow consumer: the queue overflows
+    finally:
+        device.stream_off()
+        stream.stop()
+    recorder.stop_recording()
+
+    missing = (ids[-1] - ids[0] + 1) - len(ids)
+    assert stream.queue_dropped > 0
+    assert missing > 0
+    assert recorder.source_lost == missing
+    assert sum(gap["lost"] for gap in recorder.source_gaps) == missing
@@ -0,0 +1,117 @@
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from behavior_camera.recorder import VideoRecorder
+from behavior_camera import transcode
+from behavior_camera.transcode import (
+    JOURNAL_NAME,
+    find_jobs,
+    run_transcode,
+    transcode_file,
+)
+
+
+def record_session(directory, frames, file_format="avi"):
+    config = {
+        "camera": {"framerate": 30},
+        "recording": {"preview": False, "file_format": file_format},
+    }
+    recorder = VideoRecorder(str(directory), config)
+    recorder.start_recording("session")
+    for i, frame in enumerate(frames):
+        recorder.record_frame(frame, 100.0 + i / 30)
+    recorder.stop_recording()
+    return os.path.join(str(directory), "session_timestamps.json")
+
+
+def run_job(job, recording_config):
+    return transcode_file(
+        job["source"],
+        job["output"],
+        recording_config,
+        expected_frames=job["expected_frames"],
+        is_color=job["is_color"],
+    )
+
+
+def test_color_kept_when_first_frame_is_dark(tmp_path):
+    red = np.zeros((64, 64, 3), dtype=np.uint8)
+    red[..., 2] = 200
+    frames = [np.zeros((64, 64, 3), dtype=np.uint8)] * 3 + [red] * 5
+    record_session(tmp_path / "src", frames)
+
+    (job,) = find_jobs([str(tmp_path / "src")], str(tmp_path / "dst"), {})
+    assert job["is_color"] is True
+    run_job(job, {"file_format": "avi"})
+
+    cap = cv2.VideoCapture(job["output"])
+    for _ in range(len(frames)):
+        ret, frame = cap.read()
+        assert ret
+    cap.release()
+    assert frame[..., 2].mean() > frame[..., 0].mean() + 100
+
+
+def test_mono_recording_stays_mono(tmp_path):
+    frames = [np.full((64, 64), 10 * i, dtype=np.uint8) for i in range(5)]
+    record_session(tmp_path / "src", frames)
+
+    (job,) = find_jobs([str(tmp_path / "src")], str(tmp_path / "dst"), {})
+    assert job["is_color"] is False
+    assert run_job(job, {"file_format": "avi"})["frames"] == len(frames)
+
+
+def test_frame_count_mismatch_with_sidecar_fails(tmp_path):
+    frames = [np.full((64, 64, 3), 10 * i, dtype=np.uint8) for i in range(5)]
+    record_session(tmp_path / "src", frames)
+    (job,) = find_jobs([str(tmp_path / "src")], str(tmp_path / "dst"), {})
+    assert job["expected_frames"] == len(frames)
+
+    job["expected_frames"] += 1
+    with pytest.raises(RuntimeError, match="Frame count mismatch"):
+        run_job(job, {"file_format": "avi"})
+    # Neither the output nor the partial file is left behind
+    assert os.listdir(os.path.dirname(job["output"])) == []
+
+
+def test_short_output_fails(tmp_path, monkeypatch):
+    frames = [np.full((64, 64, 3), 10 * i, dtype=np.uint8) for i in range(5)]
+    record_session(tmp_path / "src", frames)
+    (job,) = find_jobs([str(tmp_path / "src")], str(tmp_path / "dst"), {})
+
+    monkeypatch.setattr(transcode, "count_frames", lambda path, chunk_size: 4)
+    with pytest.raises(RuntimeError, match="4 in output"):
+        run_job(job, {"file_format": "avi"})
+    assert os.listdir(os.path.dirname(job["output"])) == []
+
+
+def test_journal_skips_finished_jobs(tmp_path):
+    frames = [np.full((64, 64, 3), 10 * i, dtype=np.uint8) for i in range(5)]
+    record_session(tmp_path / "src", frames)
+    sources, dest = [str(tmp_path / "src")], str(tmp_path / "dst")
+
+    def run():
+        return run_transcode(sources, dest, {"file_format": "avi"}, jobs=1, echo=str)
+
+    first = run()
+    assert (first["done"], first["skipped"], first["frames"]) == (1, 0, len(frames))
+
+    # An interrupted run may leave a partial journal line behind
+    with open(os.path.join(dest, JOURNAL_NAME), "a") as f:
+        f.write('{"source": "cut sh')
+    assert run()["skipped"] == 1
+
+    # A changed source is transcoded again
+    (job,) = find_jobs(sources, dest, {})
+    os.utime(job["source"], (0, 0))
+    again = run()
+    assert (again["done"], again["skipped"]) == (1, 0)
+    assert run()["skipped"] == 1
+
+    # So is a job whose output was deleted
+    os.remove(job["output"])
+    assert run()["done"] == 1
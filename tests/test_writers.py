@@ -0,0 +1,115 @@
+import subprocess
+
+import cv2
+import numpy as np
+import pytest
+
+from behavior_camera import writers
+from behavior_camera.mjpeg import JpegFrame
+
+
+@pytest.fixture
+def no_encoders(monkeypatch):
+    monkeypatch.setattr(writers, "ffmpeg_encoders", lambda: frozenset())
+    monkeypatch.setattr(writers, "opencv_supports", lambda *args: False)
+
+
+def test_lossless_never_falls_back_to_lossy(tmp_path, no_encoders):
+    config = {"file_format": "mkv", "encoder": {"lossless": True}}
+    with pytest.raises(RuntimeError, match="lossless"):
+        writers.create_writer(str(tmp_path / "out.mkv"), 30.0, (64, 48), config)
+
+
+def test_lossy_falls_back_to_xvid(tmp_path, no_encoders):
+    writer = writers.create_writer(
+        str(tmp_path / "out.avi"), 30.0, (64, 48), {"file_format": "avi"}
+    )
+    try:
+        assert writer.fourcc == "XVID"
+    finally:
+        writer.release()
+
+
+def decode_raw(path, shape):
+    """Decode a video with ffmpeg into an array of raw frames."""
+    pix_fmt = "bgr24" if len(shape) == 3 else "gray"
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-i",
+            path,
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            pix_fmt,
+            "-",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape((-1,) + shape)
+
+
+@pytest.mark.parametrize(
+    "codec,is_color",
+    [
+        ("libx264", True),
+        ("libx264", False),
+        ("libx265", True),
+        ("ffv1", True),
+        ("ffv1", False),
+    ],
+)
+def test_ffmpeg_lossless_round_trip(tmp_path, codec, is_color):
+    if writers.ffmpeg_codec(codec, True, is_color) not in writers.ffmpeg_encoders():
+        pytest.skip(f"ffmpeg encoder for {codec} not available")
+    shape = (48, 64, 3) if is_color else (48, 64)
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, (10,) + shape, dtype=np.uint8)
+    path = str(tmp_path / "out.mkv")
+    config = {
+        "file_format": "mkv",
+        "encoder": {"backend": "ffmpeg", "codec": codec, "lossless": True},
+    }
+    writer = writers.create_writer(path, 30.0, (64, 48), config, is_color)
+    assert isinstance(writer, writers.FFmpegWriter)
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    assert not writer.error
+
+    np.testing.assert_array_equal(decode_raw(path, shape), frames)
+
+
+def test_mjpeg_passthrough_avi_is_readable(tmp_path):
+    values = [30 + 20 * i for i in range(12)]
+    frames = [
+        JpegFrame(cv2.imencode(".jpg", np.full((48, 64, 3), v, dtype=np.uint8))[1])
+        for v in values
+    ]
+    path = str(tmp_path / "out.avi")
+    writer = writers.create_writer(
+        path, 30.0, (64, 48), {"file_format": "mjpeg"}, compressed=True
+    )
+    assert isinstance(writer, writers.MjpegPassthroughWriter)
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+    cap = cv2.VideoCapture(path)
+    try:
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == len(frames)
+        decoded = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            decoded.append(frame)
+    finally:
+        cap.release()
+    assert len(decoded) == len(frames)
+    for frame, value in zip(decoded, values):
+        assert frame.shape == (48, 64, 3)
+        assert abs(float(frame.mean()) - value) < 2